@@ -0,0 +1,47 @@
+from typing import List
+from fastapi import APIRouter, Depends, File, UploadFile
+from api.apps.pages import vgg16, forest
+from api.apps.pages.services import (
+    read_audio_features, get_spectrogram_base64, cached_batch_predict, close_uploads
+)
+from api.core.constants import MAX_UPLOAD_FILES, FOREST_MODEL_PATH
+from api.core.models import vgg16_model
+from api.core.metrics import metrics
+from api.handlers.log_handler import raise_http_exception
+
+predictions_endpoint = APIRouter()
+
+
+async def read_uploads(files: List[UploadFile]):
+    metrics.since_request("form_parse")
+    if len(files) > MAX_UPLOAD_FILES:
+        raise_http_exception(413, f"At most {MAX_UPLOAD_FILES} files can be sent in one request.")
+    for file in files:
+        if "audio" not in (file.content_type or ""):
+            raise_http_exception(415, f"{file.filename}: the file format is not supported.")
+    return [await read_audio_features(file) for file in files]
+
+
+async def build_results(files, features, predictions, include_spectrogram):
+    results = [{"filename": file.filename, **prediction} for file, prediction in zip(files, predictions)]
+    if include_spectrogram:
+        for result, feature in zip(results, features):
+            if result.get("cry_detected"):
+                result["spectrogram"] = await get_spectrogram_base64(feature)
+    return results
+
+
+@predictions_endpoint.post("/vgg16/predict", dependencies=[Depends(close_uploads)])
+async def vgg16_predict_json(files: List[UploadFile] = File(...), include_spectrogram: bool = False):
+    features = await read_uploads(files)
+    predictions = await cached_batch_predict(
+        features, "vgg16", vgg16_model.path, vgg16.prepare_spectrograms, vgg16.predict_rows)
+    return {"model": "vgg16", "results": await build_results(files, features, predictions, include_spectrogram)}
+
+
+@predictions_endpoint.post("/forest/predict", dependencies=[Depends(close_uploads)])
+async def forest_predict_json(files: List[UploadFile] = File(...), include_spectrogram: bool = False):
+    features = await read_uploads(files)
+    predictions = await cached_batch_predict(
+        features, "forest", FOREST_MODEL_PATH, forest.prepare_features, forest.predict_rows)
+    return {"model": "forest", "results": await build_results(files, features, predictions, include_spectrogram)}
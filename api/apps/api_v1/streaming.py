@@ -0,0 +1,67 @@
+import numpy as np
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from api.apps.pages import vgg16, forest
+from api.core.configurations import streaming_settings, audio_settings
+from api.core.executors import preprocessing_executor, inference_executor
+from api.ml_logic.features import AudioFeatures
+from api.ml_logic.streaming import CryStream
+
+streaming_endpoint = APIRouter()
+
+PCM_ENCODINGS = {"pcm_s16le": ("<i2", 1 / 32768), "pcm_f32le": ("<f4", 1.0)}
+
+
+async def classify_window(model: str, window: np.ndarray, sample_rate: int) -> dict:
+    features = AudioFeatures.from_signal(window, sample_rate, sample_rate=audio_settings.sample_rate)
+    if model == "vgg16":
+        spectrogram_array = await preprocessing_executor.run(vgg16.get_spectrogram_array, features)
+        return {"predictions": vgg16.predict_and_sort(await vgg16.vgg16_batcher.predict(spectrogram_array[0]))}
+    features_arrays = await preprocessing_executor.run(forest.prepare_features, [features])
+    return (await inference_executor.run(forest.predict_rows, features_arrays))[0]
+
+
+@streaming_endpoint.websocket("/stream")
+async def classify_stream(
+        websocket: WebSocket,
+        model: str = "vgg16",
+        sample_rate: int = 16000,
+        encoding: str = "pcm_s16le"
+):
+    """
+    Classifies a live mono PCM stream sent as binary messages.
+
+    The models only run on windows where onset detection finds a cry; each classification is
+    pushed back as a JSON message with the stream time in seconds it refers to. Sample rates
+    outside the configured range are refused, and a message above max_message_bytes closes the
+    stream with 1009.
+    """
+    limits = streaming_settings.limits
+    if model not in ("vgg16", "forest") or encoding not in PCM_ENCODINGS \
+            or not limits["min_sample_rate"] <= sample_rate <= limits["max_sample_rate"]:
+        await websocket.close(code=1003)
+        return
+    dtype, scale = PCM_ENCODINGS[encoding]
+    itemsize = np.dtype(dtype).itemsize
+
+    await websocket.accept()
+    stream = CryStream(sample_rate, **streaming_settings.stream)
+    pending = b""
+    try:
+        while True:
+            message = await websocket.receive_bytes()
+            if len(message) > limits["max_message_bytes"]:
+                await websocket.close(code=1009)
+                return
+            data = pending + message
+            usable = len(data) // itemsize * itemsize
+            pending = data[usable:]
+            samples = np.frombuffer(data[:usable], dtype=dtype).astype(np.float32) * scale
+            if not stream.push(samples):
+                continue
+            try:
+                result = await classify_window(model, stream.window(), sample_rate)
+            except HTTPException as e:
+                result = {"error": e.detail}
+            await websocket.send_json({"model": model, "time": round(stream.seconds_received, 3), **result})
+    except WebSocketDisconnect:
+        pass
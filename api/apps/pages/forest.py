@@ -1,18 +1,22 @@
 import numpy as np
 from typing import Dict
-from api.ml_logic.preprpcessings import extract_mfcc
 from .services import (
-    APIRouter, Request,
+    APIRouter, Depends, Request,
     File, UploadFile,
     render_template,
     forms, get_audio_data,
-    random_pics
+    cached_batch_predict, random_pics, NO_CRY_MESSAGES, close_uploads
 )
 
-import time
-from api.core.constants import CLASS_LABELS
+from api.core.constants import CLASS_LABELS, FOREST_MODEL_PATH
+from api.core.models import forest_model
+from api.core.metrics import metrics
+from api.ml_logic.feature_schema import load_feature_schema
+from api.ml_logic.preprpcessings import extract_mfcc
 
 forest_endpoint = APIRouter()
+# Read at import so a missing or inconsistent schema stops the app from starting
+forest_schema = load_feature_schema(FOREST_MODEL_PATH)
 
 
 @forest_endpoint.get("/")
@@ -20,31 +24,52 @@ async def get_forest_page(request: Request):
     return await render_template("forest.html", {"request": request})
 
 
-async def predict(audio_features, model):
-    features_flatten = audio_features.flatten()
-    repeat_times = 1200 // len(features_flatten) + 1
-    extended_features = np.tile(features_flatten, repeat_times)[:1200]
-    extended_features = np.expand_dims(extended_features, axis=0)
-    return model.predict(extended_features)
+def prepare_features(features_list):
+    """Extracts the MFCCs of every clip straight into its row of one batch laid out as forest_schema."""
+    batch = np.empty((len(features_list), forest_schema.length), dtype=np.float32)
+    for row, features in zip(batch, features_list):
+        decoded = features.decoded
+        with metrics.span("mfcc"):
+            extract_mfcc(decoded, out=row.reshape(forest_schema.shape), **forest_schema.mfcc_params)
+    return batch
 
 
-@forest_endpoint.post("/")
-async def forest_predict(request: Request, file: UploadFile = File(...)) -> Dict:
-    start = time.perf_counter()
+def predict_rows(features_arrays):
+    model = forest_model.get()
+    with metrics.span("predict", model="forest"):
+        all_probabilities = model.predict_proba(features_arrays)
+    rows = []
+    for probabilities in all_probabilities:
+        prediction_percentages = {
+            CLASS_LABELS[int(c)]: round(float(p) * 100, 2) for c, p in zip(model.classes_, probabilities)
+        }
+        rows.append({
+            "prediction_label": CLASS_LABELS[int(model.classes_[np.argmax(probabilities)])],
+            "predictions": dict(sorted(prediction_percentages.items(), key=lambda item: item[1], reverse=True))
+        })
+    return rows
 
-    from main import get_forest_model
+
+@forest_endpoint.post("/", dependencies=[Depends(close_uploads)])
+async def forest_predict(request: Request, file: UploadFile = File(...)) -> Dict:
     form = forms.FileUploadForm(request)
     await form.load_data()
+    metrics.since_request("form_parse")
     if not await form.file_is_valid():
         return await render_template("forest.html", {"request": request, "errors": form.errors})
 
-    audio_base64, audio_content_b, y_clean, _, spectrogram_base64 = await get_audio_data(file)
+    audio_base64, features, spectrogram_base64, no_cry = await get_audio_data(file)
+    if no_cry:
+        return await render_template("forest.html", {
+            "request": request,
+            "msg": NO_CRY_MESSAGES[no_cry["reason"]],
+            "audio_base64": audio_base64,
+            "filename": file.filename
+        })
 
-    mfccs = extract_mfcc(audio_content_b)
-    prediction = await predict(mfccs, get_forest_model())
-    prediction_label = CLASS_LABELS.get(prediction[0])
+    predictions = await cached_batch_predict([features], "forest", FOREST_MODEL_PATH, prepare_features, predict_rows)
+    prediction_label = predictions[0]["prediction_label"]
 
-    print(time.perf_counter() - start)
     return await render_template("forest.html", {
         "request": request,
         "msg": "File Loaded",
@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from api.core.executors import executors_stats
+from api.core.metrics import metrics, gauge, process_rss_bytes
+from api.apps.pages.vgg16 import vgg16_batcher
+from api.core.cache import prediction_cache
+from api.core.models import model_registry
+from api.handlers.log_handler import raise_http_exception
+
+monitoring_endpoint = APIRouter()
+
+
+@monitoring_endpoint.get("/executors")
+async def get_executors_stats():
+    return executors_stats()
+
+
+@monitoring_endpoint.get("/batching")
+async def get_batching_stats():
+    return {vgg16_batcher.name: vgg16_batcher.stats()}
+
+
+@monitoring_endpoint.get("/cache")
+async def get_cache_stats():
+    return prediction_cache.stats()
+
+
+@monitoring_endpoint.get("/healthz")
+async def get_health():
+    return {"status": "ok"}
+
+
+@monitoring_endpoint.get("/readyz")
+async def get_readiness():
+    status = model_registry.status()
+    if not status["ready"]:
+        raise_http_exception(503, status)
+    return status
+
+
+@monitoring_endpoint.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text format: per-stage and per-request latency histograms plus current gauges."""
+    executors = executors_stats()
+    slots = model_registry.slots
+    lines = metrics.render()
+    lines += gauge("baby_cry_model_load_seconds", "Time it took to load each model.", {
+        (("model", name),): slot.load_seconds for name, slot in slots.items() if slot.load_seconds is not None
+    })
+    lines += gauge("baby_cry_model_ready", "1 once the model is loaded.", {
+        (("model", name),): int(slot.state == "ready") for name, slot in slots.items()
+    })
+    lines += gauge("baby_cry_executor_queue_depth", "Tasks waiting for a worker of each pool.", {
+        (("executor", name),): stats["queue_depth"] for name, stats in executors.items()
+    })
+    lines += gauge("baby_cry_executor_running", "Tasks running on each pool.", {
+        (("executor", name),): stats["running"] for name, stats in executors.items()
+    })
+    lines += gauge("baby_cry_batcher_waiting", "Requests waiting to join a model batch.", {
+        (("batcher", vgg16_batcher.name),): vgg16_batcher.stats()["waiting"]
+    })
+    lines += gauge("process_resident_memory_bytes", "Resident memory of the process.", {(): process_rss_bytes()})
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -1,30 +1,158 @@
-from fastapi import APIRouter, Request, File, UploadFile
+from fastapi import APIRouter, Depends, Request, File, UploadFile
 from api.apps.render_template import render_template
 from api.components import forms
-from api.ml_logic.preprpcessings import load_audio, get_spectrogram
+from api.ml_logic.features import AudioFeatures
+from api.core.executors import preprocessing_executor, inference_executor
+from api.core.cache import prediction_cache
+from api.core.configurations import upload_settings, audio_settings, gate_settings
+from api.core.metrics import metrics
+from api.handlers.log_handler import raise_http_exception
+from api.ml_logic.gate import detect_cry
+from api.ml_logic.preprpcessings import AudioDecodeError, audio_duration
 import numpy as np
 from io import BytesIO
 import base64
+import hashlib
 from PIL import Image
 import os
 import random
 from api.core.constants import PICS_PATH
 
+NO_CRY_MESSAGES = {
+    "silent": "No cry detected: the recording is silent.",
+    "too_short": "No cry detected: the recording is too short.",
+    "noise": "No cry detected: the recording only contains noise."
+}
 
+
+async def close_uploads(request: Request):
+    """Dependency of the upload routes: closes the spooled files of the parsed form once the request is answered."""
+    try:
+        yield
+    finally:
+        await (await request.form()).close()
+
+
+@metrics.timed("base64")
 def image_to_base64(img: Image.Image) -> str:
     buffered = BytesIO()
     img.save(buffered, format="PNG")
     return base64.b64encode(buffered.getvalue()).decode()
 
 
+async def get_spectrogram_base64(features: AudioFeatures) -> str:
+    key = prediction_cache.key(features.content_hash, "spectrogram")
+    spectrogram_base64 = prediction_cache.get(key)
+    if spectrogram_base64 is None:
+        spectrogram_base64 = await preprocessing_executor.run(lambda: image_to_base64(features.spectrogram()))
+        prediction_cache.set(key, spectrogram_base64)
+    return spectrogram_base64
+
+
+async def read_audio_features(file: UploadFile) -> AudioFeatures:
+    """
+    Streams the upload in chunks to hash it and enforce the size limit, then checks the duration
+    from the file header. The returned features decode straight from the upload's own spooled
+    file, so the content is never copied into memory as a whole.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with metrics.span("upload_read"):
+        await file.seek(0)
+        while True:
+            chunk = await file.read(upload_settings.chunk_bytes)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > upload_settings.max_bytes:
+                raise_http_exception(413, f"{file.filename}: files larger than {upload_settings.max_bytes} bytes are not accepted.")
+            digest.update(chunk)
+        await file.seek(0)
+
+    max_duration = upload_settings.max_duration_seconds
+    duration = audio_duration(file.file)
+    if duration is not None and duration > max_duration:
+        raise_http_exception(413, f"{file.filename}: recordings longer than {max_duration} seconds are not accepted.")
+    # Every intermediate depends on the rate the upload is resampled to, so cached results do too
+    sample_rate = audio_settings.sample_rate
+    return AudioFeatures(file.file, f"{digest.hexdigest()}@{sample_rate}", max_duration, sample_rate)
+
+
+def decode_uploads(features_list):
+    """Decodes every upload; returns the decode error of each one that is not audio, None for the others."""
+    errors = []
+    for features in features_list:
+        try:
+            features.decoded
+            errors.append(None)
+        except AudioDecodeError as e:
+            errors.append(str(e))
+    return errors
+
+
+def gate_uploads(features_list):
+    """The result of every upload the cry gate rejects, None for the others, which go on to the models."""
+    thresholds = dict(gate_settings.gate)
+    if not thresholds.pop("enabled"):
+        return [None] * len(features_list)
+    results = []
+    for features in features_list:
+        decoded = features.decoded
+        with metrics.span("gate"):
+            gate = detect_cry(decoded, **thresholds)
+        results.append(None if gate.cry_detected else {"cry_detected": False, "reason": gate.reason})
+    return results
+
+
+def screen_uploads(features_list):
+    """
+    decode_uploads and gate_uploads as one preprocessing task: an error entry for every upload
+    that is not audio, the gate result of every one the gate rejects, None for the others.
+    """
+    errors = decode_uploads(features_list)
+    gated = iter(gate_uploads([features for features, error in zip(features_list, errors) if error is None]))
+    return [{"error": "The file could not be decoded as audio."} if error is not None else next(gated)
+            for error in errors]
+
+
 async def get_audio_data(file: UploadFile):
-    audio_content = await file.read()
-    audio_base64 = base64.b64encode(audio_content).decode("utf-8")
-    audio_content_b = BytesIO(audio_content)
-    y_clean = load_audio(BytesIO(audio_content))
-    spectrogram = get_spectrogram(y_clean)
-    spectrogram_base64 = image_to_base64(spectrogram)
-    return audio_base64, audio_content_b, y_clean, spectrogram, spectrogram_base64
+    """The upload as base64, its features and, unless the gate rejects it, its spectrogram; else the gate result."""
+    features = await read_audio_features(file)
+    # Reading the upload back for the audio player is counted as base64 work, upload_read was recorded while streaming it in
+    with metrics.span("base64"):
+        audio_base64 = base64.b64encode(await file.read()).decode("utf-8")
+    no_cry = (await preprocessing_executor.run(screen_uploads, [features]))[0]
+    if no_cry is not None and "error" in no_cry:
+        raise_http_exception(422, f"{file.filename}: the file could not be decoded as audio.")
+    spectrogram_base64 = None if no_cry else await get_spectrogram_base64(features)
+    return audio_base64, features, spectrogram_base64, no_cry
+
+
+async def cached_batch_predict(features_list, kind, model_path, prepare, predict_rows):
+    """
+    Returns one cached or freshly computed prediction per upload.
+
+    Uploads missing from the cache are decoded and go through the cry gate in one preprocessing
+    task (screen_uploads). One that is not audio gets an error entry, and those the gate rejects
+    get its result right away. Neither is cached, as both are cheap and the gate result depends
+    on the gate settings. The others are prepared (one preprocessing task) and predicted (one
+    model batch); prepare maps them to a model input batch and predict_rows maps that batch to
+    one JSON serialisable prediction per row.
+    Every prediction but the error entries gets a cry_detected flag.
+    """
+    keys = [prediction_cache.key(features.content_hash, kind, model_path) for features in features_list]
+    predictions = [prediction_cache.get(key) for key in keys]
+    missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+    if missing:
+        for i, screened in zip(missing, await preprocessing_executor.run(screen_uploads, [features_list[i] for i in missing])):
+            predictions[i] = screened
+        missing = [i for i in missing if predictions[i] is None]
+    if missing:
+        batch = await preprocessing_executor.run(prepare, [features_list[i] for i in missing])
+        for i, prediction in zip(missing, await inference_executor.run(predict_rows, batch)):
+            predictions[i] = prediction
+            prediction_cache.set(keys[i], prediction)
+    return [prediction if "error" in prediction else {"cry_detected": True, **prediction} for prediction in predictions]
 
 
 def random_pics(sub_folder: str):
@@ -1,52 +1,80 @@
-import time
 import numpy as np
-from keras.utils import img_to_array
-from api.ml_logic.preprpcessings import get_spectrogram
 from .services import (
-    APIRouter, Request,
+    APIRouter, Depends, Request,
     File, UploadFile,
     render_template,
     forms, get_audio_data,
-    random_pics
+    random_pics, NO_CRY_MESSAGES, close_uploads
 )
 from api.core.constants import CLASSES
+from api.core.executors import preprocessing_executor, inference_executor
+from api.core.batching import BatchScheduler
+from api.core.configurations import batching_settings
+from api.core.cache import prediction_cache
+from api.core.models import vgg16_model
+from api.core.metrics import metrics
 
 vgg16_endpoint = APIRouter()
 
 
+def predict_batch(spectrogram_arrays):
+    model = vgg16_model.get()
+    with metrics.span("predict", model="vgg16"):
+        return model.predict(spectrogram_arrays, verbose=0)
+
+
+vgg16_batcher = BatchScheduler("vgg16", predict_batch, inference_executor, **batching_settings.vgg16)
+
+
 @vgg16_endpoint.get("/")
 async def get_vgg16_page(request: Request):
     return await render_template("vgg16.html", {"request": request})
 
 
-def get_spectrogram_array(y_clean):
-    spectrogram = get_spectrogram(y_clean)
-    spectrogram = spectrogram.resize((224, 224))
-    spectrogram_array = img_to_array(spectrogram)
+def get_spectrogram_array(features):
+    spectrogram = features.spectrogram((224, 224))
+    spectrogram_array = np.asarray(spectrogram, dtype=np.float32)
     return np.expand_dims(spectrogram_array, axis=0)
 
 
 def predict_and_sort(predictions):
-    prediction_percentages = {label: round(p * 100, 2) for label, p in zip(CLASSES, predictions)}
+    prediction_percentages = {label: round(float(p) * 100, 2) for label, p in zip(CLASSES, predictions)}
     return dict(sorted(prediction_percentages.items(), key=lambda item: item[1], reverse=True))
 
 
-@vgg16_endpoint.post("/")
-async def vgg16_predict(request: Request, file: UploadFile = File(...)):
-    start = time.perf_counter()
-    from main import get_vgg16_model
+def prepare_spectrograms(features_list):
+    return np.concatenate([get_spectrogram_array(features) for features in features_list])
 
+
+def predict_rows(spectrogram_arrays):
+    return [{"predictions": predict_and_sort(row)} for row in predict_batch(spectrogram_arrays)]
+
+
+@vgg16_endpoint.post("/", dependencies=[Depends(close_uploads)])
+async def vgg16_predict(request: Request, file: UploadFile = File(...)):
     form = forms.FileUploadForm(request)
     await form.load_data()
+    metrics.since_request("form_parse")
     if not await form.file_is_valid():
         return await render_template("vgg16.html", {"request": request, "errors": form.errors})
 
-    audio_base64, audio_content_b, y_clean, _, spectrogram_base64 = await get_audio_data(file)
+    audio_base64, features, spectrogram_base64, no_cry = await get_audio_data(file)
+    if no_cry:
+        return await render_template("vgg16.html", {
+            "request": request,
+            "msg": NO_CRY_MESSAGES[no_cry["reason"]],
+            "audio_base64": audio_base64,
+            "filename": file.filename
+        })
 
-    prediction = get_vgg16_model().predict(get_spectrogram_array(y_clean))
-    sorted_predictions = predict_and_sort(prediction[0])
+    prediction_key = prediction_cache.key(features.content_hash, "vgg16", vgg16_model.path)
+    prediction = prediction_cache.get(prediction_key)
+    if prediction is None:
+        spectrogram_array = await preprocessing_executor.run(get_spectrogram_array, features)
+        prediction = {"predictions": predict_and_sort(await vgg16_batcher.predict(spectrogram_array[0]))}
+        prediction_cache.set(prediction_key, prediction)
+    sorted_predictions = prediction["predictions"]
 
-    print(time.perf_counter() - start)
     return await render_template("vgg16.html", {
         "request": request,
         "msg": "File Loaded",
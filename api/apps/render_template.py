@@ -1,7 +1,9 @@
 from fastapi.templating import Jinja2Templates
 from api.core.constants import TEMPLATE_DIR
+from api.core.metrics import metrics
 
 
 async def render_template(template_name: str, context: dict):
-    templates = Jinja2Templates(directory=TEMPLATE_DIR)
-    return templates.TemplateResponse(template_name, context)
+    with metrics.span("template"):
+        templates = Jinja2Templates(directory=TEMPLATE_DIR)
+        return templates.TemplateResponse(template_name, context)
@@ -3,6 +3,9 @@ from api.apps.pages.home_page import home_endpoint
 from api.apps.pages.vgg16 import vgg16_endpoint
 from api.apps.pages.forest import forest_endpoint
 from api.apps.pages.about_page import about_endpoint
+from api.apps.pages.monitoring import monitoring_endpoint
+from api.apps.api_v1.predictions import predictions_endpoint
+from api.apps.api_v1.streaming import streaming_endpoint
 
 apps_router = APIRouter()
 
@@ -10,3 +13,6 @@ apps_router.include_router(home_endpoint, prefix="", tags=["home_page"])
 apps_router.include_router(vgg16_endpoint, prefix="/vgg16", tags=["vgg16_page"])
 apps_router.include_router(forest_endpoint, prefix="/forest", tags=["forest_page"])
 apps_router.include_router(about_endpoint, prefix="", tags=["about_page"])
+apps_router.include_router(monitoring_endpoint, prefix="", tags=["monitoring"])
+apps_router.include_router(predictions_endpoint, prefix="/api/v1", tags=["api_v1"])
+apps_router.include_router(streaming_endpoint, prefix="/api/v1", tags=["api_v1"])
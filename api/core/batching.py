@@ -0,0 +1,109 @@
+import asyncio
+import numpy as np
+from api.core.executors import BoundedExecutor
+from api.handlers.log_handler import log_errors, raise_http_exception
+
+
+class BatchScheduler:
+    """
+    Dynamic micro-batching in front of a model.
+
+    Requests are collected until max_batch_size items are waiting or max_wait_ms has passed since
+    the first one, stacked into one array and predicted in a single call on the given executor.
+    Each caller gets back its own row of the result. While every executor worker is busy, new
+    requests keep accumulating so the next batch grows instead of queueing batches of one.
+
+    The executor's limits apply to every request: at most max_batch_size items per executor
+    slot (workers + queue) may wait, further requests get a 503, and a request that has no result
+    within the executor's timeout gets a 504. When the executor rejects or fails a batch, only
+    the requests of that batch get the error.
+    """
+
+    def __init__(self, name: str, predict_fn, executor: BoundedExecutor, max_batch_size: int, max_wait_ms: float):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._slots = None
+        self._worker = None
+        self._dispatching = set()
+        self._batches = 0
+        self._items = 0
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(
+                maxsize=self.max_batch_size * (self.executor.max_workers + self.executor.max_queue))
+            self._slots = asyncio.Semaphore(self.executor.max_workers)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def predict(self, item: np.ndarray) -> np.ndarray:
+        """Predicts a single model input (without batch axis) and returns its output row."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise_http_exception(503, f"The {self.name} batch queue is full, please retry later.")
+        try:
+            return await asyncio.wait_for(future, self.executor.timeout)
+        except asyncio.TimeoutError:
+            log_errors(status_code=504, detail=f"{self.name} request exceeded {self.executor.timeout}s")
+            raise_http_exception(504, f"The {self.name} prediction timed out.")
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        items = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return [(item, future) for item, future in items if not future.done()]
+
+    async def _dispatch(self, items):
+        try:
+            predictions = await self.executor.run(self.predict_fn, np.stack([item for item, _ in items]))
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        self._batches += 1
+        self._items += len(items)
+        for (_, future), row in zip(items, predictions):
+            if not future.done():
+                future.set_result(row)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            items = await self._collect()
+            if items:
+                task = loop.create_task(self._dispatch(items))
+                self._dispatching.add(task)
+                task.add_done_callback(self._dispatching.discard)
+            else:
+                self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "waiting": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self._batches,
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0
+        }
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from api.core.configurations import cache_settings
+from api.handlers.log_handler import log_errors
+
+
+def model_fingerprint(model_path: str) -> str:
+    """Identifies the current version of a model file, so entries of a replaced model never hit."""
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        return "missing"
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class PredictionCache:
+    """
+    Content-addressed cache for per-upload artifacts and predictions.
+
+    Keys combine the hash of the raw upload bytes with the kind of artifact and, for predictions,
+    the fingerprint of the model file. Values must be JSON serialisable. The in-memory tier is an
+    LRU bounded by max_entries; both tiers drop entries older than ttl_seconds. The on-disk tier
+    is only used when disk_path is set and survives restarts. When a write takes it past
+    max_disk_entries files, expired files and then the oldest ones are deleted until it is back
+    to nine tenths of that, so the sweep does not run on every write.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, disk_path: Optional[str] = None,
+                 max_disk_entries: int = 10000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        if disk_path:
+            os.makedirs(disk_path, exist_ok=True)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        self._disk_entries = len(self._disk_files()) if disk_path else 0
+
+    @staticmethod
+    def key(audio_hash: str, kind: str, model_path: Optional[str] = None) -> str:
+        parts = [kind, audio_hash]
+        if model_path is not None:
+            parts.append(model_fingerprint(model_path))
+        return hashlib.sha256(":".join(parts).encode()).hexdigest()
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, f"{key}.json")
+
+    def _get_from_disk(self, key: str) -> Any:
+        path = self._disk_file(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_files(self) -> list:
+        try:
+            names = os.listdir(self.disk_path)
+        except OSError:
+            return []
+        return [os.path.join(self.disk_path, name) for name in names if name.endswith(".json")]
+
+    def _sweep_disk(self) -> int:
+        """Deletes expired files, then the oldest ones, down to the low-water mark; returns the files left."""
+        now = time.time()
+        files = []
+        for path in self._disk_files():
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        files.sort()
+        expired = [path for mtime, path in files if now - mtime > self.ttl_seconds]
+        fresh = [path for mtime, path in files if now - mtime <= self.ttl_seconds]
+        keep = max(1, self.max_disk_entries * 9 // 10)
+        doomed = expired + fresh[:max(0, len(fresh) - keep)]
+        removed = 0
+        for path in doomed:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._counters["disk_evictions"] += removed
+        return len(files) - removed
+
+    def _set_on_disk(self, key: str, value: Any):
+        path = self._disk_file(key)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_path, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            added = not os.path.exists(path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log_errors(status_code=500, detail=f"prediction cache: {str(e)}")
+            return
+        with self._disk_lock:
+            self._disk_entries += added
+            if self._disk_entries > self.max_disk_entries:
+                self._disk_entries = self._sweep_disk()
+
+    def _remember(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored, value = entry
+                if time.monotonic() - stored <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._entries[key]
+
+        value = self._get_from_disk(key) if self.disk_path else None
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+            else:
+                self._counters["disk_hits"] += 1
+                self._remember(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._remember(key, value)
+        if self.disk_path:
+            self._set_on_disk(key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = sum(self._counters[name] for name in ("memory_hits", "disk_hits", "misses"))
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
+
+
+prediction_cache = PredictionCache(**cache_settings.predictions)
@@ -2,6 +2,9 @@ import yaml
 from typing import Any
 from pydantic import BaseSettings
 from api.handlers.log_handler import log_errors
+from api.core.constants import EXECUTOR_DEFAULTS, BATCHING_DEFAULTS, CACHE_DEFAULTS, UPLOAD_DEFAULTS, STREAMING_DEFAULTS, \
+    TRAINING_DEFAULTS, MODEL_DEFAULTS, METRICS_DEFAULTS, AUDIO_DEFAULTS, GATE_DEFAULTS, \
+    STREAM_LIMITS_DEFAULTS
 
 config_path = "./api/core/configurations.yaml"
 
@@ -18,6 +21,10 @@ class Settings(BaseSettings):
         except Exception as e:
             log_errors(status_code=500, detail=f"{str(e)}")
 
+    def section(self, name: str) -> dict:
+        """Returns an optional top-level section of the configuration file, or an empty dict."""
+        return (self.data or {}).get(name) or {}
+
 
 class ServerSettings(Settings):
 
@@ -36,5 +43,99 @@ class SecuritySettings(Settings):
         return self.data["security"]["baby_api_key"]
 
 
+class ExecutorSettings(Settings):
+    def executor(self, name: str) -> dict:
+        return {**EXECUTOR_DEFAULTS[name], **(self.section("executors").get(name) or {})}
+
+    @property
+    def preprocessing(self):
+        return self.executor("preprocessing")
+
+    @property
+    def inference(self):
+        return self.executor("inference")
+
+
+class BatchingSettings(Settings):
+    @property
+    def vgg16(self):
+        return {**BATCHING_DEFAULTS, **(self.section("batching").get("vgg16") or {})}
+
+
+class CacheSettings(Settings):
+    @property
+    def predictions(self):
+        return {**CACHE_DEFAULTS, **(self.section("cache").get("predictions") or {})}
+
+
+class UploadSettings(Settings):
+    def upload(self, name: str):
+        return {**UPLOAD_DEFAULTS, **self.section("upload")}[name]
+
+    @property
+    def max_bytes(self):
+        return self.upload("max_bytes")
+
+    @property
+    def max_duration_seconds(self):
+        return self.upload("max_duration_seconds")
+
+    @property
+    def chunk_bytes(self):
+        return self.upload("chunk_bytes")
+
+
+class AudioSettings(Settings):
+    @property
+    def sample_rate(self):
+        return {**AUDIO_DEFAULTS, **self.section("audio")}["sample_rate"]
+
+
+class GateSettings(Settings):
+    @property
+    def gate(self):
+        return {**GATE_DEFAULTS, **self.section("gate")}
+
+
+class StreamingSettings(Settings):
+    @property
+    def stream(self):
+        section = self.section("streaming")
+        return {key: section.get(key, default) for key, default in STREAMING_DEFAULTS.items()}
+
+    @property
+    def limits(self):
+        section = self.section("streaming")
+        return {key: section.get(key, default) for key, default in STREAM_LIMITS_DEFAULTS.items()}
+
+
+class ModelSettings(Settings):
+    @property
+    def vgg16(self):
+        return {**MODEL_DEFAULTS["vgg16"], **(self.section("models").get("vgg16") or {})}
+
+
+class MetricsSettings(Settings):
+    @property
+    def metrics(self):
+        return {**METRICS_DEFAULTS, **self.section("metrics")}
+
+
+class TrainingSettings(Settings):
+    @property
+    def loader(self):
+        return {**TRAINING_DEFAULTS, **self.section("training")}
+
+
 server_settings = ServerSettings(config_path=config_path)
 security_settings = SecuritySettings(config_path=config_path)
+executor_settings = ExecutorSettings(config_path=config_path)
+batching_settings = BatchingSettings(config_path=config_path)
+cache_settings = CacheSettings(config_path=config_path)
+upload_settings = UploadSettings(config_path=config_path)
+audio_settings = AudioSettings(config_path=config_path)
+gate_settings = GateSettings(config_path=config_path)
+streaming_settings = StreamingSettings(config_path=config_path)
+training_settings = TrainingSettings(config_path=config_path)
+model_settings = ModelSettings(config_path=config_path)
+metrics_settings = MetricsSettings(config_path=config_path)
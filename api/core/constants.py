@@ -1,4 +1,7 @@
 TEMPLATE_DIR = "./templates"
+VGG16_MODEL_PATH = "VGG16_Baby_prod.h5"
+# Compiled from Forest_5_98.pkl with `python -m api.ml_logic.compiled_forest Forest_5_98.pkl`
+FOREST_MODEL_PATH = "Forest_5_98.npz"
 PICS_PATH = "./statics/pics/"
 CLASS_LABELS = {
     0: "belly_pain",
@@ -14,4 +17,48 @@ CLASSES = [
     "hungry",
     "tired"
 ]
-
+EXECUTOR_DEFAULTS = {
+    "preprocessing": {"max_workers": 2, "max_queue": 8, "timeout": 30.0},
+    "inference": {"max_workers": 1, "max_queue": 16, "timeout": 30.0}
+}
+MAX_UPLOAD_FILES = 64
+# Rate every upload is resampled to, that of the Donate-a-Cry recordings the models were trained on.
+# None keeps each recording's own rate
+AUDIO_DEFAULTS = {"sample_rate": 8000}
+BATCHING_DEFAULTS = {"max_batch_size": 16, "max_wait_ms": 10.0}
+UPLOAD_DEFAULTS = {"max_bytes": 20 * 1024 * 1024, "max_duration_seconds": 60.0, "chunk_bytes": 1024 * 1024}
+STREAMING_DEFAULTS = {
+    "window_seconds": 5.0,
+    "classify_every_seconds": 1.0,
+    "top_db": 20.0,
+    "min_db": -45.0,
+    "min_active": 0.25,
+    "frame_length": 512
+}
+GATE_DEFAULTS = {
+    "enabled": True,
+    "min_db": -45.0,
+    "top_db": 20.0,
+    "min_duration_seconds": 0.5,
+    "max_zcr": 0.35,
+    "frame_length": 512
+}
+# The stream buffers window_seconds * sample_rate samples, so the rates a client may ask for are bounded
+STREAM_LIMITS_DEFAULTS = {"min_sample_rate": 8000, "max_sample_rate": 48000, "max_message_bytes": 256 * 1024}
+CACHE_DEFAULTS = {"max_entries": 1024, "ttl_seconds": 3600.0, "disk_path": None, "max_disk_entries": 10000}
+MODEL_DEFAULTS = {
+    "vgg16": {"backend": "keras", "path": VGG16_MODEL_PATH, "threads": None}
+}
+METRICS_DEFAULTS = {
+    "enabled": True,
+    "buckets": [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+}
+TRAINING_DEFAULTS = {
+    "data_path": "/content/drive/MyDrive/Baby_cry_data/Spectograms",
+    "audio_path": "clean_audio",
+    "image_size": [224, 224],
+    "batch_size": 16,
+    "workers": 4,
+    "prefetch_batches": 4,
+    "seed": 0
+}
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from api.core.configurations import executor_settings
+from api.handlers.log_handler import log_errors, raise_http_exception
+
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking work with a bounded queue.
+
+    Submissions beyond max_workers + max_queue are rejected with a 503 instead of piling up,
+    and a task that does not finish within timeout seconds is answered with a 504.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, timeout: float):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _release_cancelled(self, future):
+        # A task cancelled while still queued never runs _task, which releases every other slot
+        if future.cancelled():
+            with self._lock:
+                self._pending -= 1
+
+    def _task(self, submitted, func, args, kwargs):
+        waited = time.perf_counter() - submitted
+        with self._lock:
+            self._running += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._completed += 1
+
+    async def run(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) on the pool without blocking the event loop."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise_http_exception(503, f"The {self.name} queue is full, please retry later.")
+            self._pending += 1
+
+        try:
+            submitted = self._executor.submit(self._task, time.perf_counter(), func, args, kwargs)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+        submitted.add_done_callback(self._release_cancelled)
+        future = asyncio.wrap_future(submitted)
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            log_errors(status_code=504, detail=f"{self.name} task exceeded {self.timeout}s")
+            raise_http_exception(504, f"The {self.name} step timed out.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "wait_seconds_mean": self._wait_total / started if started else 0.0,
+                "wait_seconds_max": self._wait_max
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+preprocessing_executor = BoundedExecutor("preprocessing", **executor_settings.preprocessing)
+inference_executor = BoundedExecutor("inference", **executor_settings.inference)
+
+
+def executors_stats() -> dict:
+    return {executor.name: executor.stats() for executor in (preprocessing_executor, inference_executor)}
+
+
+def shutdown_executors():
+    preprocessing_executor.shutdown()
+    inference_executor.shutdown()
@@ -0,0 +1,167 @@
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from functools import wraps
+from typing import Dict, Iterable, List, Tuple
+from api.core.configurations import metrics_settings
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Set by MetricsMiddleware when a request comes in, so handlers can time what happened before them
+_request_started = contextvars.ContextVar("request_started", default=None)
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """A Prometheus histogram with one series per label set, rendered in the text format."""
+
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float]):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Labels = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels, 'le=%s' % json.dumps(str(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+def gauge(name: str, documentation: str, samples: Dict[Labels, float]) -> List[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    lines.extend(f"{name}{_format_labels(labels)} {value}" for labels, value in samples.items())
+    return lines
+
+
+def process_rss_bytes() -> int:
+    """Current resident memory of the process; the peak where /proc is not available."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _Span:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, self.labels)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Metrics:
+    """
+    Per-stage timing of the request pipeline.
+
+    `with metrics.span("decode"):` records the time spent in a stage into the
+    baby_cry_stage_seconds histogram. When metrics are disabled span returns one shared no-op
+    context manager, so an instrumented stage costs a method call and nothing is recorded.
+    """
+
+    def __init__(self, enabled: bool, buckets: Iterable[float]):
+        self.enabled = enabled
+        self.stage_seconds = Histogram(
+            "baby_cry_stage_seconds", "Time spent in each stage of the request pipeline.", buckets)
+        self.request_seconds = Histogram(
+            "baby_cry_request_seconds", "Time from receiving a request to sending the response.", buckets)
+
+    def span(self, stage: str, **labels: str):
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self.stage_seconds, (("stage", stage), *sorted(labels.items())))
+
+    def timed(self, stage: str, **labels: str):
+        """Decorator form of span; returns the function itself when metrics are disabled."""
+        def decorator(func):
+            if not self.enabled:
+                return func
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def since_request(self, stage: str):
+        """Records the time between the request arriving and now, e.g. the form parsing before a handler runs."""
+        started = _request_started.get()
+        if self.enabled and started is not None:
+            self.stage_seconds.observe(time.perf_counter() - started, (("stage", stage),))
+
+    def render(self) -> List[str]:
+        return self.stage_seconds.render() + self.request_seconds.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, labelled with the route it matched."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        token = _request_started.set(start)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_started.reset(token)
+            # The router adds the matched route to the scope; unmatched paths share one series
+            route = scope.get("route")
+            labels = (("method", scope["method"]), ("route", getattr(route, "path", "other")))
+            metrics.request_seconds.observe(time.perf_counter() - start, labels)
+
+
+metrics = Metrics(**metrics_settings.metrics)
@@ -0,0 +1,110 @@
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, List, Optional
+from api.core.configurations import model_settings
+from api.core.constants import FOREST_MODEL_PATH
+from api.handlers.log_handler import log_errors, raise_http_exception
+from api.ml_logic.backends import load_backend
+from api.ml_logic.model import forest_model_load
+
+# Taken when the app is imported, which is as close to the container start as Python gets
+STARTED_AT = time.perf_counter()
+
+
+class ModelSlot:
+    """
+    A model that loads in its own background thread.
+
+    The state goes from pending to loading to ready, or to failed, keeping the error for the
+    readiness probe. Requests that need the model before it is ready get a 503 instead of
+    waiting on the event loop.
+    """
+
+    def __init__(self, name: str, load_fn: Callable[[str], Any], path: str):
+        self.name = name
+        self.load_fn = load_fn
+        self.path = path
+        self.state = "pending"
+        self.model = None
+        self.error = None
+        self.load_seconds = None
+        self.ready_at = None
+        self._thread = None
+        self._done = threading.Event()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        self.state = "loading"
+        start = time.perf_counter()
+        try:
+            self.model = self.load_fn(self.path)
+            self.state = "ready"
+        except Exception as e:
+            self.error = str(e)
+            self.state = "failed"
+            log_errors(status_code=500, detail=f"Loading the {self.name} model from {self.path} failed: {e}")
+        finally:
+            self.ready_at = time.perf_counter()
+            self.load_seconds = self.ready_at - start
+            self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until loading has finished, successfully or not."""
+        return self._done.wait(timeout)
+
+    def get(self):
+        if self.state == "ready":
+            return self.model
+        if self.state == "failed":
+            raise_http_exception(503, f"The {self.name} model failed to load.")
+        raise_http_exception(503, f"The {self.name} model is not loaded yet!")
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "load_seconds": None if self.load_seconds is None else round(self.load_seconds, 3),
+            "error": self.error
+        }
+
+
+class ModelRegistry:
+    def __init__(self, slots: List[ModelSlot]):
+        self.slots = {slot.name: slot for slot in slots}
+
+    def start(self):
+        """Starts loading every model in parallel and returns right away."""
+        for slot in self.slots.values():
+            slot.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        return all(
+            slot.wait(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+            for slot in self.slots.values()
+        )
+
+    @property
+    def ready(self) -> bool:
+        return all(slot.state == "ready" for slot in self.slots.values())
+
+    def status(self) -> dict:
+        ready_at = [slot.ready_at for slot in self.slots.values()]
+        return {
+            "ready": self.ready,
+            "startup_seconds": round(max(ready_at) - STARTED_AT, 3) if self.ready else None,
+            "models": {name: slot.status() for name, slot in self.slots.items()}
+        }
+
+
+vgg16_model = ModelSlot(
+    "vgg16",
+    partial(load_backend, model_settings.vgg16["backend"], threads=model_settings.vgg16["threads"]),
+    model_settings.vgg16["path"]
+)
+forest_model = ModelSlot("forest", forest_model_load, FOREST_MODEL_PATH)
+model_registry = ModelRegistry([vgg16_model, forest_model])
@@ -0,0 +1,67 @@
+"""
+Inference runtimes the VGG16 model can be served with.
+
+Every backend exposes the `predict(x, verbose=0)` call of a Keras model on float32 batches of
+224x224x3 spectrograms, so the batcher does not care which one is configured. The runtimes are
+optional dependencies and only imported by the backend that is selected: `tflite` needs
+tflite-runtime (or TensorFlow), `onnx` needs onnxruntime. See api.ml_logic.export for producing
+the model files.
+"""
+import threading
+import numpy as np
+
+
+class KerasBackend:
+    def __init__(self, path, threads=None):
+        from keras.models import load_model
+        self.model = load_model(path)
+
+    def predict(self, x, verbose=0):
+        return self.model.predict(x, verbose=verbose)
+
+
+class TFLiteBackend:
+    def __init__(self, path, threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.interpreter = Interpreter(model_path=path, num_threads=threads)
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = None
+        # One interpreter owns one set of tensors, so calls must not overlap
+        self._lock = threading.Lock()
+
+    def predict(self, x, verbose=0):
+        with self._lock:
+            if self._batch_size != len(x):
+                self.interpreter.resize_tensor_input(self._input["index"], [len(x), *x.shape[1:]])
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(x)
+            self.interpreter.set_tensor(self._input["index"], np.asarray(x, dtype=self._input["dtype"]))
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output["index"]).copy()
+
+
+class OnnxBackend:
+    def __init__(self, path, threads=None):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input = self.session.get_inputs()[0].name
+
+    def predict(self, x, verbose=0):
+        return self.session.run(None, {self._input: np.asarray(x, dtype=np.float32)})[0]
+
+
+BACKENDS = {"keras": KerasBackend, "tflite": TFLiteBackend, "onnx": OnnxBackend}
+
+
+def load_backend(backend, path, threads=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[backend](path, threads)
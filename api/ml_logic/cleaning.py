@@ -0,0 +1,173 @@
+"""
+Noise reduction and silence trimming of many clips at once.
+
+clean_batch gives the result of running noisereduce.reduce_noise (its default non-stationary
+spectral gating) and librosa.effects.trim(top_db=20) on every clip, as testing/clean_audio
+does, within floating point tolerance. Clips are grouped by sample rate and zero-padded into
+2D batches, so each STFT, mask and inverse STFT runs once per batch instead of once per clip.
+Only the time smoothing of the gate, a forward-backward IIR filter whose backward pass starts
+at the end of the clip, runs per group of clips with the same length.
+"""
+from typing import Dict, List, Sequence, Tuple
+import librosa
+import numpy as np
+from scipy.ndimage import convolve1d
+from scipy.signal import filtfilt, istft, stft
+
+# noisereduce.reduce_noise defaults
+N_FFT = 1024
+HOP_LENGTH = N_FFT // 4
+PADDING = 30000
+CHUNK_SIZE = 600000
+TIME_CONSTANT_S = 2.0
+FREQ_MASK_SMOOTH_HZ = 500
+TIME_MASK_SMOOTH_MS = 50
+THRESH_N_MULT = 2
+SIGMOID_SLOPE = 10
+
+# librosa.effects.trim defaults
+TRIM_FRAME_LENGTH = 2048
+TRIM_HOP_LENGTH = 512
+
+# Zeros kept around each clip in the batch: the frames of noisereduce's padding further out are
+# all zero, so they are only accounted for in the time smoothing, not transformed
+MARGIN = 2 * N_FFT + PADDING % HOP_LENGTH
+
+# Samples per batch, which bounds the STFT buffers to a few hundred MB
+MAX_BATCH_SAMPLES = 2_000_000
+
+
+def _smoothing_filters(sr: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The triangular kernel noisereduce smooths the mask with is the outer product of a frequency
+    and a time ramp, so it is applied as two 1D convolutions.
+    """
+    n_grad_freq = int(FREQ_MASK_SMOOTH_HZ / (sr / (N_FFT / 2)))
+    n_grad_time = int(TIME_MASK_SMOOTH_MS / ((HOP_LENGTH / sr) * 1000))
+    if n_grad_freq < 1 or n_grad_time < 1:
+        raise ValueError(f"The mask smoothing of noisereduce is not defined at {sr} Hz")
+
+    def ramp(n):
+        ramp = np.concatenate([np.linspace(0, 1, n + 1, endpoint=False), np.linspace(1, 0, n + 2)])[1:-1]
+        return ramp / np.sum(ramp)
+
+    return ramp(n_grad_freq), ramp(n_grad_time)
+
+
+def _time_smoothing(sr: int) -> Tuple[list, list]:
+    t_frames = TIME_CONSTANT_S * sr / float(HOP_LENGTH)
+    b = (np.sqrt(1 + 4 * t_frames ** 2) - 1) / (2 * t_frames ** 2)
+    return [b], [1, b - 1]
+
+
+def _stft_frames(n_samples: int) -> int:
+    # scipy.signal.stft with its zero boundary and padded=False
+    return n_samples // HOP_LENGTH + 1
+
+
+def _reduce_noise_batch(signals: Sequence[np.ndarray], sr: int) -> List[np.ndarray]:
+    """
+    Spectral gating of clips with one sample rate, as noisereduce does on each clip padded with
+    PADDING zeros on both sides.
+
+    The batch holds every clip between MARGIN zeros instead. That region starts PADDING - MARGIN
+    samples into noisereduce's padded clip, a whole number of hops, so its STFT frames are frames
+    of the padded clip, and every frame outside it is zero.
+    """
+    lengths = [len(y) for y in signals]
+    batch = np.zeros((len(signals), max(lengths) + 2 * MARGIN))
+    for row, y in zip(batch, signals):
+        row[MARGIN:MARGIN + len(y)] = y
+
+    _, _, sig_stft = stft(batch, nfft=N_FFT, noverlap=N_FFT - HOP_LENGTH, nperseg=N_FFT, padded=False)
+    abs_sig_stft = np.abs(sig_stft)
+
+    # The time smoothing runs over all frames of the padded clip: the zero frames before the batch
+    # leave the forward pass at zero, but those after it set where the backward pass starts
+    skipped = (PADDING - MARGIN) // HOP_LENGTH
+    sig_stft_smooth = np.ones_like(abs_sig_stft)
+    b, a = _time_smoothing(sr)
+    frames = np.array([_stft_frames(length + 2 * PADDING) - skipped for length in lengths])
+    for n_frames in np.unique(frames):
+        rows = np.flatnonzero(frames == n_frames)
+        clip_frames = np.zeros((len(rows), abs_sig_stft.shape[1], n_frames))
+        kept = min(n_frames, abs_sig_stft.shape[2])
+        clip_frames[..., :kept] = abs_sig_stft[rows, :, :kept]
+        sig_stft_smooth[rows, :, :kept] = filtfilt(b, a, clip_frames, axis=-1, padtype=None)[..., :kept]
+
+    sig_mult_above_thresh = (abs_sig_stft - sig_stft_smooth) / sig_stft_smooth
+    sig_mask = 1 / (1 + np.exp(-(sig_mult_above_thresh - THRESH_N_MULT) * SIGMOID_SLOPE))
+    freq_filter, time_filter = _smoothing_filters(sr)
+    sig_mask = convolve1d(sig_mask, freq_filter, axis=-2, mode="constant")
+    sig_mask = convolve1d(sig_mask, time_filter, axis=-1, mode="constant")
+
+    _, denoised = istft(sig_stft * sig_mask, nfft=N_FFT, noverlap=N_FFT - HOP_LENGTH, nperseg=N_FFT)
+    return [denoised[i, MARGIN:MARGIN + length].astype(y.dtype) for i, (y, length) in enumerate(zip(signals, lengths))]
+
+
+def _trim_batch(signals: Sequence[np.ndarray], top_db: float) -> np.ndarray:
+    """[start, end] of librosa.effects.trim for every clip, from one RMS call over the zero-padded batch."""
+    padded = np.zeros((len(signals), max(len(y) for y in signals)), dtype=signals[0].dtype)
+    for row, y in zip(padded, signals):
+        row[:len(y)] = y
+    rms = librosa.feature.rms(y=padded, frame_length=TRIM_FRAME_LENGTH, hop_length=TRIM_HOP_LENGTH)[:, 0, :]
+
+    indices = np.zeros((len(signals), 2), dtype=int)
+    for i, y in enumerate(signals):
+        # With constant padding the frames of a clip do not change when zeros follow it
+        clip_rms = rms[i, :1 + len(y) // TRIM_HOP_LENGTH]
+        db = librosa.amplitude_to_db(clip_rms, ref=np.max(clip_rms), top_db=None)
+        nonzero = np.flatnonzero(db > -top_db)
+        if nonzero.size > 0:
+            indices[i] = (nonzero[0] * TRIM_HOP_LENGTH, min(len(y), (nonzero[-1] + 1) * TRIM_HOP_LENGTH))
+    return indices
+
+
+def _batches(order: Sequence[int], sizes: Dict[int, int]) -> List[List[int]]:
+    """Consecutive clips of order, sorted by size, while the batch padded to its last clip stays under MAX_BATCH_SAMPLES."""
+    batches = []
+    for i in order:
+        if batches and (len(batches[-1]) + 1) * sizes[i] <= MAX_BATCH_SAMPLES:
+            batches[-1].append(i)
+        else:
+            batches.append([i])
+    return batches
+
+
+def clean_batch(signals: Sequence[np.ndarray], sample_rates: Sequence[int], top_db: float = 20
+                ) -> Tuple[List[np.ndarray], np.ndarray]:
+    """
+    Denoises and trims many clips.
+
+    Parameters:
+    - signals (Sequence[np.ndarray]): Mono clips, of any lengths.
+    - sample_rates (Sequence[int]): The sample rate of each clip.
+    - top_db (float, optional): Trimming threshold below the loudest frame of each clip. Default is 20.
+
+    Returns:
+    - list: The denoised and trimmed clips.
+    - np.ndarray: The [start, end] sample indices each denoised clip was trimmed to, shape (len(signals), 2).
+    """
+    denoised: List[np.ndarray] = [None] * len(signals)
+    groups: Dict[int, List[int]] = {}
+    for i, sr in enumerate(sample_rates):
+        groups.setdefault(sr, []).append(i)
+
+    for sr, members in groups.items():
+        # noisereduce processes clips longer than its chunk size in overlapping chunks
+        long_clips = [i for i in members if len(signals[i]) > CHUNK_SIZE]
+        if long_clips:
+            import noisereduce as nr
+            for i in long_clips:
+                denoised[i] = nr.reduce_noise(y=signals[i], sr=sr)
+        members = [i for i in members if len(signals[i]) <= CHUNK_SIZE]
+        sizes = {i: len(signals[i]) + 2 * MARGIN for i in members}
+        for batch in _batches(sorted(members, key=sizes.get), sizes):
+            for i, y in zip(batch, _reduce_noise_batch([signals[i] for i in batch], sr)):
+                denoised[i] = y
+
+    indices = np.zeros((len(signals), 2), dtype=int)
+    sizes = {i: len(y) for i, y in enumerate(denoised)}
+    for batch in _batches(sorted(sizes, key=sizes.get), sizes):
+        indices[batch] = _trim_batch([denoised[i] for i in batch], top_db)
+    return [y[start:end] for y, (start, end) in zip(denoised, indices)], indices
@@ -0,0 +1,139 @@
+"""
+RandomForest inference on flat NumPy arrays.
+
+    python -m api.ml_logic.compiled_forest Forest_5_98.pkl
+
+compiles a pickled scikit-learn RandomForestClassifier into Forest_5_98.npz. The .npz only
+holds numeric arrays and is loaded with allow_pickle=False, so serving never unpickles code.
+"""
+import argparse
+import os
+import numpy as np
+
+
+class CompiledForest:
+    """
+    The nodes of every tree concatenated into flat arrays: split feature, threshold, left and
+    right child, and the class probabilities of each leaf. All (sample, tree) pairs of a batch
+    descend together, one vectorized step per tree level, and pairs drop out once they reach a
+    leaf (leaves point back to themselves).
+
+    Splits compare the float32-cast features with the thresholds the way scikit-learn does,
+    and tree probabilities are normalised and summed in tree order, so predict_proba returns the
+    same values as the original forest.
+    """
+
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "classes")
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, n_features, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self.max_depth = int(max_depth)
+        self.is_leaf = left == np.arange(len(left))
+        # For a float32 x, x <= t holds exactly when x <= the largest float32 not above t
+        self._threshold32 = threshold.astype(np.float32)
+        rounded_up = self._threshold32.astype(np.float64) > threshold
+        self._threshold32[rounded_up] = np.nextafter(self._threshold32[rounded_up], np.float32(-np.inf))
+        # Child of node n is _children[2 * n + went_left]
+        self._children = np.stack([right, left], axis=1).ravel()
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+            roots.append(offset)
+            offset += tree.node_count
+        return cls(
+            np.concatenate(features).astype(np.int32),
+            np.concatenate(thresholds).astype(np.float64),
+            np.concatenate(lefts).astype(np.int32),
+            np.concatenate(rights).astype(np.int32),
+            np.concatenate(values),
+            np.array(roots, dtype=np.int32),
+            np.asarray(forest.classes_),
+            forest.n_features_in_,
+            max(estimator.tree_.max_depth for estimator in forest.estimators_)
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(*(data[name] for name in cls.ARRAYS), data["n_features"], data["max_depth"])
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            **{name: getattr(self, "classes_" if name == "classes" else name) for name in self.ARRAYS},
+            n_features=self.n_features_in_,
+            max_depth=self.max_depth
+        )
+
+    def leaves(self, X):
+        """Leaf node index of every sample in every tree, shape (n_samples, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, but the forest expects {self.n_features_in_} features")
+        flat_X = np.ascontiguousarray(X).ravel()
+        nodes = np.tile(self.roots, len(X))
+        # Only the pairs still inside a tree: their position in nodes, current node and row offset
+        active = np.arange(len(nodes))
+        current = nodes.copy()
+        row_offsets = np.repeat(np.arange(len(X)) * self.n_features_in_, len(self.roots))
+        for _ in range(self.max_depth):
+            go_left = flat_X[row_offsets + self.feature[current]] <= self._threshold32[current]
+            current = self._children[2 * current + go_left]
+            nodes[active] = current
+            inside = ~self.is_leaf[current]
+            if not inside.all():
+                active, current, row_offsets = active[inside], current[inside], row_offsets[inside]
+                if not len(active):
+                    break
+        return nodes.reshape(len(X), len(self.roots))
+
+    def predict_proba(self, X):
+        leaf_values = self.value[self.leaves(X)]
+        proba = np.zeros((len(leaf_values), len(self.classes_)))
+        for tree in range(leaf_values.shape[1]):
+            proba += leaf_values[:, tree]
+        return proba / leaf_values.shape[1]
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", help="pickled RandomForestClassifier")
+    parser.add_argument("--output", help="defaults to the model name with .npz")
+    args = parser.parse_args()
+
+    import pickle
+    with open(args.model, "rb") as file:
+        forest = pickle.load(file)
+    output = args.output or f"{os.path.splitext(args.model)[0]}.npz"
+    compiled = CompiledForest.from_sklearn(forest)
+    compiled.save(output)
+    print(f"{args.model} -> {output}: {len(compiled.roots)} trees, {len(compiled.feature)} nodes, "
+          f"depth {compiled.max_depth}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,39 @@
+import hashlib
+import math
 import os
-from keras.utils import to_categorical
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 import numpy as np
+from api.core.configurations import training_settings
+from api.core.constants import CLASSES
+from api.ml_logic.feature_store import FeatureStore, assign_split, file_hash
 
-def load_spectrogram():
-    data_path = '/content/drive/MyDrive/Baby_cry_data/Spectograms'
+
+def class_folder(data_path, cl, prefix="spectrogram_clean_"):
+    """Files of a class, either in <cl> or in the <prefix><cl> folders that testing/ writes."""
+    for folder in (cl, f"{prefix}{cl}"):
+        if os.path.isdir(os.path.join(data_path, folder)):
+            return os.path.join(data_path, folder)
+    return os.path.join(data_path, cl)
+
+
+def spectrogram_split(audio_folder, cl, name):
+    """
+    The split of a spectrogram: that of its clip in the feature store, from the content hash of
+    the clean recording it was rendered from. A spectrogram whose recording is missing cannot be
+    in the store and is split by its class and name instead.
+    """
+    clip = os.path.join(audio_folder, f"{os.path.splitext(name)[0]}.wav")
+    if os.path.exists(clip):
+        return assign_split(file_hash(clip))
+    return assign_split(hashlib.sha256(f"{cl}/{name}".encode()).hexdigest())
+
+
+def load_spectrogram(data_path=None, max_per_class=100):
+    from keras.utils import to_categorical
+
+    data_path = data_path or training_settings.loader["data_path"]
     classes = {'belly_pain': 0,
                'burping': 1,
                'discomfort': 2,
@@ -14,11 +43,11 @@ def load_spectrogram():
     labels = []
     for (cl, i) in classes.items():
         # images_path = ''
-        images_path = [elt for elt in os.listdir(os.path.join(data_path, cl)) if elt.find('.png') > 0]
+        images_path = [elt for elt in os.listdir(class_folder(data_path, cl)) if elt.find('.png') > 0]
         # print('images_path:  ', images_path)
-        for img in images_path[:100]:
+        for img in images_path[:max_per_class]:
             # path = ''
-            path = os.path.join(data_path, cl, img)
+            path = os.path.join(class_folder(data_path, cl), img)
             # print('second for loop', path)
             # print(os.path.exists(path))
             if os.path.exists(path):
@@ -43,3 +72,125 @@ def load_spectrogram():
     y_test, y_val, y_train = y[:first_split], y[first_split:second_split], y[second_split:]
 
     return X_train, y_train, X_val, y_val, X_test, y_test, num_classes
+
+
+def load_feature_store(store_path, column="spectrogram"):
+    """
+    Loads the splits of one feature store column, as built by `python -m testing.pipeline`.
+
+    The X arrays are read-only memmap views of the store, so nothing is decoded, resized or
+    copied up front; rows are only read from disk when training touches them.
+    """
+    from keras.utils import to_categorical
+
+    store = FeatureStore(store_path)
+    num_classes = len(store.classes)
+    splits = []
+    for split in ("train", "val", "test"):
+        splits.append(store.select(column, split))
+        splits.append(to_categorical(store.select("label", split), num_classes))
+    X_train, y_train, X_val, y_val, X_test, y_test = splits
+    return X_train, y_train, X_val, y_val, X_test, y_test, num_classes
+
+
+def load_image(path, size=(224, 224)):
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGB').resize(size))
+
+
+class SpectrogramLoader:
+    """
+    Streams shuffled (images, one-hot labels) batches from a spectrogram folder.
+
+    Only file paths are listed up front, one shard per class. Each file goes to the split its clip
+    has in the feature store, from the content hash of the recording in audio_path, so a model
+    trained from one is never evaluated on training clips of the other. No image has to be read
+    to split the data and every file is used. Per epoch, every shard is shuffled and the shards are interleaved at random in
+    proportion to their remaining size. Worker threads decode and resize the images in order,
+    keeping at most prefetch_batches batches in flight, so memory stays constant however large
+    the dataset is.
+    """
+
+    def __init__(
+            self,
+            data_path=None,
+            audio_path=None,
+            image_size=None,
+            batch_size=None,
+            workers=None,
+            prefetch_batches=None,
+            seed=None,
+            classes=CLASSES
+    ):
+        settings = training_settings.loader
+        self.data_path = data_path or settings["data_path"]
+        self.audio_path = audio_path or settings["audio_path"]
+        self.image_size = tuple(image_size or settings["image_size"])
+        self.batch_size = batch_size or settings["batch_size"]
+        self.workers = workers or settings["workers"]
+        self.prefetch_batches = prefetch_batches or settings["prefetch_batches"]
+        self.seed = settings["seed"] if seed is None else seed
+        self.classes = list(classes)
+
+        self.shards = {split: [[] for _ in self.classes] for split in ("train", "val", "test")}
+        for label, cl in enumerate(self.classes):
+            folder = class_folder(self.data_path, cl)
+            if not os.path.isdir(folder):
+                continue
+            audio_folder = class_folder(self.audio_path, cl, prefix="clean_")
+            for name in sorted(os.listdir(folder)):
+                if name.endswith('.png'):
+                    split = spectrogram_split(audio_folder, cl, name)
+                    self.shards[split][label].append(os.path.join(folder, name))
+
+    def size(self, split):
+        return sum(len(shard) for shard in self.shards[split])
+
+    def steps(self, split):
+        return math.ceil(self.size(split) / self.batch_size)
+
+    def _order(self, split, rng):
+        """(path, label) pairs of one epoch, shuffled within class shards and interleaved across them."""
+        if rng is None:
+            return [(path, label) for label, shard in enumerate(self.shards[split]) for path in shard]
+        shards = [[shard[i] for i in rng.permutation(len(shard))] for shard in self.shards[split]]
+        remaining = np.array([len(shard) for shard in shards])
+        order = []
+        while remaining.sum():
+            label = rng.choice(len(shards), p=remaining / remaining.sum())
+            remaining[label] -= 1
+            order.append((shards[label][remaining[label]], label))
+        return order
+
+    def batches(self, split, shuffle=True, epoch=0):
+        """Yields the batches of one pass over a split."""
+        rng = np.random.default_rng((self.seed, epoch)) if shuffle else None
+        order = iter(self._order(split, rng))
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            def fill():
+                while len(in_flight) < self.prefetch_batches * self.batch_size:
+                    item = next(order, None)
+                    if item is None:
+                        return
+                    in_flight.append((pool.submit(load_image, item[0], self.image_size), item[1]))
+
+            fill()
+            while in_flight:
+                count = min(self.batch_size, len(in_flight))
+                X = np.empty((count, *self.image_size[::-1], 3), dtype=np.uint8)
+                y = np.zeros((count, len(self.classes)), dtype=np.float32)
+                for i in range(count):
+                    future, label = in_flight.popleft()
+                    X[i] = future.result()
+                    y[i, label] = 1.0
+                fill()
+                yield X, y
+
+    def repeat(self, split, shuffle=True):
+        """Endless batches for Keras, reshuffled every epoch; one epoch is steps(split) batches."""
+        epoch = 0
+        while True:
+            yield from self.batches(split, shuffle, epoch)
+            epoch += 1
+
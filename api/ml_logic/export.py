@@ -0,0 +1,104 @@
+"""
+Exports the VGG16 Keras model to TensorFlow Lite or ONNX for the inference backends.
+
+    python -m api.ml_logic.export --format tflite --quantization int8 --calibration feature_store
+    python -m api.ml_logic.export --format onnx --quantization dynamic
+
+Quantization is either none, dynamic (int8 weights, float activations) or int8 (weights and
+activations, calibrated on train split spectrograms from a feature store or a spectrogram
+folder). The exported models keep float32 inputs and outputs, so the backends feed them the same
+arrays as the Keras model. Needs TensorFlow, plus tf2onnx and onnxruntime for ONNX.
+"""
+import argparse
+import itertools
+import os
+import numpy as np
+from api.core.constants import VGG16_MODEL_PATH
+from api.ml_logic.feature_store import FeatureStore
+
+QUANTIZATIONS = ("none", "dynamic", "int8")
+CALIBRATION_SAMPLES = 200
+INPUT_NAME = "spectrogram"
+
+
+def calibration_samples(path, samples=CALIBRATION_SAMPLES):
+    """Single-image float32 batches from the train split of a feature store or a spectrogram folder."""
+    if os.path.exists(os.path.join(path, FeatureStore.META_NAME)):
+        spectrograms = FeatureStore(path).select("spectrogram", "train")
+        rows = np.random.default_rng(0).choice(len(spectrograms), min(samples, len(spectrograms)), replace=False)
+        for row in np.sort(rows):
+            yield spectrograms[row:row + 1].astype(np.float32)
+    else:
+        from api.ml_logic.data import SpectrogramLoader
+        loader = SpectrogramLoader(path, batch_size=1)
+        for X, _ in itertools.islice(loader.batches("train"), samples):
+            yield X.astype(np.float32)
+
+
+def export_tflite(model, output, quantization, calibration=None):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        converter.representative_dataset = lambda: ([x] for x in calibration_samples(calibration))
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(output, "wb") as f:
+        f.write(converter.convert())
+
+
+def export_onnx(model, output, quantization, calibration=None):
+    import tensorflow as tf
+    import tf2onnx
+    signature = (tf.TensorSpec((None, *model.input_shape[1:]), tf.float32, name=INPUT_NAME),)
+    float_output = output if quantization == "none" else f"{output}.float.onnx"
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=13, output_path=float_output)
+    if quantization == "none":
+        return
+
+    from onnxruntime import quantization as ort_quantization
+    if quantization == "dynamic":
+        ort_quantization.quantize_dynamic(float_output, output, weight_type=ort_quantization.QuantType.QInt8)
+    else:
+        class SpectrogramReader(ort_quantization.CalibrationDataReader):
+            def __init__(self):
+                self.samples = calibration_samples(calibration)
+
+            def get_next(self):
+                x = next(self.samples, None)
+                return None if x is None else {INPUT_NAME: x}
+
+        ort_quantization.quantize_static(
+            float_output, output, SpectrogramReader(),
+            quant_format=ort_quantization.QuantFormat.QDQ,
+            weight_type=ort_quantization.QuantType.QInt8,
+            activation_type=ort_quantization.QuantType.QUInt8
+        )
+    os.remove(float_output)
+
+
+EXPORTERS = {"tflite": (export_tflite, ".tflite"), "onnx": (export_onnx, ".onnx")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=VGG16_MODEL_PATH)
+    parser.add_argument("--format", choices=sorted(EXPORTERS), required=True)
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="none")
+    parser.add_argument("--calibration", help="feature store or spectrogram folder, required for int8")
+    parser.add_argument("--output", help="defaults to the model name with the quantization and format")
+    args = parser.parse_args()
+    if args.quantization == "int8" and not args.calibration:
+        parser.error("--quantization int8 needs --calibration")
+
+    export, extension = EXPORTERS[args.format]
+    suffix = "" if args.quantization == "none" else f"_{args.quantization}"
+    output = args.output or f"{os.path.splitext(args.model)[0]}{suffix}{extension}"
+
+    from keras.models import load_model
+    export(load_model(args.model), output, args.quantization, args.calibration)
+    print(f"{args.model} -> {output} ({os.path.getsize(output) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import json
+import os
+from typing import NamedTuple, Optional
+
+
+class FeatureSchema(NamedTuple):
+    """
+    The MFCC features a forest model was trained on, declared in a <model>.schema.json file
+    next to the model. Rows are the fixed_length x num_ceps MFCC matrix flattened row by row.
+    """
+    length: int
+    fixed_length: int
+    num_ceps: int
+    sample_rate: Optional[int]
+    pre_emphasis: float
+    frame_size: float
+    frame_stride: float
+    NFFT: int
+    nfilt: int
+
+    @property
+    def shape(self):
+        return self.fixed_length, self.num_ceps
+
+    @property
+    def mfcc_params(self) -> dict:
+        """Keyword arguments of preprpcessings.extract_mfcc."""
+        params = self._asdict()
+        del params["length"]
+        return params
+
+
+def schema_path(model_path: str) -> str:
+    return f"{os.path.splitext(model_path)[0]}.schema.json"
+
+
+def load_feature_schema(model_path: str) -> FeatureSchema:
+    with open(schema_path(model_path), "r", encoding="utf-8") as f:
+        schema = FeatureSchema(**json.load(f))
+    if schema.length != schema.fixed_length * schema.num_ceps:
+        raise ValueError(f"{schema_path(model_path)} declares {schema.length} features, "
+                         f"but {schema.fixed_length} frames x {schema.num_ceps} ceps is {schema.fixed_length * schema.num_ceps}")
+    return schema
+
+
+def check_feature_schema(model, schema: FeatureSchema, model_path: str):
+    """Fails when the model was fitted on another number of features than the schema declares."""
+    if model.n_features_in_ != schema.length:
+        raise ValueError(f"{model_path} expects {model.n_features_in_} features, "
+                         f"but {schema_path(model_path)} declares {schema.length}")
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from numpy.lib.format import open_memmap
+
+SPLITS = ("train", "val", "test")
+# Same proportions as the random split in data.load_spectrogram
+SPLIT_FRACTIONS = {"test": 1 / 6, "val": 0.2}
+COPY_CHUNK_ROWS = 256
+
+
+class StoreEntry(NamedTuple):
+    source: str
+    content_hash: str
+    label: str
+
+
+def file_hash(path: str) -> str:
+    """The content hash a clip is stored and split by."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def assign_split(content_hash: str) -> str:
+    """Places a clip in a split from its content hash, so the split is stable across rebuilds."""
+    position = int(content_hash[:8], 16) / 16 ** 8
+    if position < SPLIT_FRACTIONS["test"]:
+        return "test"
+    if position < SPLIT_FRACTIONS["test"] + SPLIT_FRACTIONS["val"]:
+        return "val"
+    return "train"
+
+
+class FeatureStore:
+    """
+    Columnar, memory-mapped store of the training features.
+
+    Every column (MFCC matrices, scalar features, 224x224 spectrograms, labels, splits) is one
+    .npy file with a leading row axis, opened with mmap_mode="r" so a slice only reads the rows
+    it touches. Rows are sorted by split and then label when the store is written, which makes
+    each split and each (split, label) pair a contiguous range returned as a zero-copy view.
+    """
+
+    META_NAME = "meta.json"
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, self.META_NAME), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._columns = {}
+
+    def __len__(self) -> int:
+        return len(self.meta["sources"])
+
+    @property
+    def classes(self) -> List[str]:
+        return self.meta["classes"]
+
+    @property
+    def sources(self) -> List[str]:
+        return self.meta["sources"]
+
+    @property
+    def columns(self) -> Dict[str, dict]:
+        return self.meta["columns"]
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self._columns[name]
+
+    def rows(self, split: Optional[str] = None, label: Optional[str] = None):
+        """Returns the rows of a split and/or label: a slice when they are contiguous, else an index array."""
+        ranges = self.meta["ranges"]
+        if split is not None:
+            bounds = ranges[split].get(label, (0, 0)) if label is not None else ranges[split]["all"]
+            return slice(*bounds)
+        if label is None:
+            return slice(0, len(self))
+        return np.concatenate([np.arange(*ranges[s][label]) for s in SPLITS if label in ranges[s]]).astype(np.intp)
+
+    def select(self, name: str, split: Optional[str] = None, label: Optional[str] = None) -> np.ndarray:
+        return self.column(name)[self.rows(split, label)]
+
+
+class FeatureStoreWriter:
+    """
+    Builds a FeatureStore in place of path.
+
+    The row of every entry is known up front from its split and label, so rows can be written
+    in any order (for instance as worker processes finish) straight into preallocated memmaps.
+    Rows whose source and content hash are unchanged can be copied from the previous store
+    instead of being recomputed. Nothing replaces the old store until close().
+    """
+
+    def __init__(
+            self,
+            path: str,
+            entries: List[StoreEntry],
+            columns: Dict[str, Tuple[tuple, str]],
+            classes: List[str],
+            attributes: Optional[dict] = None
+    ):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.classes = list(classes)
+        self.columns = {name: {"shape": list(shape), "dtype": np.dtype(dtype).str} for name, (shape, dtype) in columns.items()}
+        self.attributes = attributes or {}
+
+        splits = [assign_split(entry.content_hash) for entry in entries]
+        order = sorted(
+            range(len(entries)),
+            key=lambda i: (SPLITS.index(splits[i]), self.classes.index(entries[i].label), entries[i].source)
+        )
+        self.entries = [entries[i] for i in order]
+        self.splits = [splits[i] for i in order]
+        self.slots = {entry.source: slot for slot, entry in enumerate(self.entries)}
+        self.written = np.zeros(len(self.entries), dtype=bool)
+
+        if os.path.exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self._memmaps = {
+            name: self._open(name, (len(self.entries), *spec["shape"]), spec["dtype"])
+            for name, spec in self.columns.items()
+        }
+
+    def _open(self, name, shape, dtype):
+        return open_memmap(os.path.join(self.tmp_path, f"{name}.npy"), mode="w+", dtype=dtype, shape=shape)
+
+    def write(self, source: str, **arrays: np.ndarray):
+        slot = self.slots[source]
+        for name, memmap in self._memmaps.items():
+            memmap[slot] = arrays[name]
+        self.written[slot] = True
+
+    def reuse(self, store: FeatureStore) -> set:
+        """Copies the unchanged rows of a previous store and returns their sources."""
+        if store.columns != self.columns:
+            return set()
+        previous = {source: (row, content_hash) for row, (source, content_hash)
+                    in enumerate(zip(store.sources, store.meta["hashes"]))}
+        reused = set()
+        for slot, entry in enumerate(self.entries):
+            row, content_hash = previous.get(entry.source, (None, None))
+            if content_hash == entry.content_hash:
+                for name, memmap in self._memmaps.items():
+                    memmap[slot] = store.column(name)[row]
+                self.written[slot] = True
+                reused.add(entry.source)
+        return reused
+
+    def _compact(self):
+        """Drops the rows that were never written (failed extractions), keeping the sort order."""
+        keep = np.flatnonzero(self.written)
+        for name, spec in self.columns.items():
+            old = self._memmaps[name]
+            os.rename(os.path.join(self.tmp_path, f"{name}.npy"), os.path.join(self.tmp_path, f"{name}.old.npy"))
+            new = self._open(name, (len(keep), *spec["shape"]), spec["dtype"])
+            for start in range(0, len(keep), COPY_CHUNK_ROWS):
+                new[start:start + COPY_CHUNK_ROWS] = old[keep[start:start + COPY_CHUNK_ROWS]]
+            del old
+            os.remove(os.path.join(self.tmp_path, f"{name}.old.npy"))
+            self._memmaps[name] = new
+        self.entries = [self.entries[i] for i in keep]
+        self.splits = [self.splits[i] for i in keep]
+
+    def close(self) -> FeatureStore:
+        if not self.written.all():
+            self._compact()
+        labels = np.array([self.classes.index(entry.label) for entry in self.entries], dtype=np.int8)
+        np.save(os.path.join(self.tmp_path, "label.npy"), labels)
+        np.save(os.path.join(self.tmp_path, "split.npy"),
+                np.array([SPLITS.index(split) for split in self.splits], dtype=np.int8))
+        for memmap in self._memmaps.values():
+            memmap.flush()
+        self._memmaps = {}
+
+        ranges = {}
+        for split in SPLITS:
+            in_split = np.flatnonzero(np.array(self.splits) == split)
+            start = int(in_split[0]) if len(in_split) else 0
+            ranges[split] = {"all": [start, start + len(in_split)]}
+            for index, label in enumerate(self.classes):
+                rows = in_split[labels[in_split] == index]
+                if len(rows):
+                    ranges[split][label] = [int(rows[0]), int(rows[-1]) + 1]
+
+        meta = {
+            "classes": self.classes,
+            "columns": self.columns,
+            "sources": [entry.source for entry in self.entries],
+            "hashes": [entry.content_hash for entry in self.entries],
+            "ranges": ranges,
+            **self.attributes
+        }
+        with open(os.path.join(self.tmp_path, FeatureStore.META_NAME), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
+        return FeatureStore(self.path)
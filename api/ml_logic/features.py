@@ -0,0 +1,89 @@
+from functools import cached_property
+import librosa
+import numpy as np
+from PIL import Image
+from api.core.metrics import metrics
+from api.ml_logic.preprpcessings import DecodedAudio, decode_audio, resample_audio, load_audio, extract_mfcc, render_spectrogram
+from api.ml_logic.spectral_features import FEATURE_SAMPLE_RATE, extract_spectral_features
+
+
+class AudioFeatures:
+    """
+    Per-request feature context for one uploaded clip.
+
+    The clip is resampled to sample_rate when it is set, so every feature is computed at one rate
+    whatever the recording's own. Every intermediate (decoded signal, trimmed signal, STFT magnitude, dB spectrogram,
+    rendered figure, MFCCs) is computed lazily and at most once, so the preview and the
+    model inputs share the work and the upload is decoded a single time. Each one is timed as
+    its own stage, after the intermediates it depends on.
+    """
+
+    def __init__(self, audio_file, content_hash=None, max_duration=None, sample_rate=None):
+        self.audio_file = audio_file
+        self.content_hash = content_hash
+        self.max_duration = max_duration
+        self.sample_rate = sample_rate
+        self._spectrograms = {}
+
+    @classmethod
+    def from_signal(cls, y: np.ndarray, sr: int, content_hash=None, sample_rate=None):
+        """Builds the context around an already decoded signal."""
+        features = cls(None, content_hash, sample_rate=sample_rate)
+        with metrics.span("resample"):
+            features.decoded = resample_audio(DecodedAudio(y, sr), sample_rate)
+        return features
+
+    @cached_property
+    def decoded(self) -> DecodedAudio:
+        with metrics.span("decode"):
+            decoded = decode_audio(self.audio_file, max_duration=self.max_duration)
+        with metrics.span("resample"):
+            return resample_audio(decoded, self.sample_rate)
+
+    @cached_property
+    def y_clean(self) -> np.ndarray:
+        decoded = self.decoded
+        with metrics.span("trim"):
+            return load_audio(decoded)
+
+    @cached_property
+    def mfcc(self) -> np.ndarray:
+        decoded = self.decoded
+        with metrics.span("mfcc"):
+            return extract_mfcc(decoded)
+
+    @cached_property
+    def stft_magnitude(self) -> np.ndarray:
+        y_clean = self.y_clean
+        with metrics.span("stft"):
+            return np.abs(librosa.stft(y_clean))
+
+    @cached_property
+    def spectrogram_db(self) -> np.ndarray:
+        stft_magnitude = self.stft_magnitude
+        with metrics.span("amplitude_to_db"):
+            return librosa.amplitude_to_db(stft_magnitude, ref=np.max)
+
+    @cached_property
+    def spectral_features(self) -> np.ndarray:
+        """The summary features of spectral_features.FEATURE_NAMES, computed like testing/feature_extractor."""
+        decoded = self.decoded
+        with metrics.span("spectral_features"):
+            y = librosa.resample(decoded.y, orig_sr=decoded.sr, target_sr=FEATURE_SAMPLE_RATE)
+            return extract_spectral_features(y, FEATURE_SAMPLE_RATE)
+
+    @cached_property
+    def figure(self) -> Image.Image:
+        spectrogram_db = self.spectrogram_db
+        with metrics.span("render"):
+            return Image.fromarray(render_spectrogram(spectrogram_db))
+
+    def spectrogram(self, size=None) -> Image.Image:
+        """Returns the rendered spectrogram figure, resized to (width, height) if given."""
+        if size is None or size == self.figure.size:
+            return self.figure
+        if size not in self._spectrograms:
+            figure = self.figure
+            with metrics.span("resize"):
+                self._spectrograms[size] = figure.resize(size)
+        return self._spectrograms[size]
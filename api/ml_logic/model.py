@@ -1,30 +1,39 @@
-from keras.optimizers import Adam
-from keras.callbacks import EarlyStopping
+# Keras is imported inside the functions that need it: serving only loads the VGG16 model, in a
+# background thread (see api.core.models), and the app must not pay for the training imports.
 from datetime import datetime
-from keras.applications import VGG16
-from keras.models import load_model
-from keras.layers import GlobalAveragePooling2D, Dropout, Dense
-from keras.models import Model
+from numpy.lib.format import open_memmap
+import numpy as np
+import os
 import pickle
 
 
-async def vgg16_model_load(model_path):
+def vgg16_model_load(model_path):
+    from keras.models import load_model
     return load_model(model_path)
 
 
-async def forest_model_load(model_path):
-    with open(model_path, "rb") as file:
-        my_forest = pickle.load(file)
-        return my_forest
+def forest_model_load(model_path):
+    from api.ml_logic.feature_schema import load_feature_schema, check_feature_schema
+    if model_path.endswith(".npz"):
+        from api.ml_logic.compiled_forest import CompiledForest
+        my_forest = CompiledForest.load(model_path)
+    else:
+        with open(model_path, "rb") as file:
+            my_forest = pickle.load(file)
+    check_feature_schema(my_forest, load_feature_schema(model_path), model_path)
+    return my_forest
 
 
-def define_model():
+def define_model(weights="imagenet"):
     """
         The VGG16 is defined
     """
+    from keras.applications import VGG16
+    from keras.layers import GlobalAveragePooling2D, Dropout, Dense
+    from keras.models import Model
     # Load the VGG-16 model (pre-trained on ImageNet)
     base_model = VGG16(
-        weights="imagenet",
+        weights=weights,
         include_top=False,
         input_shape=(224, 224, 3)
     )
@@ -43,6 +52,7 @@ def define_model():
 
 
 def compile_model(model):
+    from keras.optimizers import Adam
     model.compile(
         optimizer=Adam(learning_rate=0.00001),
         loss='categorical_crossentropy',
@@ -52,6 +62,7 @@ def compile_model(model):
 
 
 def train_model(model, X_train, y_train, X_val, y_val):
+    from keras.callbacks import EarlyStopping
     es = EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True, verbose=1)
 
     history = model.fit(
@@ -67,10 +78,129 @@ def train_model(model, X_train, y_train, X_val, y_val):
     return history
 
 
+def train_model_from_loader(model, loader):
+    """Same training as train_model, fed batch by batch from a data.SpectrogramLoader."""
+    from keras.callbacks import EarlyStopping
+    es = EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True, verbose=1)
+
+    history = model.fit(
+        loader.repeat("train"),
+        steps_per_epoch=loader.steps("train"),
+        validation_data=loader.repeat("val", shuffle=False),
+        validation_steps=loader.steps("val"),
+        epochs=300,
+        callbacks=[es],
+        verbose=1
+    )
+
+    return history
+
+
+def split_frozen_prefix(model):
+    """
+    Splits a define_model model at its first trainable layer.
+
+    Returns the frozen prefix and a tail model that takes the prefix activations as input. The
+    tail calls the same layer objects as the full model, so training it updates the full model.
+    """
+    from keras.layers import Input
+    from keras.models import Model
+    boundary = next(i for i, layer in enumerate(model.layers) if layer.trainable)
+    prefix = Model(inputs=model.input, outputs=model.layers[boundary - 1].output)
+    tail_input = Input(shape=prefix.output_shape[1:])
+    x = tail_input
+    for layer in model.layers[boundary:]:
+        x = layer(x)
+    return prefix, Model(inputs=tail_input, outputs=x)
+
+
+def cache_activations(prefix, batches, path, rows):
+    """
+    Runs the frozen prefix once over (X, y) batches and stores the activations and labels as
+    memmapped .npy files next to path, which are returned opened read-only.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    activations = open_memmap(f"{path}_x.npy", mode="w+", dtype=np.float32, shape=(rows, *prefix.output_shape[1:]))
+    labels = None
+    start = 0
+    for X, y in batches:
+        if labels is None:
+            labels = open_memmap(f"{path}_y.npy", mode="w+", dtype=np.float32, shape=(rows, *y.shape[1:]))
+        activations[start:start + len(X)] = prefix.predict(X, verbose=0)
+        labels[start:start + len(X)] = y
+        start += len(X)
+    activations.flush()
+    labels.flush()
+    del activations, labels
+    return np.load(f"{path}_x.npy", mmap_mode="r"), np.load(f"{path}_y.npy", mmap_mode="r")
+
+
+def array_batches(X, y, batch_size=16):
+    for start in range(0, len(X), batch_size):
+        yield X[start:start + batch_size], y[start:start + batch_size]
+
+
+def memmap_batches(X, y, batch_size=16, shuffle=True, seed=0):
+    """
+    Endless batches of memmapped arrays, reshuffled every epoch. Keras would copy arrays passed
+    to fit into memory as a whole; this reads one batch at a time, in row order within a batch.
+    """
+    rng = np.random.default_rng(seed)
+    while True:
+        order = rng.permutation(len(X)) if shuffle else np.arange(len(X))
+        for start in range(0, len(X), batch_size):
+            rows = np.sort(order[start:start + batch_size])
+            yield np.asarray(X[rows]), np.asarray(y[rows])
+
+
+def train_tail(tail, A_train, y_train, A_val, y_val, batch_size=16):
+    """train_model on cached activations, streamed from disk."""
+    from keras.callbacks import EarlyStopping
+    es = EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True, verbose=1)
+
+    history = compile_model(tail).fit(
+        memmap_batches(A_train, y_train, batch_size),
+        steps_per_epoch=-(-len(A_train) // batch_size),
+        validation_data=memmap_batches(A_val, y_val, batch_size, shuffle=False),
+        validation_steps=-(-len(A_val) // batch_size),
+        epochs=300,
+        callbacks=[es],
+        verbose=1
+    )
+
+    return history
+
+
+def train_model_cached(model, X_train, y_train, X_val, y_val, cache_dir="activation_cache"):
+    """
+    Same training as train_model, but the frozen VGG16 layers run once per image instead of once
+    per epoch: their activations are cached on disk and only the trainable tail is fitted.
+    """
+    prefix, tail = split_frozen_prefix(model)
+    A_train, y_train = cache_activations(prefix, array_batches(X_train, y_train),
+                                         os.path.join(cache_dir, "train"), len(X_train))
+    A_val, y_val = cache_activations(prefix, array_batches(X_val, y_val), os.path.join(cache_dir, "val"), len(X_val))
+    return train_tail(tail, A_train, y_train, A_val, y_val)
+
+
+def train_model_cached_from_loader(model, loader, cache_dir="activation_cache"):
+    """train_model_cached fed from a data.SpectrogramLoader; memory stays constant as well."""
+    prefix, tail = split_frozen_prefix(model)
+    A_train, y_train = cache_activations(prefix, loader.batches("train", shuffle=False),
+                                         os.path.join(cache_dir, "train"), loader.size("train"))
+    A_val, y_val = cache_activations(prefix, loader.batches("val", shuffle=False),
+                                     os.path.join(cache_dir, "val"), loader.size("val"))
+    return train_tail(tail, A_train, y_train, A_val, y_val, loader.batch_size)
+
+
 def evaluate_model(model, X_test, y_test):
     return model.evaluate(X_test, y_test)
 
 
+def evaluate_model_from_loader(model, loader):
+    return model.evaluate(loader.batches("test", shuffle=False), steps=loader.steps("test"))
+
+
 def predict_model(model, X_new):
     return model.predict(X_new)
 
@@ -1,35 +1,252 @@
 import librosa
-import matplotlib.pyplot as plt
 import numpy as np
+import soundfile as sf
+from functools import lru_cache
+from typing import NamedTuple
+from numpy.lib.stride_tricks import sliding_window_view
 from PIL import Image
-import io
 
+# Layout of the 10x6 inch, 100 dpi figure that the VGG16 training spectrograms were saved from
+_FIGURE_SIZE = (1000, 600)
+_PLOT_BOX = (125, 72, 745, 534)
+_COLORBAR_BOX = (784, 72, 807, 534)
 
-def load_audio(audio_file_path):
-    y, sr = librosa.load(audio_file_path, sr=None)
+# specshow(y_axis="log") was called without sr, so the axis assumes librosa's default rate
+_SPECSHOW_SR = 22050
+_LOG_LINTHRESH = 65.40639132514966
+_LOG_LINSCALE_ADJ = 0.5 / (1.0 - 0.5)
+
+_MAGMA_HEX = (
+    "00000401000501010601010802010902020b02020d03030f030312040414050416060518"
+    "06051a07061c08071e0907200a08220b09240c09260d0a290e0b2b100b2d110c2f120d31"
+    "130d34140e36150e38160f3b180f3d19103f1a10421c10441d11471e114920114b21114e"
+    "22115024125325125527125829115a2a115c2c115f2d11612f1163311165331067341069"
+    "36106b38106c390f6e3b0f703d0f713f0f72400f74420f75440f76451077471078491078"
+    "4a10794c117a4e117b4f127b51127c52137c54137d56147d57157e59157e5a167e5c167f"
+    "5d177f5f187f601880621980641a80651a80671b80681c816a1c816b1d816d1d816e1e81"
+    "701f81721f817320817521817621817822817922827b23827c23827e2482802582812581"
+    "8326818426818627818827818928818b29818c29818e2a81902a81912b81932b80942c80"
+    "962c80982d80992d809b2e7f9c2e7f9e2f7fa02f7fa1307ea3307ea5317ea6317da8327d"
+    "aa337dab337cad347cae347bb0357bb2357bb3367ab5367ab73779b83779ba3878bc3978"
+    "bd3977bf3a77c03a76c23b75c43c75c53c74c73d73c83e73ca3e72cc3f71cd4071cf4070"
+    "d0416fd2426fd3436ed5446dd6456cd8456cd9466bdb476adc4869de4968df4a68e04c67"
+    "e24d66e34e65e44f64e55064e75263e85362e95462ea5661eb5760ec5860ed5a5fee5b5e"
+    "ef5d5ef05f5ef1605df2625df2645cf3655cf4675cf4695cf56b5cf66c5cf66e5cf7705c"
+    "f7725cf8745cf8765cf9785df9795df97b5dfa7d5efa7f5efa815ffb835ffb8560fb8761"
+    "fc8961fc8a62fc8c63fc8e64fc9065fd9266fd9467fd9668fd9869fd9a6afd9b6bfe9d6c"
+    "fe9f6dfea16efea36ffea571fea772fea973feaa74feac76feae77feb078feb27afeb47b"
+    "feb67cfeb77efeb97ffebb81febd82febf84fec185fec287fec488fec68afec88cfeca8d"
+    "fecc8ffecd90fecf92fed194fed395fed597fed799fed89afdda9cfddc9efddea0fde0a1"
+    "fde2a3fde3a5fde5a7fde7a9fde9aafdebacfcecaefceeb0fcf0b2fcf2b4fcf4b6fcf6b8"
+    "fcf7b9fcf9bbfcfbbdfcfdbf"
+)
+_COLORMAP = np.frombuffer(bytes.fromhex(_MAGMA_HEX), dtype=np.uint8).reshape(256, 3)
+
+
+class AudioDecodeError(ValueError):
+    """The file is not audio librosa can decode, or it holds no samples."""
+
+
+class DecodedAudio(NamedTuple):
+    """A decoded mono float32 signal with its sample rate."""
+    y: np.ndarray
+    sr: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.y) / self.sr
+
+
+def audio_duration(audio_file):
+    """Reads the duration in seconds from the file header without decoding, or None if the format has no such header."""
+    try:
+        info = sf.info(audio_file)
+    except (sf.LibsndfileError, RuntimeError):
+        return None
+    finally:
+        if hasattr(audio_file, "seek"):
+            audio_file.seek(0)
+    return info.duration
+
+
+def decode_audio(audio_file, sample_rate=None, max_duration=None) -> DecodedAudio:
+    """
+    Decodes an audio file path or file-like object once, at its native rate unless sample_rate is given.
+    Decoding stops after max_duration seconds if it is set. Raises AudioDecodeError when the file cannot be decoded.
+    """
+    if hasattr(audio_file, "seek"):
+        audio_file.seek(0)
+    try:
+        y, sr = librosa.load(audio_file, sr=None, duration=max_duration)
+    except Exception as e:
+        # soundfile, or audioread on librosa versions that fall back to it, raise their own error types
+        raise AudioDecodeError(str(e)) from e
+    if not len(y):
+        raise AudioDecodeError("the file holds no audio samples")
+    return resample_audio(DecodedAudio(y, sr), sample_rate)
+
+
+def resample_audio(audio: DecodedAudio, sample_rate=None) -> DecodedAudio:
+    """
+    Resamples a decoded signal to sample_rate, or returns it as is when sample_rate is None or its own rate.
+    librosa's default soxr resampler is used, as librosa.load(sr=sample_rate) would; see benchmarks/resampling.py.
+    """
+    if sample_rate is None or sample_rate == audio.sr:
+        return audio
+    return DecodedAudio(librosa.resample(audio.y, orig_sr=audio.sr, target_sr=sample_rate), sample_rate)
+
+
+def load_audio(audio: DecodedAudio):
+    y = audio.y
     # y_denoised = nr.reduce_noise(y=y, sr=sr)
     y_trimmed, index = librosa.effects.trim(y, top_db=20)
     return y_trimmed
 
 
-def get_spectrogram(y):
-    plt.figure(figsize=(10, 6))
-    librosa.display.specshow(
-        librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max),
-        y_axis="log",
-        x_axis="time"
-    )
-    plt.colorbar(format="%+2.0f dB")
-    plt.title("Spectrogram")
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    image = Image.open(buf).convert("RGB")
-    return image
+def compute_spectrogram_db(y):
+    """Computes the dB-scaled STFT magnitude of a signal, referenced to its maximum."""
+    return librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max)
+
+
+def _symlog(x):
+    x = np.asarray(x, dtype=np.float64)
+    linear = np.abs(x) <= _LOG_LINTHRESH
+    with np.errstate(divide="ignore"):
+        log = np.sign(x) * _LOG_LINTHRESH * (
+            _LOG_LINSCALE_ADJ + np.log2(np.abs(x) / _LOG_LINTHRESH))
+    return np.where(linear, x * _LOG_LINSCALE_ADJ, log)
+
+
+def _symlog_inverse(z):
+    z = np.asarray(z, dtype=np.float64)
+    linear = np.abs(z) <= _LOG_LINTHRESH * _LOG_LINSCALE_ADJ
+    log = np.sign(z) * _LOG_LINTHRESH * np.power(2.0, np.abs(z) / _LOG_LINTHRESH - _LOG_LINSCALE_ADJ)
+    return np.where(linear, z / _LOG_LINSCALE_ADJ, log)
+
+
+@lru_cache(maxsize=64)
+def _frequency_rows(n_bins, height):
+    """STFT bin shown on each pixel row (top to bottom) of the log-frequency axis."""
+    bin_hz = _SPECSHOW_SR / (2 * (n_bins - 1))
+    z_low, z_high = _symlog([-bin_hz / 2, _SPECSHOW_SR / 2 + bin_hz / 2])
+    fraction = (height - np.arange(height) - 0.5) / height
+    freqs = _symlog_inverse(z_low + fraction * (z_high - z_low))
+    rows = np.clip(np.rint(freqs / bin_hz), 0, n_bins - 1).astype(np.intp)
+    rows.flags.writeable = False
+    return rows
+
+
+@lru_cache(maxsize=64)
+def _time_columns(n_frames, width):
+    """STFT frame shown on each pixel column of the time axis."""
+    columns = np.minimum(((np.arange(width) + 0.5) * n_frames / width).astype(np.intp), n_frames - 1)
+    columns.flags.writeable = False
+    return columns
+
+
+def _colorize(values, vmin, vmax):
+    """Maps values onto the magma lookup table the same way matplotlib's Normalize does."""
+    span = vmax - vmin
+    if span > 0:
+        index = ((values - vmin) * (_COLORMAP.shape[0] / span)).astype(np.intp)
+    else:
+        index = np.zeros(values.shape, dtype=np.intp)
+    return _COLORMAP[np.clip(index, 0, _COLORMAP.shape[0] - 1)]
+
+
+def _draw_frame(canvas, box):
+    left, top, right, bottom = box
+    canvas[top, left:right + 1] = 0
+    canvas[bottom, left:right + 1] = 0
+    canvas[top:bottom + 1, left] = 0
+    canvas[top:bottom + 1, right] = 0
+
+
+def render_spectrogram(spectrogram_db, size=None, parity=True):
+    """
+    Renders a dB spectrogram to an RGB array without going through matplotlib.
+
+    Parameters:
+    - spectrogram_db (np.ndarray): dB-scaled STFT magnitude of shape (n_bins, n_frames).
+    - size (tuple, optional): Output (width, height). If None, the native size of the chosen layout is used.
+    - parity (bool, optional): Reproduce the layout of the 10x6 inch figure the VGG16 model was trained on
+      (plot area, colorbar and frame, without text). If False, the spectrogram fills the whole image. Default is True.
+
+    Returns:
+    - np.ndarray: A uint8 array of shape (height, width, 3).
+    """
+    n_bins, n_frames = spectrogram_db.shape
+    vmin, vmax = float(spectrogram_db.min()), float(spectrogram_db.max())
+
+    if not parity:
+        width, height = size or (_PLOT_BOX[2] - _PLOT_BOX[0], _PLOT_BOX[3] - _PLOT_BOX[1])
+        pixels = spectrogram_db[np.ix_(_frequency_rows(n_bins, height), _time_columns(n_frames, width))]
+        return _colorize(pixels, vmin, vmax)
+
+    canvas = np.full((_FIGURE_SIZE[1], _FIGURE_SIZE[0], 3), 255, dtype=np.uint8)
+
+    left, top, right, bottom = _PLOT_BOX
+    pixels = spectrogram_db[np.ix_(_frequency_rows(n_bins, bottom - top), _time_columns(n_frames, right - left))]
+    canvas[top:bottom, left:right] = _colorize(pixels, vmin, vmax)
+    _draw_frame(canvas, _PLOT_BOX)
+
+    left, top, right, bottom = _COLORBAR_BOX
+    levels = vmax - (np.arange(bottom - top) + 0.5) * (vmax - vmin) / (bottom - top)
+    canvas[top:bottom, left:right] = _colorize(levels, vmin, vmax)[:, np.newaxis]
+    _draw_frame(canvas, _COLORBAR_BOX)
+
+    if size is not None and size != _FIGURE_SIZE:
+        return np.asarray(Image.fromarray(canvas).resize(size))
+    return canvas
+
+
+def get_spectrogram(y, size=None, parity=True):
+    return Image.fromarray(render_spectrogram(compute_spectrogram_db(y), size=size, parity=parity))
+
+
+@lru_cache(maxsize=32)
+def _mfcc_constants(sr, frame_size, frame_stride, NFFT, nfilt, num_ceps):
+    """
+    Precomputes the parameter-only parts of extract_mfcc.
+
+    Returns the frame length and step in samples, the Hamming window, the transposed Mel filter
+    bank of shape (NFFT // 2 + 1, nfilt) and the orthonormal DCT-II basis restricted to
+    coefficients 1..num_ceps, of shape (nfilt, num_ceps). Arrays are read-only since they are shared.
+    """
+    # Calculate frame length and step in samples
+    frame_length = int(round(frame_size * sr))
+    frame_step = int(round(frame_stride * sr))
+    window = np.hamming(frame_length)
+
+    # Convert Hz to Mel scale
+    low_freq_mel = 0
+    high_freq_mel = (2595 * np.log10(1 + (sr / 2) / 700))
+    mel_points = np.linspace(low_freq_mel, high_freq_mel, nfilt + 2)
+    hz_points = (700 * (10 ** (mel_points / 2595) - 1))
+    bin = np.floor((NFFT + 1) * hz_points / sr)
+
+    # Create triangular filter banks, one row per filter
+    k = np.arange(int(np.floor(NFFT / 2 + 1)))
+    left, center, right = bin[:-2, np.newaxis], bin[1:-1, np.newaxis], bin[2:, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rising = (k - left) / (center - left)
+        falling = (right - k) / (right - center)
+    fbank = np.where((k >= left) & (k < center), rising, 0.0)
+    fbank = np.where((k >= center) & (k < right), falling, fbank)
+
+    # Orthonormal DCT-II basis, as in scipy.fftpack.dct(type=2, norm='ortho')
+    n = np.arange(nfilt)[:, np.newaxis]
+    ceps = np.arange(1, num_ceps + 1)
+    dct_basis = np.sqrt(2.0 / nfilt) * np.cos(np.pi * ceps * (2 * n + 1) / (2 * nfilt))
+
+    fbank_t = np.ascontiguousarray(fbank.T)
+    for array in (window, fbank_t, dct_basis):
+        array.flags.writeable = False
+    return frame_length, frame_step, window, fbank_t, dct_basis
 
 
 def extract_mfcc(
-        audio_file_path,
+        audio: DecodedAudio,
         sample_rate=None,
         pre_emphasis=0.97,
         frame_size=0.025,
@@ -37,13 +254,14 @@ def extract_mfcc(
         NFFT=512,
         nfilt=40,
         num_ceps=12,
-        fixed_length=100
+        fixed_length=100,
+        out=None
 ):
     """
-    Extracts Mel-frequency cepstral coefficients (MFCC) from an audio file.
+    Extracts Mel-frequency cepstral coefficients (MFCC) from a decoded audio signal.
 
     Parameters:
-    - audio_file_path (str): Path to the input audio file.
+    - audio (DecodedAudio): The decoded input audio, see decode_audio.
     - sample_rate (int, optional): Desired sample rate for the audio. If None, uses the original audio's sample rate.
     - pre_emphasis (float, optional): Pre-emphasis filter coefficient. Default is 0.97.
     - frame_size (float, optional): Frame size in seconds. Default is 0.025.
@@ -52,23 +270,23 @@ def extract_mfcc(
     - nfilt (int, optional): Number of Mel filters. Default is 40.
     - num_ceps (int, optional): Number of cepstral coefficients to return. Default is 12.
     - fixed_length (int, optional): The fixed number of MFCC frames to return. Default is 100.
+    - out (np.ndarray, optional): A (fixed_length, num_ceps) array to write the MFCCs into, for instance a row of a batch.
 
     Returns:
-    - np.ndarray: An array of shape (fixed_length, num_ceps) containing the extracted MFCCs.
+    - np.ndarray: An array of shape (fixed_length, num_ceps) containing the extracted MFCCs, out if given.
 
     """
 
-    # Load the audio file using librosa
-    y, sr = librosa.load(audio_file_path, sr=sample_rate)
+    # Resample the decoded signal if another rate is requested
+    y, sr = resample_audio(audio, sample_rate)
 
     # Apply the pre-emphasis filter
     emphasized_signal = np.append(y[0], y[1:] - pre_emphasis * y[:-1])
 
-    # Calculate frame length and step in samples
-    frame_length, frame_step = frame_size * sr, frame_stride * sr
+    # Frame geometry, window, filter banks and DCT basis only depend on the parameters
+    frame_length, frame_step, window, fbank_t, dct_basis = _mfcc_constants(
+        sr, frame_size, frame_stride, NFFT, nfilt, num_ceps)
     signal_length = len(emphasized_signal)
-    frame_length = int(round(frame_length))
-    frame_step = int(round(frame_step))
 
     # Calculate the number of frames
     num_frames = int(np.ceil(float(np.abs(signal_length - frame_length)) / frame_step))
@@ -78,38 +296,18 @@ def extract_mfcc(
     z = np.zeros((pad_signal_length - signal_length))
     pad_signal = np.append(emphasized_signal, z)
 
-    # Create frames using stride tricks
-    indices = np.tile(np.arange(0, frame_length), (num_frames, 1)) + np.tile(
-        np.arange(0, num_frames * frame_step, frame_step), (frame_length, 1)).T
-    frames = pad_signal[indices.astype(np.int32, copy=False)]
+    # Create frames as a strided view on the padded signal; frames past fixed_length would be truncated anyway
+    frames = sliding_window_view(pad_signal, frame_length)[::frame_step][:min(num_frames, fixed_length)]
 
     # Apply window function (Hamming window)
-    frames *= np.hamming(frame_length)
+    frames = frames * window
 
     # Compute power spectrum
     mag_frames = np.absolute(np.fft.rfft(frames, NFFT))
     pow_frames = ((1.0 / NFFT) * ((mag_frames) ** 2))
 
-    # Convert Hz to Mel scale
-    low_freq_mel = 0
-    high_freq_mel = (2595 * np.log10(1 + (sr / 2) / 700))
-    mel_points = np.linspace(low_freq_mel, high_freq_mel, nfilt + 2)
-    hz_points = (700 * (10 ** (mel_points / 2595) - 1))
-    bin = np.floor((NFFT + 1) * hz_points / sr)
-
-    # Create filter banks
-    fbank = np.zeros((nfilt, int(np.floor(NFFT / 2 + 1))))
-    for m in range(1, nfilt + 1):
-        f_m_minus = int(bin[m - 1])
-        f_m = int(bin[m])
-        f_m_plus = int(bin[m + 1])
-        for k in range(f_m_minus, f_m):
-            fbank[m - 1, k] = (k - bin[m - 1]) / (bin[m] - bin[m - 1])
-        for k in range(f_m, f_m_plus):
-            fbank[m - 1, k] = (bin[m + 1] - k) / (bin[m + 1] - bin[m])
-
     # Filter the power spectrum through the filter banks
-    filter_banks = np.dot(pow_frames, fbank.T)
+    filter_banks = np.dot(pow_frames, fbank_t)
 
     # Avoid numerical issues by replacing zero values
     filter_banks = np.where(filter_banks == 0, np.finfo(float).eps, filter_banks)
@@ -117,11 +315,14 @@ def extract_mfcc(
     # Convert to dB
     filter_banks = 20 * np.log10(filter_banks)
 
-    # Compute MFCC using DCT
-    from scipy.fftpack import dct
-    mfcc = dct(filter_banks, type=2, axis=1, norm='ortho')[:, 1: (num_ceps + 1)]
+    # Compute MFCC using DCT, keeping only coefficients 1..num_ceps
+    mfcc = np.dot(filter_banks, dct_basis)
 
     # Adjust the length of MFCC sequence to a fixed length
+    if out is not None:
+        out[:len(mfcc)] = mfcc
+        out[len(mfcc):] = 0
+        return out
     if mfcc.shape[0] < fixed_length:
         pad_width = fixed_length - mfcc.shape[0]
         mfcc = np.pad(mfcc, pad_width=((0, pad_width), (0, 0)), mode='constant')
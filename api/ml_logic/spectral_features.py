@@ -0,0 +1,144 @@
+"""
+Scalar and MFCC summary features of a clip, derived from one STFT and one mel spectrogram.
+
+Computing each librosa feature from the signal repeats the STFT in spectral_centroid,
+spectral_contrast, spectral_bandwidth and melspectrogram, and the mel spectrogram in mfcc.
+Here the magnitude spectrogram is computed once and every spectral feature is taken from it,
+with librosa's default parameters, so the values are those of the per-feature calls.
+"""
+from functools import lru_cache
+from typing import List, Optional, Sequence
+import librosa
+import numpy as np
+
+# librosa.load's default rate, which the feature CSV of testing/feature_extractor is computed at
+FEATURE_SAMPLE_RATE = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 13
+TOP_DB = 80.0
+ZCR_THRESHOLD = 1e-10
+
+FEATURE_NAMES = [
+    "Amplitude_Envelope_Mean",
+    "RMS_Mean",
+    "ZCR_Mean",
+    "STFT_Mean",
+    "SC_Mean",
+    "SBAN_Mean",
+    "SCON_Mean",
+    "MelSpec",
+    *["MFCCs" + str(i) for i in range(1, N_MFCC + 1)],
+]
+
+
+def _n_frames(n_samples: int) -> int:
+    # Centered frames: one per hop, plus the frame centred on the first sample
+    return 1 + n_samples // HOP_LENGTH
+
+
+@lru_cache(maxsize=8)
+def _mel_basis(sr: int) -> np.ndarray:
+    return librosa.filters.mel(sr=sr, n_fft=N_FFT)
+
+
+def _zero_crossing_rate_mean(y: np.ndarray) -> float:
+    """
+    np.mean(librosa.feature.zero_crossing_rate(y)) from a cumulative count of sign changes.
+
+    librosa counts, in each edge-padded frame, the samples whose sign differs from the previous
+    sample of the frame, with samples within ZCR_THRESHOLD of zero taken as positive.
+    """
+    padded = np.pad(y, N_FFT // 2, mode="edge")
+    negative = padded < np.float64(-ZCR_THRESHOLD)
+    changes = np.concatenate([[0], np.cumsum(negative[1:] != negative[:-1])])
+    starts = np.arange(_n_frames(len(y))) * HOP_LENGTH
+    return np.mean((changes[starts + N_FFT - 1] - changes[starts]) / N_FFT)
+
+
+def _spectral_features(signals: Sequence[np.ndarray], S: np.ndarray, sr: int) -> np.ndarray:
+    """Features of clips whose magnitude spectrograms S (..., bins, frames) may be zero-padded past each clip."""
+    n_frames = [_n_frames(len(y)) for y in signals]
+    # Centroid and bandwidth share the column-normalised spectrogram, as librosa computes them
+    frequencies = librosa.fft_frequencies(sr=sr, n_fft=N_FFT)
+    # librosa.util.normalize(S, norm=1, axis=-2) without its input checks and float64 copy
+    length = np.sum(S, axis=-2, keepdims=True, dtype=np.float64)
+    length[length < librosa.util.tiny(S)] = 1.0
+    S_normalized = (S / length).astype(S.dtype)
+    centroid = np.sum(frequencies[:, np.newaxis] * S_normalized, axis=-2, keepdims=True)
+    deviation = np.abs(np.subtract.outer(centroid[..., 0, :], frequencies).swapaxes(-2, -1))
+    bandwidth = np.sum(S_normalized * deviation ** 2, axis=-2, keepdims=True) ** 0.5
+    mel = np.einsum("...ft,mf->...mt", S ** 2, _mel_basis(sr), optimize=True)
+    # power_to_db clips at TOP_DB below the loudest bin of the clip, which excludes the padding
+    mel_db = librosa.power_to_db(mel, top_db=None)
+    for i, frames in enumerate(n_frames):
+        np.maximum(mel_db[i, :, :frames], mel_db[i, :, :frames].max() - TOP_DB, out=mel_db[i, :, :frames])
+    mfcc = librosa.feature.mfcc(S=mel_db, n_mfcc=N_MFCC)
+
+    rows = np.empty((len(signals), len(FEATURE_NAMES)))
+    for i, (y, frames) in enumerate(zip(signals, n_frames)):
+        rows[i, :8] = [
+            np.mean(np.abs(y)),
+            np.mean(librosa.feature.rms(y=y)),
+            _zero_crossing_rate_mean(y),
+            np.mean(S[i, :, :frames]),
+            np.mean(centroid[i, :, :frames]),
+            np.mean(bandwidth[i, :, :frames]),
+            # Contrast converts to dB relative to the loudest band, so it needs the clip on its own
+            np.mean(librosa.feature.spectral_contrast(S=S[i, :, :frames], sr=sr, n_fft=N_FFT, hop_length=HOP_LENGTH)),
+            np.mean(mel[i, :, :frames]),
+        ]
+        rows[i, 8:] = np.mean(mfcc[i, :, :frames], axis=1)
+    return rows
+
+
+def extract_spectral_features(y: np.ndarray, sr: int, S: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Features of one clip, in the order of FEATURE_NAMES.
+
+    Parameters:
+    - y (np.ndarray): The audio signal.
+    - sr (int): Its sample rate.
+    - S (np.ndarray, optional): np.abs(librosa.stft(y)) if the caller already has it.
+
+    Returns:
+    - np.ndarray: len(FEATURE_NAMES) float64 values.
+    """
+    if S is None:
+        S = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH))
+    return _spectral_features([y], S[np.newaxis], sr)[0]
+
+
+def _batches(order: Sequence[int], n_frames: Sequence[int], max_frames: int) -> List[List[int]]:
+    """Consecutive clips of order while the batch, padded to its longest clip, holds at most max_frames frames."""
+    batches = []
+    for i in order:
+        if batches and (len(batches[-1]) + 1) * n_frames[i] <= max_frames:
+            batches[-1].append(i)
+        else:
+            batches.append([i])
+    return batches
+
+
+def batch_spectral_features(signals: Sequence[np.ndarray], sr: int, max_frames: int = 0) -> np.ndarray:
+    """
+    Features of many clips with the same sample rate, shape (len(signals), len(FEATURE_NAMES)).
+
+    With max_frames > 0, clips are sorted by length and zero-padded to the longest clip of their
+    batch, and a batch holds at most max_frames STFT frames, so one call of each spectral
+    function covers several clips. With librosa's constant padding, the frames of a clip do not
+    change when zeros follow it, and only those frames are averaged; the values match within
+    float32 rounding. On NumPy this was not faster than one clip at a time (see
+    benchmarks/spectral_features.py), so by default every clip is its own batch.
+    """
+    rows = np.empty((len(signals), len(FEATURE_NAMES)))
+    n_frames = [_n_frames(len(y)) for y in signals]
+    order = np.argsort(n_frames, kind="stable").tolist()
+    for indices in _batches(order, n_frames, max_frames):
+        batch = [signals[i] for i in indices]
+        padded = np.zeros((len(batch), max(len(y) for y in batch)), dtype=np.result_type(*batch))
+        for row, y in zip(padded, batch):
+            row[:len(y)] = y
+        S = np.abs(librosa.stft(padded, n_fft=N_FFT, hop_length=HOP_LENGTH))
+        rows[indices] = _spectral_features(batch, S, sr)
+    return rows
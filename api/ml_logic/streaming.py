@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class CryStream:
+    """
+    Per-connection state of a live PCM stream.
+
+    Keeps the last window_seconds of audio in a fixed ring buffer together with the RMS level
+    (dBFS) of each frame_length frame, so memory stays O(window) however long the stream runs.
+    A window counts as containing a cry, in the spirit of librosa.effects.trim(top_db=20), when
+    at least min_active of its frames are within top_db of the loudest frame and above min_db,
+    and the audio received since the last classification has at least one such frame.
+    """
+
+    def __init__(
+            self,
+            sample_rate: int,
+            window_seconds: float,
+            classify_every_seconds: float,
+            top_db: float,
+            min_db: float,
+            min_active: float,
+            frame_length: int
+    ):
+        self.sample_rate = sample_rate
+        self.top_db = top_db
+        self.min_db = min_db
+        self.min_active = min_active
+        self.frame_length = frame_length
+        self.classify_every = int(classify_every_seconds * sample_rate)
+
+        n_frames = max(1, int(window_seconds * sample_rate) // frame_length)
+        self._buffer = np.zeros(n_frames * frame_length, dtype=np.float32)
+        self._frame_db = np.full(n_frames, -np.inf)
+        self._partial = np.empty(0, dtype=np.float32)
+        self._frames_written = 0
+        self._since_classified = 0
+
+    @property
+    def seconds_received(self) -> float:
+        return (self._frames_written * self.frame_length + len(self._partial)) / self.sample_rate
+
+    def _write_frames(self, frames: np.ndarray):
+        n_frames = len(self._frame_db)
+        # Frames older than the window would be overwritten right away
+        skipped = max(0, len(frames) - n_frames)
+        frames = frames[skipped:]
+        self._frames_written += skipped
+        levels = 10 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-12)
+        slots = (self._frames_written + np.arange(len(frames))) % n_frames
+        self._frame_db[slots] = levels
+        self._buffer.reshape(n_frames, self.frame_length)[slots] = frames
+        self._frames_written += len(frames)
+
+    def push(self, samples: np.ndarray) -> bool:
+        """Appends mono float samples and returns True when the current window should be classified."""
+        samples = np.concatenate([self._partial, samples.astype(np.float32, copy=False)])
+        n_complete = len(samples) // self.frame_length * self.frame_length
+        if n_complete:
+            self._write_frames(samples[:n_complete].reshape(-1, self.frame_length))
+        self._partial = samples[n_complete:].copy()
+        self._since_classified += n_complete
+
+        if self._since_classified < self.classify_every or not self.contains_cry():
+            return False
+        self._since_classified = 0
+        return True
+
+    def contains_cry(self) -> bool:
+        """True if enough of the window is active and the cry is still going on in the newest audio."""
+        levels = self._frame_db[np.isfinite(self._frame_db)]
+        if not len(levels):
+            return False
+        peak = levels.max()
+        if peak < self.min_db:
+            return False
+        threshold = max(peak - self.top_db, self.min_db)
+        n_frames = len(self._frame_db)
+        n_recent = min(n_frames, -(-self.classify_every // self.frame_length))
+        recent = (self._frames_written - 1 - np.arange(n_recent)) % n_frames
+        return (levels > threshold).mean() >= self.min_active and (self._frame_db[recent] > threshold).any()
+
+    def window(self) -> np.ndarray:
+        """Returns a copy of the buffered audio, oldest sample first."""
+        n_frames = len(self._frame_db)
+        filled = min(self._frames_written, n_frames)
+        order = (self._frames_written - filled + np.arange(filled)) % n_frames
+        return self._buffer.reshape(n_frames, self.frame_length)[order].ravel()
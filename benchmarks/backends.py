@@ -0,0 +1,94 @@
+"""Accuracy and latency of the VGG16 model per inference backend.
+
+Every model is given as backend:path. The first one is the reference that the others are
+compared against (top-1 agreement, largest probability difference). Accuracy is measured on the
+test split of a feature store or spectrogram folder; latency is measured on single images and on
+batches of BATCH_SIZE. The report is printed and, with --output, saved as JSON.
+
+Run from the repository root, e.g. after exporting with api.ml_logic.export:
+
+    python -m benchmarks.backends --data feature_store --output backends.json \
+        keras:VGG16_Baby_prod.h5 tflite:VGG16_Baby_prod_int8.tflite onnx:VGG16_Baby_prod_dynamic.onnx
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from api.ml_logic.backends import load_backend
+from api.ml_logic.feature_store import FeatureStore
+
+BATCH_SIZE = 16
+LATENCY_RUNS = 50
+
+
+def test_split(path):
+    """Float32 spectrograms and integer labels of the test split."""
+    if os.path.exists(os.path.join(path, FeatureStore.META_NAME)):
+        store = FeatureStore(path)
+        return store.select("spectrogram", "test").astype(np.float32), np.asarray(store.select("label", "test"))
+    from api.ml_logic.data import SpectrogramLoader
+    batches = list(SpectrogramLoader(path).batches("test", shuffle=False))
+    return np.concatenate([X for X, _ in batches]).astype(np.float32), np.concatenate([y.argmax(1) for _, y in batches])
+
+
+def latency_ms(model, x):
+    model.predict(x, verbose=0)
+    timings = []
+    for _ in range(LATENCY_RUNS):
+        start = time.perf_counter()
+        model.predict(x, verbose=0)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("models", nargs="+", help="backend:path, the first one is the reference")
+    parser.add_argument("--data", required=True, help="feature store or spectrogram folder")
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--output", help="JSON file for the report")
+    args = parser.parse_args()
+
+    X, labels = test_split(args.data)
+    print(f"{len(X)} test spectrograms")
+    report = []
+    reference = None
+    for spec in args.models:
+        backend, path = spec.split(":", 1)
+        start = time.perf_counter()
+        model = load_backend(backend, path, args.threads)
+        load_seconds = time.perf_counter() - start
+
+        probabilities = np.concatenate([
+            model.predict(X[i:i + BATCH_SIZE], verbose=0) for i in range(0, len(X), BATCH_SIZE)
+        ])
+        if reference is None:
+            reference = probabilities
+        single_p50, single_p95 = latency_ms(model, X[:1])
+        batch_p50, batch_p95 = latency_ms(model, X[:BATCH_SIZE])
+        report.append({
+            "backend": backend,
+            "path": path,
+            "size_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+            "load_seconds": round(load_seconds, 3),
+            "accuracy": float((probabilities.argmax(1) == labels).mean()),
+            "top1_agreement": float((probabilities.argmax(1) == reference.argmax(1)).mean()),
+            "max_probability_difference": float(np.abs(probabilities - reference).max()),
+            "latency_ms_batch_1": {"p50": round(single_p50, 2), "p95": round(single_p95, 2)},
+            f"latency_ms_batch_{BATCH_SIZE}": {"p50": round(batch_p50, 2), "p95": round(batch_p95, 2)},
+        })
+        row = report[-1]
+        print(f"  {backend:7s} {row['size_mb']:7.1f} MB  accuracy {row['accuracy']:.3f}  "
+              f"agreement {row['top1_agreement']:.3f}  max diff {row['max_probability_difference']:.4f}  "
+              f"batch 1 p50 {single_p50:7.1f} ms  batch {BATCH_SIZE} p50 {batch_p50:7.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"test_images": len(X), "backends": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Load test of VGG16 micro-batching against one predict call per request.
+
+Run from the repository root (needs VGG16_Baby_prod.h5):
+
+    python -m benchmarks.batching
+"""
+import asyncio
+import time
+
+import numpy as np
+from keras.models import load_model
+
+from api.core.batching import BatchScheduler
+from api.core.executors import BoundedExecutor
+
+MODEL_PATH = "VGG16_Baby_prod.h5"
+REQUESTS = 256
+CONCURRENCY = [1, 4, 16, 64]
+MAX_BATCH_SIZE = 16
+MAX_WAIT_MS = 10.0
+
+
+async def load_test(predict_one, concurrency):
+    inputs = np.random.default_rng(0).uniform(0, 255, (concurrency, 224, 224, 3)).astype("float32")
+    latencies = []
+
+    async def client(index):
+        for _ in range(REQUESTS // concurrency):
+            start = time.perf_counter()
+            await predict_one(inputs[index])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+async def main():
+    model = load_model(MODEL_PATH)
+
+    def predict(batch):
+        return model.predict(batch, verbose=0)
+
+    predict(np.zeros((1, 224, 224, 3), dtype="float32"))
+
+    for concurrency in CONCURRENCY:
+        executor = BoundedExecutor("inference", max_workers=1, max_queue=REQUESTS, timeout=600)
+        batcher = BatchScheduler("vgg16", predict, executor, MAX_BATCH_SIZE, MAX_WAIT_MS)
+
+        async def per_request(item):
+            return (await executor.run(predict, item[np.newaxis]))[0]
+
+        for name, predict_one in (("per-request", per_request), ("batched", batcher.predict)):
+            throughput, p50, p99 = await load_test(predict_one, concurrency)
+            print(f"concurrency {concurrency:3d} {name:12s} {throughput:7.1f} req/s  "
+                  f"p50 {p50:8.1f} ms  p99 {p99:8.1f} ms")
+        print(f"  mean batch size: {batcher.stats()['mean_batch_size']:.1f}")
+        batcher.close()
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""Batch noise reduction and trimming against the per-file loop of testing/clean_audio.
+
+The loop runs noisereduce.reduce_noise and librosa.effects.trim(top_db=20) on one clip at a
+time, as clean_safe does. clean_batch processes the same clips in zero-padded batches per
+sample rate. Inputs are clips of 40 to 100% of the recordings in data/input_data/audio, at their
+native 8 kHz and resampled to 16 kHz.
+
+Run from the repository root:
+
+    python -m benchmarks.cleaning
+"""
+import os
+import time
+import warnings
+
+import librosa
+import noisereduce as nr
+import numpy as np
+
+from api.ml_logic.cleaning import clean_batch
+
+AUDIO_FOLDER = "./data/input_data/audio"
+CLIPS = 48
+TOP_DB = 20
+
+
+def clips():
+    files = sorted(os.path.join(AUDIO_FOLDER, f) for f in os.listdir(AUDIO_FOLDER) if f.endswith(".wav"))
+    recordings = [librosa.load(file, sr=None) for file in files]
+    rng = np.random.default_rng(0)
+    signals, sample_rates = [], []
+    for i in range(CLIPS):
+        y, sr = recordings[i % len(recordings)]
+        if i % 4 == 3:
+            y, sr = librosa.resample(y, orig_sr=sr, target_sr=2 * sr), 2 * sr
+        signals.append(y[:int(len(y) * rng.uniform(0.4, 1.0))])
+        sample_rates.append(sr)
+    return signals, sample_rates
+
+
+def per_file(signals, sample_rates):
+    cleaned, indices = [], []
+    for y, sr in zip(signals, sample_rates):
+        y_trimmed, index = librosa.effects.trim(nr.reduce_noise(y=y, sr=sr), top_db=TOP_DB)
+        cleaned.append(y_trimmed)
+        indices.append(index)
+    return cleaned, np.array(indices)
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    signals, sample_rates = clips()
+    print(f"{CLIPS} clips of {min(map(len, signals))} to {max(map(len, signals))} samples, "
+          f"sample rates {sorted(set(sample_rates))}")
+
+    start = time.perf_counter()
+    reference, reference_indices = per_file(signals, sample_rates)
+    loop_rate = CLIPS / (time.perf_counter() - start)
+    start = time.perf_counter()
+    cleaned, indices = clean_batch(signals, sample_rates, top_db=TOP_DB)
+    batch_rate = CLIPS / (time.perf_counter() - start)
+
+    same_indices = (indices == reference_indices).all(axis=1)
+    error = max(np.abs(a - b).max() / np.abs(a).max()
+                for a, b, same in zip(reference, cleaned, same_indices) if same and len(a))
+    print(f"per-file loop: {loop_rate:6.2f} clips/s")
+    print(f"clean_batch:   {batch_rate:6.2f} clips/s, {batch_rate / loop_rate:4.1f}x")
+    print(f"same trim indices for {same_indices.mean():.0%} of the clips, "
+          f"max error relative to the clip peak {error:.1e}")
+
+
+if __name__ == "__main__":
+    main()
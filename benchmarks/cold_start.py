@@ -0,0 +1,74 @@
+"""Cold start of the API: time until it answers /healthz and until /readyz reports every model ready.
+
+The app is started with uvicorn in a subprocess, the way the container runs it, and both probes
+are polled every POLL_SECONDS. The per-model load times from /readyz show how much the parallel
+background loading saves over loading the models one after the other. With --budget the run
+fails when readiness takes longer, so the budget can be enforced in CI.
+
+Run from the repository root (needs the model files and api/core/configurations.yaml):
+
+    python -m benchmarks.cold_start --budget 30
+"""
+import argparse
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import json
+
+PORT = 8765
+POLL_SECONDS = 0.05
+TIMEOUT_SECONDS = 300
+
+
+def probe(path):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{PORT}{path}", timeout=1) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except OSError:
+        return None, None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, help="seconds until ready above which the run fails")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning"]
+    )
+    healthy = ready = None
+    status = None
+    try:
+        while ready is None and time.perf_counter() - start < TIMEOUT_SECONDS:
+            if healthy is None and probe("/healthz")[0] == 200:
+                healthy = time.perf_counter() - start
+            if healthy is not None:
+                code, status = probe("/readyz")
+                if code == 200:
+                    ready = time.perf_counter() - start
+            time.sleep(POLL_SECONDS)
+    finally:
+        server.terminate()
+        server.wait()
+
+    if ready is None:
+        print(f"not ready after {TIMEOUT_SECONDS} s (healthy after {healthy} s)")
+        sys.exit(1)
+    loads = {name: model["load_seconds"] for name, model in status["models"].items()}
+    print(f"healthy (serving HTTP) after {healthy:6.2f} s")
+    print(f"ready (all models)     after {ready:6.2f} s")
+    for name, seconds in loads.items():
+        print(f"  {name:8s} loaded in {seconds:6.2f} s")
+    print(f"  loading one after the other would take {sum(loads.values()):.2f} s, in parallel {max(loads.values()):.2f} s")
+    if args.budget is not None and ready > args.budget:
+        print(f"over the cold-start budget of {args.budget:.1f} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
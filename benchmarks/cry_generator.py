@@ -0,0 +1,130 @@
+"""Batched cry generation against one prompt per generate_continuation call, on a tiny CPU model.
+
+TinyAudioGen stands in for AudioGen with the same interface: it encodes each prompt and decodes
+one frame of audio per step, autoregressively, at AudioGen's 50 frames per second, so a step
+costs about the same for one prompt as for a batch. No GPU, network or audiocraft is needed,
+only torch and torchaudio.
+
+The prompts are the clips of data/input_data/audio, copied into two categories. The sequential
+baseline is the previous loop: one prompt per call, writes in the loop and the output folder
+listed again after every clip. Then the batched generator runs at several batch sizes, and
+finally an interrupted run is resumed to check that only the missing clips are generated.
+
+Run from the repository root:
+
+    python -m benchmarks.cry_generator
+"""
+import fnmatch
+import os
+import shutil
+import tempfile
+import time
+
+import soundfile as sf
+import torch
+
+from cry_generator.audiogen_v2 import DESCRIPTION, GENERATION_PARAMS, gen_audios_per_category, load_prompts
+
+AUDIO_FOLDER = "./data/input_data/audio"
+CATEGORIES = ["hungry", "tired"]
+QUANTITY = 16
+BATCH_SIZES = [1, 4, 8, 16]
+
+
+class TinyAudioGen(torch.nn.Module):
+    """A GRU decoding 320 samples per step at 16 kHz, with AudioGen's generation interface."""
+
+    sample_rate = 16000
+    frame_rate = 50
+
+    def __init__(self, hidden=256):
+        super().__init__()
+        torch.manual_seed(0)
+        self.encoder = torch.nn.Linear(self.sample_rate // self.frame_rate, hidden)
+        self.cell = torch.nn.GRUCell(hidden, hidden)
+        self.decoder = torch.nn.Linear(hidden, self.sample_rate // self.frame_rate)
+        self.duration = GENERATION_PARAMS["duration"]
+
+    def set_generation_params(self, duration, **_):
+        self.duration = duration
+
+    @torch.no_grad()
+    def generate_continuation(self, prompt, prompt_sample_rate, descriptions, progress=False):
+        assert len(descriptions) == len(prompt)
+        frame = self.sample_rate // self.frame_rate
+        prompt = torch.nn.functional.interpolate(
+            prompt.mean(dim=1, keepdim=True), scale_factor=self.sample_rate / prompt_sample_rate)
+        frames = [prompt[..., :prompt.shape[-1] // frame * frame].reshape(len(prompt), -1, frame)]
+        state = self.encoder(frames[0]).mean(dim=1)
+        step_input = state
+        for _ in range(int(self.duration * self.frame_rate) - frames[0].shape[1]):
+            state = self.cell(step_input, state)
+            step_input = state
+            frames.append(torch.tanh(self.decoder(state)).unsqueeze(1))
+        return torch.cat(frames, dim=1).reshape(len(prompt), 1, -1)
+
+
+def write_wav(path, wav, sample_rate):
+    sf.write(f"{path}.wav", wav.cpu().numpy()[0], sample_rate)
+
+
+def sequential_baseline(model, input_path, output_path, quantity):
+    """The previous loop of audiogen_v2, with the stand-in model and writer."""
+    for category in sorted(os.listdir(input_path)):
+        category_gen_path = os.path.join(output_path, category)
+        os.makedirs(category_gen_path, exist_ok=True)
+        sample_cat_path = os.path.join(input_path, category)
+        while len(fnmatch.filter(os.listdir(category_gen_path), "*.wav")) < quantity:
+            for _, prompt_waveform, prompt_sample_rate in load_prompts(sample_cat_path):
+                model.set_generation_params(**GENERATION_PARAMS)
+                output = model.generate_continuation(prompt_waveform[None], prompt_sample_rate, [DESCRIPTION])
+                for idx, one_wav in enumerate(output):
+                    write_wav(os.path.join(category_gen_path, f"{idx}-{time.time_ns()}"), one_wav, model.sample_rate)
+                if len(fnmatch.filter(os.listdir(category_gen_path), "*.wav")) >= quantity:
+                    break
+
+
+def count_wavs(output_path):
+    return {category: len(fnmatch.filter(os.listdir(os.path.join(output_path, category)), "*.wav"))
+            for category in CATEGORIES}
+
+
+def main():
+    torch.set_num_threads(1)
+    work = tempfile.mkdtemp()
+    try:
+        input_path = os.path.join(work, "prompts")
+        for category in CATEGORIES:
+            os.makedirs(os.path.join(input_path, category))
+            for file_name in os.listdir(AUDIO_FOLDER):
+                if file_name.endswith(".wav"):
+                    shutil.copy(os.path.join(AUDIO_FOLDER, file_name), os.path.join(input_path, category))
+        model = TinyAudioGen()
+        model.set_generation_params(**GENERATION_PARAMS)
+        total = QUANTITY * len(CATEGORIES)
+        print(f"{total} clips of {GENERATION_PARAMS['duration']} s, {len(CATEGORIES)} categories")
+
+        output_path = os.path.join(work, "sequential")
+        start = time.perf_counter()
+        sequential_baseline(model, input_path, output_path, QUANTITY)
+        baseline_rate = total / (time.perf_counter() - start)
+        print(f"one prompt per call: {baseline_rate:7.2f} clips/s")
+
+        for batch_size in BATCH_SIZES:
+            output_path = os.path.join(work, f"batch_{batch_size}")
+            start = time.perf_counter()
+            gen_audios_per_category(QUANTITY, model, batch_size, input_path, output_path, write_wav)
+            rate = total / (time.perf_counter() - start)
+            assert count_wavs(output_path) == {category: QUANTITY for category in CATEGORIES}
+            print(f"batches of {batch_size:2d}:      {rate:7.2f} clips/s, {rate / baseline_rate:4.1f}x")
+
+        output_path = os.path.join(work, "resumed")
+        gen_audios_per_category(QUANTITY // 2, model, BATCH_SIZES[-1], input_path, output_path, write_wav)
+        generated = gen_audios_per_category(QUANTITY, model, BATCH_SIZES[-1], input_path, output_path, write_wav)
+        print(f"resumed run generated {generated}, folders hold {count_wavs(output_path)}")
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
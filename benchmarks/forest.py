@@ -0,0 +1,83 @@
+"""Compiled RandomForest against the pickled scikit-learn forest, at batch sizes 1 to 1024.
+
+Inputs are the flattened MFCCs of data/input_data/audio plus random rows with the same scale.
+The reference probabilities are the per-tree normalised leaf values averaged in tree order,
+which is what scikit-learn returned for this model when it was trained. Releases from 1.4 on
+no longer normalise the leaf counts stored in older pickles, so their predict_proba is also
+shown for comparison.
+
+Run from the repository root:
+
+    python -m benchmarks.forest
+"""
+import os
+import pickle
+import time
+import warnings
+
+import numpy as np
+
+from api.ml_logic.compiled_forest import CompiledForest
+from api.ml_logic.features import AudioFeatures
+
+AUDIO_FOLDER = "./data/input_data/audio"
+PICKLE_PATH = "Forest_5_98.pkl"
+COMPILED_PATH = "Forest_5_98.npz"
+BATCH_SIZES = [1, 4, 16, 64, 256, 1024]
+MIN_SECONDS = 0.5
+
+
+def inputs(rows):
+    clips = [AudioFeatures(os.path.join(AUDIO_FOLDER, f)).mfcc.reshape(-1)
+             for f in sorted(os.listdir(AUDIO_FOLDER)) if f.endswith(".wav")]
+    clips = np.array(clips)
+    rng = np.random.default_rng(0)
+    random_rows = rng.normal(clips.mean(), clips.std(), (rows - len(clips), clips.shape[1]))
+    return np.concatenate([clips, random_rows])
+
+
+def normalised_reference(forest, X):
+    proba = np.zeros((len(X), len(forest.classes_)))
+    for estimator in forest.estimators_:
+        tree_proba = estimator.predict_proba(X)
+        normalizer = tree_proba.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        proba += tree_proba / normalizer
+    return proba / len(forest.estimators_)
+
+
+def rows_per_second(predict_proba, X):
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_SECONDS:
+        predict_proba(X)
+        calls += 1
+    elapsed = time.perf_counter() - start
+    return calls * len(X) / elapsed, elapsed / calls * 1000
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    with open(PICKLE_PATH, "rb") as file:
+        forest = pickle.load(file)
+    start = time.perf_counter()
+    compiled = CompiledForest.load(COMPILED_PATH)
+    print(f"loaded {COMPILED_PATH} without unpickling in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    X = inputs(max(BATCH_SIZES))
+    reference = normalised_reference(forest, X)
+    proba = compiled.predict_proba(X)
+    print(f"max |compiled - reference| = {np.abs(proba - reference).max():.2e}, "
+          f"same predictions: {(proba.argmax(1) == reference.argmax(1)).mean():.2%}")
+    print(f"installed scikit-learn predict_proba agrees on {(forest.predict(X) == compiled.predict(X)).mean():.2%}")
+
+    for batch_size in BATCH_SIZES:
+        batch = X[:batch_size]
+        sklearn_rate, sklearn_ms = rows_per_second(forest.predict_proba, batch)
+        compiled_rate, compiled_ms = rows_per_second(compiled.predict_proba, batch)
+        print(f"batch {batch_size:5d}: scikit-learn {sklearn_ms:8.2f} ms ({sklearn_rate:9.0f} rows/s), "
+              f"compiled {compiled_ms:8.2f} ms ({compiled_rate:9.0f} rows/s), {compiled_rate / sklearn_rate:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Model compute the cry gate saves on a traffic sample.
+
+Every clip is decoded and resampled as an upload is, then gated with the gate settings. For
+every clip the gate rejects, the report counts the work it skips: the VGG16 spectrogram and
+forest MFCCs, plus a VGG16 and a forest predict call, timed on the clip when the models load.
+
+--data takes a folder of recordings sampled from production traffic, searched recursively.
+Without it, the sample is the cries of data/input_data/audio plus as many generated non-cry
+recordings: silence, quiet room tone, loud hiss and a short knock.
+
+Run from the repository root:
+
+    python -m benchmarks.gate --data traffic_sample
+"""
+import argparse
+import io
+import os
+import time
+from collections import Counter
+
+import numpy as np
+import soundfile as sf
+
+from api.apps.pages import forest, vgg16
+from api.apps.pages.services import gate_uploads
+from api.core.configurations import audio_settings, gate_settings
+from api.core.models import model_registry
+from api.ml_logic.features import AudioFeatures
+
+AUDIO_FOLDER = "./data/input_data/audio"
+GENERATED_SECONDS = 7
+GENERATED_RATE = 16000
+
+
+def traffic_sample(folder):
+    if folder is not None:
+        return [os.path.join(root, f) for root, _, files in sorted(os.walk(folder))
+                for f in sorted(files) if f.lower().endswith((".wav", ".mp3", ".ogg", ".flac"))]
+    rng = np.random.default_rng(0)
+    n = GENERATED_SECONDS * GENERATED_RATE
+    knock = np.zeros(n)
+    knock[n // 2:n // 2 + 800] = rng.standard_normal(800) * np.exp(-np.arange(800) / 100)
+    generated = {
+        "silence": np.zeros(n),
+        "room_tone": rng.standard_normal(n) * 10 ** (-60 / 20),
+        "hiss": rng.standard_normal(n) * 0.1,
+        "knock": knock,
+    }
+    clips = [os.path.join(AUDIO_FOLDER, f) for f in sorted(os.listdir(AUDIO_FOLDER)) if f.endswith(".wav")]
+    for name, y in generated.items():
+        buffer = io.BytesIO()
+        sf.write(buffer, y.astype(np.float32), GENERATED_RATE, format="WAV")
+        buffer.name = f"{name}.wav"
+        clips.append(buffer)
+    return clips
+
+
+def skippable_work(features, models):
+    """The spectrogram, MFCCs and predict calls of the loaded models, which a rejected upload skips, in ms."""
+    spectrogram_ms, spectrogram_array = elapsed_ms(vgg16.get_spectrogram_array, features)
+    mfcc_ms, features_array = elapsed_ms(forest.prepare_features, [features])
+    work_ms = spectrogram_ms + mfcc_ms
+    if models["vgg16"]:
+        work_ms += elapsed_ms(vgg16.predict_rows, spectrogram_array)[0]
+    if models["forest"]:
+        work_ms += elapsed_ms(forest.predict_rows, features_array)[0]
+    return work_ms
+
+
+def elapsed_ms(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", help="folder of recordings from production traffic")
+    args = parser.parse_args()
+
+    model_registry.start()
+    model_registry.wait()
+    models = {name: slot.state == "ready" for name, slot in model_registry.slots.items()}
+    print(f"gate {gate_settings.gate}, sample rate {audio_settings.sample_rate}")
+    print(f"models loaded: {models}")
+
+    clips = traffic_sample(args.data)
+    # Lazy imports and first-call caches are not part of the per-clip cost
+    skippable_work(AudioFeatures(clips[0], sample_rate=audio_settings.sample_rate), models)
+    if hasattr(clips[0], "seek"):
+        clips[0].seek(0)
+
+    reasons = Counter()
+    gate_ms = skipped_ms = total_ms = 0.0
+    predict_calls_skipped = 0
+    for clip in clips:
+        name = getattr(clip, "name", clip)
+        features = AudioFeatures(clip, sample_rate=audio_settings.sample_rate)
+        decode_ms, _ = elapsed_ms(lambda: features.decoded)
+        ms, (no_cry,) = elapsed_ms(gate_uploads, [features])
+        gate_ms += ms
+        clip_ms = skippable_work(features, models)
+        total_ms += decode_ms + ms + clip_ms
+        reason = no_cry["reason"] if no_cry else "cry"
+        reasons[reason] += 1
+        if no_cry:
+            skipped_ms += clip_ms
+            predict_calls_skipped += sum(models.values())
+        print(f"  {os.path.basename(name)[:40]:40s} {reason:10s} gate {ms:6.2f} ms, skipped work {clip_ms if no_cry else 0.0:8.2f} ms")
+
+    print(f"{len(clips)} clips: " + ", ".join(f"{count} {reason}" for reason, count in sorted(reasons.items())))
+    print(f"gate: {gate_ms / len(clips):.2f} ms per clip")
+    print(f"skipped: {predict_calls_skipped} predict calls and {skipped_ms:.1f} ms of spectrogram, MFCC"
+          f"{' and predict' if any(models.values()) else ''} work, {skipped_ms / total_ms:.0%} of the sample's compute")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Micro-benchmark of extract_mfcc against its original implementation.
+
+The largest difference between the two is printed too; tests/test_mfcc.py is the regression check.
+
+Run from the repository root:
+
+    python -m benchmarks.mfcc
+"""
+import os
+import time
+
+import numpy as np
+from scipy.fftpack import dct
+
+from api.ml_logic.preprpcessings import decode_audio, extract_mfcc
+
+AUDIO_FOLDER = "./data/input_data/audio"
+SAMPLE_RATES = [None, 8000, 16000, 22050, 44100]
+REPEATS = 20
+
+
+def legacy_extract_mfcc(y, sr, pre_emphasis=0.97, frame_size=0.025, frame_stride=0.01,
+                        NFFT=512, nfilt=40, num_ceps=12, fixed_length=100):
+    """extract_mfcc as it was before the filter banks and framing were cached, minus decoding."""
+    emphasized_signal = np.append(y[0], y[1:] - pre_emphasis * y[:-1])
+
+    frame_length, frame_step = frame_size * sr, frame_stride * sr
+    signal_length = len(emphasized_signal)
+    frame_length = int(round(frame_length))
+    frame_step = int(round(frame_step))
+    num_frames = int(np.ceil(float(np.abs(signal_length - frame_length)) / frame_step))
+
+    pad_signal_length = num_frames * frame_step + frame_length
+    z = np.zeros((pad_signal_length - signal_length))
+    pad_signal = np.append(emphasized_signal, z)
+
+    indices = np.tile(np.arange(0, frame_length), (num_frames, 1)) + np.tile(
+        np.arange(0, num_frames * frame_step, frame_step), (frame_length, 1)).T
+    frames = pad_signal[indices.astype(np.int32, copy=False)]
+    frames *= np.hamming(frame_length)
+
+    mag_frames = np.absolute(np.fft.rfft(frames, NFFT))
+    pow_frames = ((1.0 / NFFT) * ((mag_frames) ** 2))
+
+    low_freq_mel = 0
+    high_freq_mel = (2595 * np.log10(1 + (sr / 2) / 700))
+    mel_points = np.linspace(low_freq_mel, high_freq_mel, nfilt + 2)
+    hz_points = (700 * (10 ** (mel_points / 2595) - 1))
+    bin = np.floor((NFFT + 1) * hz_points / sr)
+
+    fbank = np.zeros((nfilt, int(np.floor(NFFT / 2 + 1))))
+    for m in range(1, nfilt + 1):
+        f_m_minus = int(bin[m - 1])
+        f_m = int(bin[m])
+        f_m_plus = int(bin[m + 1])
+        for k in range(f_m_minus, f_m):
+            fbank[m - 1, k] = (k - bin[m - 1]) / (bin[m] - bin[m - 1])
+        for k in range(f_m, f_m_plus):
+            fbank[m - 1, k] = (bin[m + 1] - k) / (bin[m + 1] - bin[m])
+
+    filter_banks = np.dot(pow_frames, fbank.T)
+    filter_banks = np.where(filter_banks == 0, np.finfo(float).eps, filter_banks)
+    filter_banks = 20 * np.log10(filter_banks)
+    mfcc = dct(filter_banks, type=2, axis=1, norm='ortho')[:, 1: (num_ceps + 1)]
+
+    if mfcc.shape[0] < fixed_length:
+        pad_width = fixed_length - mfcc.shape[0]
+        mfcc = np.pad(mfcc, pad_width=((0, pad_width), (0, 0)), mode='constant')
+    else:
+        mfcc = mfcc[:fixed_length]
+    return mfcc
+
+
+def time_it(function, *args, **kwargs):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def main():
+    for filename in sorted(os.listdir(AUDIO_FOLDER)):
+        if not filename.endswith(".wav"):
+            continue
+        path = os.path.join(AUDIO_FOLDER, filename)
+        print(filename)
+        difference = 0.0
+        for sample_rate in SAMPLE_RATES:
+            audio = decode_audio(path, sample_rate=sample_rate)
+            difference = max(difference, np.abs(extract_mfcc(audio) - legacy_extract_mfcc(audio.y, audio.sr)).max())
+
+        # Decode once so that only the feature computation is timed
+        audio = decode_audio(path)
+        old_ms = time_it(legacy_extract_mfcc, audio.y, audio.sr)
+        new_ms = time_it(extract_mfcc, audio)
+        print(f"  max difference {difference:.1e} at sample rates {SAMPLE_RATES}")
+        print(f"  legacy: {old_ms:7.3f} ms  cached: {new_ms:7.3f} ms ({old_ms / new_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Cost of resampling uploads to the canonical rate, from the rates phones and browsers record at.
+
+For every input rate, a 7 s clip made from the recordings of data/input_data/audio is
+resampled to audio.sample_rate with:
+- soxr: librosa's default resampler, which preprpcessings.resample_audio uses,
+- poly: scipy.signal.resample_poly, which designs its FIR filter on every call,
+- poly cached: resample_poly with that filter designed once per rate pair.
+The last columns time the VGG16 spectrogram (trim, STFT, dB) and extract_mfcc at the input rate,
+then at the canonical rate including the resampling, since their work scales with the rate.
+
+Run from the repository root:
+
+    python -m benchmarks.resampling
+"""
+import os
+import time
+from functools import lru_cache
+from math import gcd
+
+import librosa
+import numpy as np
+from scipy.signal import firwin, resample_poly
+
+from api.core.constants import AUDIO_DEFAULTS
+from api.ml_logic.preprpcessings import (
+    DecodedAudio, decode_audio, resample_audio, load_audio, compute_spectrogram_db, extract_mfcc
+)
+
+AUDIO_FOLDER = "./data/input_data/audio"
+SAMPLE_RATES = [8000, 11025, 16000, 22050, 24000, 32000, 44100, 48000]
+SECONDS = 7
+MIN_SECONDS = 0.5
+
+
+@lru_cache(maxsize=None)
+def polyphase_filter(orig_sr, target_sr):
+    """
+    The factors and the Kaiser-windowed low-pass filter resample_poly designs by default. It is
+    left unscaled: resample_poly multiplies any filter it is given by up, as it does its own.
+    """
+    divisor = gcd(orig_sr, target_sr)
+    up, down = target_sr // divisor, orig_sr // divisor
+    max_rate = max(up, down)
+    return up, down, firwin(20 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0)).astype(np.float32)
+
+
+def poly(y, orig_sr, target_sr):
+    divisor = gcd(orig_sr, target_sr)
+    return resample_poly(y, target_sr // divisor, orig_sr // divisor)
+
+
+def poly_cached(y, orig_sr, target_sr):
+    up, down, h = polyphase_filter(orig_sr, target_sr)
+    return resample_poly(y, up, down, window=h)
+
+
+def per_call_ms(func):
+    func()
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_SECONDS:
+        func()
+        calls += 1
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def features(audio):
+    compute_spectrogram_db(load_audio(audio))
+    extract_mfcc(audio)
+
+
+def main():
+    target_sr = AUDIO_DEFAULTS["sample_rate"]
+    files = sorted(os.path.join(AUDIO_FOLDER, f) for f in os.listdir(AUDIO_FOLDER) if f.endswith(".wav"))
+    source = decode_audio(files[0])
+    print(f"{SECONDS} s clips to {target_sr} Hz, ms per clip")
+    print(f"{'input rate':>10s} {'soxr':>7s} {'poly':>7s} {'poly cached':>11s} {'features at input':>17s} {'resample+features':>17s}")
+    for sr in SAMPLE_RATES:
+        if sr == target_sr:
+            continue
+        y = librosa.resample(source.y, orig_sr=source.sr, target_sr=sr)
+        y = np.resize(y, SECONDS * sr)
+        audio = DecodedAudio(y, sr)
+        row = [
+            per_call_ms(lambda: resample_audio(audio, target_sr)),
+            per_call_ms(lambda: poly(y, sr, target_sr)),
+            per_call_ms(lambda: poly_cached(y, sr, target_sr)),
+            per_call_ms(lambda: features(audio)),
+            per_call_ms(lambda: features(resample_audio(audio, target_sr))),
+        ]
+        print(f"{sr:10d} {row[0]:7.2f} {row[1]:7.2f} {row[2]:11.2f} {row[3]:17.2f} {row[4]:17.2f}")
+
+
+if __name__ == "__main__":
+    main()
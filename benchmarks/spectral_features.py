@@ -0,0 +1,82 @@
+"""Summary features from one STFT against one librosa call per feature.
+
+The reference is the previous testing/feature_extractor.extract_features: every spectral
+feature recomputes the STFT from the signal, and mfcc recomputes the mel spectrogram. The
+engine computes them once per clip, or once per batch of zero-padded clips of up to
+PADDED_BATCH_FRAMES frames, shown for clips of 1, 3 and 7 seconds cut from data/input_data/audio.
+
+Run from the repository root:
+
+    python -m benchmarks.spectral_features
+"""
+import os
+import time
+import warnings
+
+import librosa
+import numpy as np
+
+from api.ml_logic.spectral_features import FEATURE_NAMES, batch_spectral_features
+
+AUDIO_FOLDER = "./data/input_data/audio"
+CLIPS = 32
+PADDED_BATCH_FRAMES = 1024
+DURATIONS = [1.0, 3.0, 7.0]
+
+
+def per_feature_reference(y, sr):
+    return [
+        np.mean(np.abs(y)),
+        np.mean(librosa.feature.rms(y=y)),
+        np.mean(librosa.feature.zero_crossing_rate(y)),
+        np.mean(np.abs(librosa.stft(y))),
+        np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)),
+        np.mean(librosa.feature.spectral_bandwidth(y=y, sr=sr)),
+        np.mean(librosa.feature.spectral_contrast(y=y, sr=sr)),
+        np.mean(librosa.feature.melspectrogram(y=y, sr=sr)),
+        *np.mean(librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13), axis=1),
+    ]
+
+
+def clips_per_second(func):
+    start = time.perf_counter()
+    result = func()
+    return result, CLIPS / (time.perf_counter() - start)
+
+
+def max_relative_error(values, reference):
+    return float((np.abs(values - reference) / np.maximum(np.abs(reference), 1e-12)).max())
+
+
+def main():
+    warnings.filterwarnings("ignore")
+    # librosa compiles some of its functions on the first call
+    per_feature_reference(np.zeros(22050, dtype=np.float32), 22050)
+    files = sorted(os.path.join(AUDIO_FOLDER, f) for f in os.listdir(AUDIO_FOLDER) if f.endswith(".wav"))
+    loaded = [librosa.load(file) for file in files]
+    sr = loaded[0][1]
+    rng = np.random.default_rng(0)
+
+    for duration in DURATIONS:
+        # Clips of 80 to 100% of the duration, so batches hold padded clips
+        signals = []
+        for i in range(CLIPS):
+            y = loaded[i % len(loaded)][0]
+            length = min(len(y), int(duration * sr * rng.uniform(0.8, 1.0)))
+            offset = rng.integers(0, len(y) - length + 1)
+            signals.append(y[offset:offset + length])
+        print(f"{CLIPS} clips of up to {duration:.0f} s, {len(FEATURE_NAMES)} features")
+
+        reference, reference_rate = clips_per_second(
+            lambda: np.array([per_feature_reference(y, sr) for y in signals], dtype=np.float64))
+        print(f"  one librosa call per feature: {reference_rate:7.2f} clips/s")
+        single, single_rate = clips_per_second(lambda: batch_spectral_features(signals, sr))
+        print(f"  one STFT per clip:            {single_rate:7.2f} clips/s, {single_rate / reference_rate:4.1f}x, "
+              f"max relative error {max_relative_error(single, reference):.1e}")
+        batched, rate = clips_per_second(lambda: batch_spectral_features(signals, sr, PADDED_BATCH_FRAMES))
+        print(f"  padded batches:               {rate:7.2f} clips/s, {rate / reference_rate:4.1f}x, "
+              f"max relative error {max_relative_error(batched, reference):.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark the NumPy spectrogram renderer against the original matplotlib figure.
+
+Run from the repository root:
+
+    python -m benchmarks.spectrogram
+"""
+import io
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from api.ml_logic.preprpcessings import decode_audio, load_audio, get_spectrogram
+
+AUDIO_FOLDER = "./data/input_data/audio"
+REPEATS = 10
+
+
+def matplotlib_spectrogram(y):
+    """The figure-based renderer that the VGG16 training spectrograms were produced with."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import librosa.display
+
+    plt.figure(figsize=(10, 6))
+    librosa.display.specshow(
+        librosa.amplitude_to_db(np.abs(librosa.stft(y)), ref=np.max),
+        y_axis="log",
+        x_axis="time"
+    )
+    plt.colorbar(format="%+2.0f dB")
+    plt.title("Spectrogram")
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png')
+    plt.close()
+    buf.seek(0)
+    return Image.open(buf).convert("RGB")
+
+
+def time_it(function, *args, **kwargs):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def main():
+    for filename in sorted(os.listdir(AUDIO_FOLDER)):
+        if not filename.endswith(".wav"):
+            continue
+        y_clean = load_audio(decode_audio(os.path.join(AUDIO_FOLDER, filename)))
+
+        reference = np.asarray(matplotlib_spectrogram(y_clean).resize((224, 224)), dtype=np.float32)
+        rendered = np.asarray(get_spectrogram(y_clean, size=(224, 224)), dtype=np.float32)
+        error = np.abs(reference - rendered)
+
+        old_ms = time_it(lambda y: matplotlib_spectrogram(y).resize((224, 224)), y_clean)
+        new_ms = time_it(get_spectrogram, y_clean, size=(224, 224))
+        raw_ms = time_it(get_spectrogram, y_clean, size=(224, 224), parity=False)
+
+        print(filename)
+        print(f"  matplotlib: {old_ms:8.2f} ms")
+        print(f"  parity:     {new_ms:8.2f} ms ({old_ms / new_ms:.1f}x)")
+        print(f"  no parity:  {raw_ms:8.2f} ms ({old_ms / raw_ms:.1f}x)")
+        print(f"  224x224 parity error: mean {error.mean():.2f}, p99 {np.percentile(error, 99):.1f} (0-255)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""How many concurrent live streams one CPU core can sustain.
+
+A synthetic stream alternates the clips of data/input_data/audio with stretches of low-level
+noise and is pushed through CryStream in 100 ms messages. Every window that onset detection
+flags is turned into the model input (224x224 spectrogram for VGG16, MFCCs for the forest).
+Model inference itself is excluded since it depends on the backend and is shared through
+batching. Streams per core is the audio duration divided by the CPU time spent on it.
+
+Run from the repository root:
+
+    python -m benchmarks.streaming
+"""
+import os
+import time
+
+import numpy as np
+
+from api.core.constants import STREAMING_DEFAULTS
+from api.ml_logic.features import AudioFeatures
+from api.ml_logic.preprpcessings import decode_audio
+from api.ml_logic.streaming import CryStream
+
+AUDIO_FOLDER = "./data/input_data/audio"
+SAMPLE_RATE = 16000
+MESSAGE_SECONDS = 0.1
+SILENCE_SECONDS = 10.0
+REPEATS = 5
+
+
+def build_stream():
+    rng = np.random.default_rng(0)
+    parts = []
+    for filename in sorted(os.listdir(AUDIO_FOLDER)):
+        if filename.endswith(".wav"):
+            parts.append(rng.normal(0, 0.001, int(SILENCE_SECONDS * SAMPLE_RATE)).astype(np.float32))
+            parts.append(decode_audio(os.path.join(AUDIO_FOLDER, filename), sample_rate=SAMPLE_RATE).y)
+    return np.concatenate(parts * REPEATS)
+
+
+def run(signal, prepare):
+    stream = CryStream(SAMPLE_RATE, **STREAMING_DEFAULTS)
+    step = int(MESSAGE_SECONDS * SAMPLE_RATE)
+    classified = 0
+    start = time.process_time()
+    for offset in range(0, len(signal), step):
+        if stream.push(signal[offset:offset + step]):
+            prepare(AudioFeatures.from_signal(stream.window(), SAMPLE_RATE))
+            classified += 1
+    return time.process_time() - start, classified
+
+
+def main():
+    signal = build_stream()
+    audio_seconds = len(signal) / SAMPLE_RATE
+    models = {
+        "onset detection only": lambda features: None,
+        "vgg16 input": lambda features: np.asarray(features.spectrogram((224, 224)), dtype=np.float32),
+        "forest input": lambda features: features.mfcc,
+    }
+    print(f"stream: {audio_seconds:.0f} s of audio in {MESSAGE_SECONDS * 1000:.0f} ms messages")
+    for name, prepare in models.items():
+        cpu_seconds, classified = run(signal, prepare)
+        print(f"  {name:22s} {classified:4d} windows classified, "
+              f"{cpu_seconds:6.2f} s CPU -> {audio_seconds / cpu_seconds:8.0f} streams per core")
+
+
+if __name__ == "__main__":
+    main()
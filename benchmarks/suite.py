@@ -0,0 +1,236 @@
+"""Reproducible benchmark suite: preprocessing micro-benchmarks and an in-process load test.
+
+Micro-benchmarks time every preprocessing function on each clip of data/input_data/audio, on
+the signal resampled to audio.sample_rate like the served pipeline does.
+The load test posts those clips to /vgg16/ and /forest/ through the ASGI app in this process,
+at several concurrency levels, with the prediction cache off so every request runs the full
+pipeline. Responses are counted by status code: at high concurrency the executor queues may
+reject requests with a 503, which is expected backpressure rather than a failure. Models are
+loaded the way the app loads them; an endpoint whose model cannot be loaded is skipped and
+reported as such.
+
+Every result has throughput, p50/p95/p99 latency in ms and the peak RSS seen while it ran. The
+results are saved as JSON and two runs can be compared; the comparison exits with status 1 when
+a p50 latency or a throughput regressed by more than --threshold.
+
+Run from the repository root (the load test needs api/core/configurations.yaml):
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json
+    python -m benchmarks.suite --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from api.core.configurations import audio_settings
+from api.core.metrics import process_rss_bytes
+from api.ml_logic.features import AudioFeatures
+from api.ml_logic.preprpcessings import (
+    decode_audio, resample_audio, load_audio, compute_spectrogram_db, render_spectrogram, get_spectrogram,
+    extract_mfcc
+)
+
+AUDIO_FOLDER = "./data/input_data/audio"
+MIN_SECONDS = 1.0
+LOAD_REQUESTS = 32
+CONCURRENCY = [1, 4, 16]
+ENDPOINTS = {"/vgg16/": "vgg16", "/forest/": "forest"}
+
+
+class PeakRss:
+    """Samples the process RSS in a background thread while a benchmark runs."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = process_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, process_rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, process_rss_bytes())
+
+
+def summarize(latencies, elapsed, peak_rss, unit="calls"):
+    latencies = np.array(latencies) * 1000
+    return {
+        f"{unit}_per_second": round(len(latencies) / elapsed, 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "samples": len(latencies),
+        "peak_rss_mb": round(peak_rss / 1024 / 1024, 1),
+    }
+
+
+def clip_paths():
+    return [os.path.join(AUDIO_FOLDER, f) for f in sorted(os.listdir(AUDIO_FOLDER)) if f.endswith(".wav")]
+
+
+def time_function(func, inputs):
+    """Calls func on every input, round after round, for at least MIN_SECONDS."""
+    func(inputs[0])
+    latencies = []
+    with PeakRss() as rss:
+        start = time.perf_counter()
+        while time.perf_counter() - start < MIN_SECONDS:
+            for item in inputs:
+                call_start = time.perf_counter()
+                func(item)
+                latencies.append(time.perf_counter() - call_start)
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, rss.peak)
+
+
+def micro_benchmarks():
+    from api.apps.pages.services import image_to_base64
+    paths = clip_paths()
+    sample_rate = audio_settings.sample_rate
+    decoded = [decode_audio(path) for path in paths]
+    resampled = [resample_audio(audio, sample_rate) for audio in decoded]
+    trimmed = [load_audio(audio) for audio in resampled]
+    spectrograms_db = [compute_spectrogram_db(y) for y in trimmed]
+    figures = [get_spectrogram(y) for y in trimmed]
+
+    def full_pipeline(path):
+        features = AudioFeatures(path, sample_rate=sample_rate)
+        features.spectrogram((224, 224))
+        return features.mfcc
+
+    cases = {
+        "decode_audio": (decode_audio, paths),
+        "resample_audio": (lambda audio: resample_audio(audio, sample_rate), decoded),
+        "load_audio": (load_audio, resampled),
+        "compute_spectrogram_db": (compute_spectrogram_db, trimmed),
+        "render_spectrogram": (render_spectrogram, spectrograms_db),
+        "resize_224": (lambda figure: figure.resize((224, 224)), figures),
+        "extract_mfcc": (extract_mfcc, resampled),
+        "image_to_base64": (image_to_base64, figures),
+        "full_pipeline": (full_pipeline, paths),
+    }
+    results = {}
+    for name, (func, inputs) in cases.items():
+        results[name] = time_function(func, inputs)
+        print(f"  {name:24s} {results[name]['p50_ms']:9.2f} ms p50 {results[name]['p99_ms']:9.2f} ms p99")
+    return results
+
+
+async def load_test():
+    import httpx
+    import main
+    from api.core.cache import prediction_cache
+    from api.core.models import model_registry
+
+    prediction_cache.max_entries = 0
+    model_registry.start()
+    model_registry.wait()
+    contents = [open(path, "rb").read() for path in clip_paths()]
+
+    results = {}
+    async with httpx.AsyncClient(app=main.app, base_url="http://benchmark", timeout=None) as client:
+        for endpoint, model in ENDPOINTS.items():
+            slot = model_registry.slots[model]
+            if slot.state != "ready":
+                results[endpoint] = {"skipped": f"{model} model not loaded: {slot.error}"}
+                print(f"  {endpoint:10s} skipped, {model} model not loaded")
+                continue
+            for concurrency in CONCURRENCY:
+                latencies, status_codes = [], Counter()
+
+                async def worker(index):
+                    for request in range(index, LOAD_REQUESTS, concurrency):
+                        content = contents[request % len(contents)]
+                        start = time.perf_counter()
+                        response = await client.post(endpoint, files={"file": ("clip.wav", content, "audio/wav")})
+                        latencies.append(time.perf_counter() - start)
+                        status_codes[str(response.status_code)] += 1
+
+                with PeakRss() as rss:
+                    start = time.perf_counter()
+                    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+                    elapsed = time.perf_counter() - start
+                key = f"{endpoint} concurrency={concurrency}"
+                results[key] = {**summarize(latencies, elapsed, rss.peak, unit="requests"), "status_codes": dict(status_codes)}
+                print(f"  {key:30s} {results[key]['requests_per_second']:7.2f} req/s "
+                      f"p50 {results[key]['p50_ms']:8.1f} ms p99 {results[key]['p99_ms']:8.1f} ms")
+    return results
+
+
+def run_metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(old_path, new_path, threshold):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    regressions = 0
+    for section in ("micro", "load"):
+        for name, after in new.get(section, {}).items():
+            before = old.get(section, {}).get(name)
+            if before is None or "p50_ms" not in before or "p50_ms" not in after:
+                continue
+            rate = next(key for key in after if key.endswith("_per_second"))
+            latency_change = after["p50_ms"] / before["p50_ms"] - 1
+            rate_change = after[rate] / before[rate] - 1
+            regressed = latency_change > threshold or rate_change < -threshold
+            regressions += regressed
+            print(f"  {'REGRESSION ' if regressed else '           '}{name:34s} p50 {before['p50_ms']:9.2f} -> "
+                  f"{after['p50_ms']:9.2f} ms ({latency_change:+7.1%}), throughput {rate_change:+7.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--skip-load", action="store_true", help="only run the micro-benchmarks")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        raise SystemExit(1 if compare(*args.compare, args.threshold) else 0)
+
+    results = {"meta": run_metadata()}
+    print("micro-benchmarks")
+    results["micro"] = micro_benchmarks()
+    if not args.skip_load:
+        print("load test")
+        results["load"] = asyncio.run(load_test())
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Peak memory per upload of the streaming ingestion against the original whole-file read.
+
+Each path ingests the same synthetic WAV through a starlette UploadFile and decodes it. Peak
+allocations are measured with tracemalloc, which includes NumPy buffers, for one upload at a
+time and for several concurrent uploads.
+
+Run from the repository root:
+
+    python -m benchmarks.upload_memory
+"""
+import asyncio
+import base64
+import tempfile
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+import soundfile as sf
+from starlette.datastructures import UploadFile
+
+from api.apps.pages.services import read_audio_features
+from api.ml_logic.preprpcessings import decode_audio
+
+SAMPLE_RATE = 44100
+DURATION_SECONDS = 55
+CONCURRENCY = [1, 4, 16]
+
+
+def make_upload(content: bytes) -> UploadFile:
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(content)
+    spooled.seek(0)
+    return UploadFile(filename="cry.wav", file=spooled, content_type="audio/wav")
+
+
+async def whole_file_ingest(file: UploadFile):
+    """get_audio_data before streaming ingestion, up to the decode."""
+    audio_content = await file.read()
+    audio_base64 = base64.b64encode(audio_content).decode("utf-8")
+    audio_content_b = BytesIO(audio_content)
+    decoded = decode_audio(BytesIO(audio_content))
+    return audio_base64, audio_content_b, decoded
+
+
+async def streaming_ingest(file: UploadFile):
+    features = await read_audio_features(file)
+    return features.decoded
+
+
+async def peak_megabytes(ingest, content, concurrency):
+    uploads = [make_upload(content) for _ in range(concurrency)]
+    tracemalloc.start()
+    results = await asyncio.gather(*[ingest(upload) for upload in uploads])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return peak / 1024 / 1024
+
+
+async def main():
+    signal = np.random.default_rng(0).uniform(-0.5, 0.5, SAMPLE_RATE * DURATION_SECONDS).astype("float32")
+    buffer = BytesIO()
+    sf.write(buffer, signal, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    content = buffer.getvalue()
+    print(f"upload: {len(content) / 1024 / 1024:.1f} MB WAV, {DURATION_SECONDS} s at {SAMPLE_RATE} Hz")
+
+    # Warm up imports and decoder state so they do not count towards the first measurement
+    await whole_file_ingest(make_upload(content))
+    await streaming_ingest(make_upload(content))
+
+    for concurrency in CONCURRENCY:
+        old = await peak_megabytes(whole_file_ingest, content, concurrency)
+        new = await peak_megabytes(streaming_ingest, content, concurrency)
+        print(f"concurrency {concurrency:2d}: whole file {old / concurrency:7.1f} MB/upload, "
+              f"streaming {new / concurrency:7.1f} MB/upload")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,25 +1,50 @@
-"""Generate Audio Module"""
+"""Generate Audio Module
+
+Generates synthetic cries per category by continuing prompts cut from the recordings of
+BABY_AUDIO_PATH:
+
+    python -m cry_generator.audiogen_v2 --quantity 100 --batch-size 8
+
+Prompts of the same sample rate and length are continued together, batch_size per
+generate_continuation call. A writer thread saves the clips while the model generates the next
+batch, and records every saved clip in a manifest, so an interrupted run resumes where it
+stopped instead of starting over.
+"""
+import argparse
+import json
+import logging
 import os
-import fnmatch
+import queue
+import re
+import threading
 import time
-import torchaudio
 
-from audiocraft.models import AudioGen
-from audiocraft.data.audio import audio_write
+BABY_AUDIO_PATH = "./donateacry_corpus_cleaned_and_updated_data"
+GENERATED_AUDIO_PATH = "generated_audios"
+MANIFEST_NAME = "manifest.json"
+MODEL_NAME = "facebook/audiogen-medium"
+DESCRIPTION = "baby crying"
+PROMPT_DURATION = 2
+GENERATION_PARAMS = {"use_sampling": True, "top_k": 250, "duration": 7}
+BATCH_SIZE = 8
+WRITE_QUEUE_SIZE = 64
+SAVE_MANIFEST_EVERY = 16
 
+logger = logging.getLogger(__name__)
 
-BABY_AUDIO_PATH = "./donateacry_corpus_cleaned_and_updated_data"
 
-model = AudioGen.get_pretrained("facebook/audiogen-medium")
-current_path = os.getcwd()
-descriptions = ["baby crying"]
-GENERATED_AUDIO_PATH = "generated_audios"
+def load_model(name: str = MODEL_NAME):
+    """Function loading the AudioGen model, with the generation parameters set once."""
+    from audiocraft.models import AudioGen
+    model = AudioGen.get_pretrained(name)
+    model.set_generation_params(**GENERATION_PARAMS)
+    return model
 
 
-def get_audio_files_length(path: str) -> int:
-    """Function count wav files."""
-    wav_files = fnmatch.filter(os.listdir(path), '*.wav')
-    return len(wav_files)
+def write_audio(path: str, wav, sample_rate: int) -> None:
+    """Function saving one generated clip, loudness normalized as before."""
+    from audiocraft.data.audio import audio_write
+    audio_write(path, wav.cpu(), sample_rate, strategy="loudness", loudness_compressor=True)
 
 
 def create_folder_if_not_exists(folder_name: str) -> None:
@@ -28,48 +53,188 @@ def create_folder_if_not_exists(folder_name: str) -> None:
         os.makedirs(folder_name)
 
 
-def gen_audios_per_category(category_quantity: int) -> None:
-    """Function generating audios."""
-    print("generated_audio_path", GENERATED_AUDIO_PATH)
-    create_folder_if_not_exists(GENERATED_AUDIO_PATH)
-    for category in os.listdir(BABY_AUDIO_PATH):
-        print("category:", category)
-        category_gen_path = os.path.join(
-            current_path, GENERATED_AUDIO_PATH, category)
-        create_folder_if_not_exists(category_gen_path)
-        sample_cat_path = os.path.join(current_path, BABY_AUDIO_PATH, category)
-        while get_audio_files_length(category_gen_path) < category_quantity:
-            for file_name in os.listdir(sample_cat_path):
-                if file_name.endswith(".wav"):
-                    print("file_name:", file_name)
-                    audio_path = os.path.join(sample_cat_path, file_name)
-
-                    model.set_generation_params(
-                        use_sampling=True, top_k=250, duration=7)
-
-                    prompt_waveform, prompt_sample_rate = torchaudio.load(  # pylint: disable=maybe-no-member
-                        audio_path)
-
-                    prompt_duration = 2
-                    prompt_waveform = prompt_waveform[..., : int(
-                        prompt_duration * prompt_sample_rate)]
-
-                    output = model.generate_continuation(
-                        prompt_waveform,
-                        prompt_sample_rate,
-                        descriptions,
-                        progress=True,
-                    )
-                    for idx, one_wav in enumerate(output):
-                        audio_write(
-                            f'{category_gen_path}/{idx}-{time.time_ns()}',
-                            one_wav.cpu(),
-                            model.sample_rate,
-                            strategy="loudness",
-                            loudness_compressor=True,
-                        )
-                    if get_audio_files_length(category_gen_path) >= category_quantity:
-                        break
-
-
-gen_audios_per_category(100)
+def load_prompts(category_path: str) -> list:
+    """Function loading the first PROMPT_DURATION seconds of every wav of a category."""
+    import torchaudio
+    prompts = []
+    for file_name in sorted(os.listdir(category_path)):
+        if file_name.endswith(".wav"):
+            waveform, sample_rate = torchaudio.load(os.path.join(category_path, file_name))  # pylint: disable=maybe-no-member
+            prompts.append((file_name, waveform[..., : int(PROMPT_DURATION * sample_rate)], sample_rate))
+    return prompts
+
+
+class Manifest:
+    """Clips saved so far and the next prompt, per category, in <output>/manifest.json."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.categories = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.categories = json.load(f)
+        self._lock = threading.Lock()
+
+    def category(self, category: str) -> dict:
+        with self._lock:
+            return self.categories.setdefault(category, {"files": [], "next_prompt": 0})
+
+    def record(self, category: str, file_name: str) -> None:
+        with self._lock:
+            self.categories[category]["files"].append(file_name)
+
+    def adopt(self, category: str, folder: str) -> int:
+        """
+        Records the clips of folder missing from the manifest, saved before a crash stopped the
+        writer from saving it, and returns the index the next clip of category is named with.
+        """
+        pattern = re.compile(rf"^{re.escape(category)}-(\d+)$")
+        names = {os.path.splitext(file_name)[0] for file_name in os.listdir(folder)} if os.path.isdir(folder) else set()
+        with self._lock:
+            files = self.categories[category]["files"]
+            files.extend(sorted(name for name in names - set(files) if pattern.match(name)))
+            indices = [int(match.group(1)) for match in map(pattern.match, files) if match]
+        return max(indices, default=-1) + 1
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.dumps(self.categories, indent=1)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(self.path + ".tmp", self.path)
+
+
+class AudioWriter:
+    """Background thread saving generated clips and recording them in the manifest."""
+
+    def __init__(self, manifest: Manifest, sample_rate: int, write_fn=write_audio):
+        self.manifest = manifest
+        self.sample_rate = sample_rate
+        self.write_fn = write_fn
+        self.error = None
+        self._queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="audio-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, category: str, path: str, wav) -> None:
+        if self.error is not None:
+            raise self.error
+        self._queue.put((category, path, wav))
+
+    def _run(self) -> None:
+        written = 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            category, path, wav = item
+            if self.error is not None:
+                continue
+            try:
+                self.write_fn(path, wav, self.sample_rate)
+                self.manifest.record(category, os.path.basename(path))
+                written += 1
+                if written % SAVE_MANIFEST_EVERY == 0:
+                    self.manifest.save()
+            except Exception as e:  # pylint: disable=broad-except
+                self.error = e
+        self.manifest.save()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def stack_prompts(waveforms: list):
+    """Function stacking prompts of one shape into the batch tensor generate_continuation takes."""
+    import torch
+    return torch.stack(waveforms)
+
+
+def next_batch(prompts: list, start: int, size: int) -> list:
+    """
+    Function taking size prompts from start on, cycling, that share the sample rate and shape of the first.
+    A prompt can appear more than once: sampling continues it differently each time.
+    """
+    _, first, first_rate = prompts[start % len(prompts)]
+    batch = []
+    for offset in range(size * len(prompts)):
+        if len(batch) == size:
+            break
+        index = (start + offset) % len(prompts)
+        _, waveform, sample_rate = prompts[index]
+        if sample_rate == first_rate and waveform.shape == first.shape:
+            batch.append(index)
+    return batch
+
+
+def gen_audios_per_category(category_quantity: int, model=None, batch_size: int = BATCH_SIZE,
+                            input_path: str = BABY_AUDIO_PATH, output_path: str = GENERATED_AUDIO_PATH,
+                            write_fn=write_audio) -> dict:
+    """Function generating audios until every category has category_quantity of them; returns the clips generated per category."""
+    model = model or load_model()
+    logger.info("generated_audio_path %s", output_path)
+    create_folder_if_not_exists(output_path)
+    manifest = Manifest(os.path.join(output_path, MANIFEST_NAME))
+    writer = AudioWriter(manifest, model.sample_rate, write_fn)
+    generated = {}
+    try:
+        for category in sorted(os.listdir(input_path)):
+            sample_cat_path = os.path.join(input_path, category)
+            if not os.path.isdir(sample_cat_path):
+                continue
+            state = manifest.category(category)
+            category_gen_path = os.path.join(output_path, category)
+            # Clips are named after the highest index on disk, so none is overwritten on resume
+            index = manifest.adopt(category, category_gen_path)
+            count = len(state["files"])
+            logger.info("category: %s, %d of %d already generated", category, count, category_quantity)
+            if count >= category_quantity:
+                continue
+            prompts = load_prompts(sample_cat_path)
+            if not prompts:
+                continue
+            create_folder_if_not_exists(category_gen_path)
+            generated[category] = 0
+
+            while count < category_quantity:
+                indices = next_batch(prompts, state["next_prompt"], min(batch_size, category_quantity - count))
+                prompt_waveform = stack_prompts([prompts[i][1] for i in indices])
+                output = model.generate_continuation(
+                    prompt_waveform,
+                    prompts[indices[0]][2],
+                    [DESCRIPTION] * len(indices),
+                    progress=False,
+                )
+                for one_wav in output:
+                    writer.put(category, os.path.join(category_gen_path, f"{category}-{index:05d}"), one_wav)
+                    index += 1
+                    count += 1
+                state["next_prompt"] = (indices[-1] + 1) % len(prompts)
+                generated[category] += len(indices)
+    finally:
+        writer.close()
+    return generated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quantity", type=int, default=100, help="clips per category")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--input", default=BABY_AUDIO_PATH)
+    parser.add_argument("--output", default=GENERATED_AUDIO_PATH)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    start = time.perf_counter()
+    generated = gen_audios_per_category(args.quantity, batch_size=args.batch_size,
+                                        input_path=args.input, output_path=args.output)
+    total = sum(generated.values())
+    elapsed = time.perf_counter() - start
+    print(f"generated {total} clips in {elapsed:.1f} s ({total / elapsed if elapsed else 0.0:.2f} clips/s)")
+
+
+if __name__ == "__main__":
+    main()
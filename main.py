@@ -3,29 +3,24 @@ from fastapi import FastAPI
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from api.core.configurations import server_settings, security_settings
-from api.ml_logic.model import vgg16_model_load, forest_model_load
+from api.core.models import vgg16_model, forest_model, model_registry
 from api.apps.routers import apps_router
+from api.core.executors import shutdown_executors
+from api.core.metrics import MetricsMiddleware
+from api.apps.pages.vgg16 import vgg16_batcher
 import warnings
 from fastapi.staticfiles import StaticFiles
 
 warnings.filterwarnings("ignore", category=UserWarning)
 ALLOWED_HOSTS = ["*"]
-forest_model = None
-vgg16_model = None
 
 
 def get_vgg16_model():
-    if vgg16_model is not None:
-        return vgg16_model
-    else:
-        raise Exception("The model is not loaded yet!")
+    return vgg16_model.get()
 
 
 def get_forest_model():
-    if forest_model is not None:
-        return forest_model
-    else:
-        raise Exception("The model is not loaded yet!")
+    return forest_model.get()
 
 
 def middleware(server):
@@ -40,6 +35,8 @@ def middleware(server):
         allow_methods=["*"],
         allow_headers=["*"]
     )
+    # Added last so it is the outermost middleware and times the whole request
+    server.add_middleware(MetricsMiddleware)
 
 
 def include_routers(server):
@@ -63,12 +60,14 @@ app = start_application()
 
 @app.on_event("startup")
 async def startup():
-    global vgg16_model
-    global forest_model
-    vgg16_path = "VGG16_Baby_prod.h5"
-    forest_path = "Forest_5_98.pkl"
-    vgg16_model = await vgg16_model_load(vgg16_path)
-    forest_model = await forest_model_load(forest_path)
+    # Models load in background threads; /readyz reports when they can serve
+    model_registry.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    vgg16_batcher.close()
+    shutdown_executors()
 
 
 if __name__ == "__main__":
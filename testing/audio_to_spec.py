@@ -5,6 +5,13 @@ import os
 import matplotlib.pyplot as plt
 
 
+def spectrogram_path(clean_audio, spectrogram_folder):
+    # Extract the category from the clean audio path and store under spectrogram_<category>
+    category = os.path.basename(os.path.dirname(clean_audio))
+    return os.path.join(spectrogram_folder, f"spectrogram_{category}",
+                        f"{os.path.splitext(os.path.basename(clean_audio))[0]}.png")
+
+
 def audio_to_spec(clean_audio, spectrogram_folder):
     try:
         y, sr = librosa.load(clean_audio, sr=None)
@@ -15,45 +22,38 @@ def audio_to_spec(clean_audio, spectrogram_folder):
         plt.colorbar(format='%+2.0f dB')
         plt.title(f'Spectrogram of {os.path.basename(clean_audio)}')
 
-        # Extract the category from the clean audio path
-        category = os.path.basename(os.path.dirname(clean_audio))
-
-        # Create subfolder path based on the category
-        subfolder = f"spectrogram_{category}"
-        subfolder_path = os.path.join(spectrogram_folder, subfolder)
-        os.makedirs(subfolder_path, exist_ok=True)
-
-        # Save the spectrogram in the subfolder
-        spectrogram_path = os.path.join(subfolder_path,
-                                        f"{os.path.splitext(os.path.basename(clean_audio))[0]}.png")
-        plt.savefig(spectrogram_path)
+        # Save the spectrogram in the category subfolder
+        output_path = spectrogram_path(clean_audio, spectrogram_folder)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        plt.savefig(output_path)
         plt.close()
 
-        return spectrogram_path
+        return output_path
     except Exception as e:
         print(f"Error creating spectrogram for {clean_audio}: {e}")
         return None
 
 
-audio_folder = "clean_audio"
+if __name__ == "__main__":
+    audio_folder = "clean_audio"
 
-categories = [
-    "clean_belly_pain",
-    "clean_discomfort",
-    "clean_hungry",
-    "clean_tired",
-    "clean_burping"
-]
+    categories = [
+        "clean_belly_pain",
+        "clean_discomfort",
+        "clean_hungry",
+        "clean_tired",
+        "clean_burping"
+    ]
 
-spectrogram_folder = "spectrogram"
-os.makedirs(spectrogram_folder, exist_ok=True)
+    spectrogram_folder = "spectrogram"
+    os.makedirs(spectrogram_folder, exist_ok=True)
 
-for category in categories:
-    category_path = os.path.join(audio_folder, category)
+    for category in categories:
+        category_path = os.path.join(audio_folder, category)
 
-    for filename in os.listdir(category_path):
-        if not filename.endswith(".wav"):
-            continue
+        for filename in os.listdir(category_path):
+            if not filename.endswith(".wav"):
+                continue
 
-        file_path = os.path.join(category_path, filename)
-        audio_to_spec(file_path, spectrogram_folder)
+            file_path = os.path.join(category_path, filename)
+            audio_to_spec(file_path, spectrogram_folder)
@@ -1,7 +1,30 @@
+# Run from the repository root, so that the api package is importable: python -m testing.clean_audio
 import librosa
 import noisereduce as nr
 import os
 import soundfile as sf
+from api.ml_logic.cleaning import clean_batch
+
+
+# Mapping of raw categories to clean categories
+CATEGORY_MAPPING = {
+    "raw_belly_pain": "clean_belly_pain",
+    "raw_discomfort": "clean_discomfort",
+    "raw_hungry": "clean_hungry",
+    "raw_tired": "clean_tired",
+    "raw_burping": "clean_burping"
+}
+
+
+def cleaned_path(audio_file_path, cleaned_audio_folder):
+    # Extract the category from the original file path
+    category = os.path.basename(os.path.dirname(audio_file_path))
+
+    # Get the corresponding clean category
+    clean_category = CATEGORY_MAPPING.get(category, category)
+
+    return os.path.join(cleaned_audio_folder, clean_category,
+                        f"{os.path.splitext(os.path.basename(audio_file_path))[0]}_cleaned.wav")
 
 
 def clean_safe(audio_file_path, cleaned_audio_folder):
@@ -10,27 +33,9 @@ def clean_safe(audio_file_path, cleaned_audio_folder):
         y_denoised = nr.reduce_noise(y=y, sr=sr)
         y_trimmed, index = librosa.effects.trim(y_denoised, top_db=20)
 
-        # Extract the category from the original file path
-        category = os.path.basename(os.path.dirname(audio_file_path))
-
-        # Mapping of raw categories to clean categories
-        category_mapping = {
-            "raw_belly_pain": "clean_belly_pain",
-            "raw_discomfort": "clean_discomfort",
-            "raw_hungry": "clean_hungry",
-            "raw_tired": "clean_tired",
-            "raw_burping": "clean_burping"
-        }
-
-        # Get the corresponding clean category
-        clean_category = category_mapping.get(category, category)
-
-        subfolder_path = os.path.join(cleaned_audio_folder, clean_category)
-        os.makedirs(subfolder_path, exist_ok=True)
-
-        # Save the cleaned audio in the subfolder
-        cleaned_audio_path = os.path.join(subfolder_path,
-                                          f"{os.path.splitext(os.path.basename(audio_file_path))[0]}_cleaned.wav")
+        # Save the cleaned audio in the category subfolder
+        cleaned_audio_path = cleaned_path(audio_file_path, cleaned_audio_folder)
+        os.makedirs(os.path.dirname(cleaned_audio_path), exist_ok=True)
         sf.write(cleaned_audio_path, y_trimmed, sr)
 
         return cleaned_audio_path
@@ -39,25 +44,47 @@ def clean_safe(audio_file_path, cleaned_audio_folder):
         return None
 
 
-audio_folder = "raw_audio"
+def clean_files(audio_file_paths, cleaned_audio_folder):
+    """clean_safe for many files, denoised and trimmed together; returns the cleaned paths and trim indices."""
+    loaded, sources = [], []
+    for audio_file_path in audio_file_paths:
+        try:
+            loaded.append(librosa.load(audio_file_path, sr=None))
+            sources.append(audio_file_path)
+        except Exception as e:
+            print(f"Error processing {audio_file_path}: {e}")
+    if not loaded:
+        return [], {}
+
+    cleaned, indices = clean_batch([y for y, _ in loaded], [sr for _, sr in loaded])
+    cleaned_paths, trim_indices = [], {}
+    for audio_file_path, (_, sr), y_trimmed, index in zip(sources, loaded, cleaned, indices):
+        # Save the cleaned audio in the category subfolder
+        cleaned_audio_path = cleaned_path(audio_file_path, cleaned_audio_folder)
+        os.makedirs(os.path.dirname(cleaned_audio_path), exist_ok=True)
+        sf.write(cleaned_audio_path, y_trimmed, sr)
+        cleaned_paths.append(cleaned_audio_path)
+        trim_indices[audio_file_path] = index
+    return cleaned_paths, trim_indices
+
 
-categories = [
-    "raw_belly_pain",
-    "raw_discomfort",
-    "raw_hungry",
-    "raw_tired",
-    "raw_burping"
-]
+if __name__ == "__main__":
+    audio_folder = "raw_audio"
 
-clean_audio_folder = "clean_audio"
-os.makedirs(clean_audio_folder, exist_ok=True)
+    categories = [
+        "raw_belly_pain",
+        "raw_discomfort",
+        "raw_hungry",
+        "raw_tired",
+        "raw_burping"
+    ]
 
-for category in categories:
-    category_path = os.path.join(audio_folder, category)
+    clean_audio_folder = "clean_audio"
+    os.makedirs(clean_audio_folder, exist_ok=True)
 
-    for filename in os.listdir(category_path):
-        if not filename.endswith(".wav"):
-            continue
+    for category in categories:
+        category_path = os.path.join(audio_folder, category)
 
-        file_path = os.path.join(category_path, filename)
-        clean_safe(file_path, clean_audio_folder)
+        file_paths = [os.path.join(category_path, filename)
+                      for filename in os.listdir(category_path) if filename.endswith(".wav")]
+        clean_files(file_paths, clean_audio_folder)
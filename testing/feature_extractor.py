@@ -1,26 +1,19 @@
+# Run from the repository root, so that the api package is importable: python -m testing.feature_extractor
 import os
-import librosa.feature
-import numpy as np
+import librosa
 import pandas as pd
+from api.ml_logic.spectral_features import FEATURE_NAMES, extract_spectral_features, batch_spectral_features
 
 # Initializing an empty list to store extracted features
 features = []
 
 # Specifying the directory containing audio files
-audio_folder = "../data/input_data/audio/tests"
+audio_folder = "./data/input_data/audio/tests"
 
 # Defining the names of the features to be extracted
 feature_names = [
     "Audio_File",
-    "Amplitude_Envelope_Mean",
-    "RMS_Mean",
-    "ZCR_Mean",
-    "STFT_Mean",
-    "SC_Mean",
-    "SBAN_Mean",
-    "SCON_Mean",
-    "MelSpec",
-    *["MFCCs" + str(i) for i in range(1, 14)],
+    *FEATURE_NAMES,
     "Cry_Reason"
 ]
 
@@ -30,46 +23,34 @@ def extract_features(file):
     # Loading the audio file
     audio_signal, sampling_rate = librosa.load(file)
 
-    # Calculating the mean amplitude envelope
-    amp_env = np.mean(np.abs(audio_signal))
-    # Calculating the mean RMS (Root Mean Square) value
-    rms = np.mean(librosa.feature.rms(y=audio_signal))
-    # Calculating the mean Zero Crossing Rate
-    zcr = np.mean(librosa.feature.zero_crossing_rate(audio_signal))
-    # Calculating the mean of the STFT (Short Time Fourier Transform)
-    stft = np.abs(librosa.stft(audio_signal))
-    stft_mean = np.mean(stft)
-    # Calculating the mean spectral centroid
-    sc = np.mean(librosa.feature.spectral_centroid(y=audio_signal, sr=sampling_rate))
-    # Calculating the mean spectral contrast
-    scon = np.mean(librosa.feature.spectral_contrast(y=audio_signal, sr=sampling_rate))
-    # Calculating the mean spectral bandwidth
-    sban = np.mean(librosa.feature.spectral_bandwidth(y=audio_signal, sr=sampling_rate))
-    # Calculating the mean of the mel spectrogram
-    melspec = np.mean(librosa.feature.melspectrogram(y=audio_signal, sr=sampling_rate))
-    # Calculating the mean of the first 13 MFCCs (Mel Frequency Cepstral Coefficients)
-    mfccs = np.mean(librosa.feature.mfcc(y=audio_signal, sr=sampling_rate, n_mfcc=13), axis=1)
+    # Amplitude envelope, RMS, ZCR, STFT, spectral centroid, bandwidth and contrast, mel spectrogram
+    # and 13 MFCC means, all derived from a single STFT
+    return [file, *extract_spectral_features(audio_signal, sampling_rate)]
 
-    # Returning a list of extracted features
-    return [file, amp_env, rms, zcr, stft_mean, sc, sban, scon, melspec, *mfccs]
 
+# Function to extract the features of many audio files, computing the STFTs in batches
+def extract_features_batch(files):
+    # librosa.load resamples every file to the same rate, so they can share a batch
+    loaded = [librosa.load(file) for file in files]
+    rows = batch_spectral_features([audio_signal for audio_signal, _ in loaded], loaded[0][1])
+    return [[file, *row] for file, row in zip(files, rows)]
 
-# Iterating over each folder in the specified directory
-for folder in os.listdir(audio_folder):
-    folder_path = os.path.join(audio_folder, folder)
 
-    # Checking if the path is a directory
-    if os.path.isdir(folder_path):
-        # Iterating over each audio file in the folder
-        for audio_file in os.listdir(folder_path):
-            # Checking if the file extension is '.wav'
-            if audio_file.endswith(".wav"):
-                file_path = os.path.join(folder_path, audio_file)
-                # Extracting features and appending to the 'features' list along with the reason of cry (name of the subfolder)
-                features.append(extract_features(file_path) + [folder])
+if __name__ == "__main__":
+    # Iterating over each folder in the specified directory
+    for folder in os.listdir(audio_folder):
+        folder_path = os.path.join(audio_folder, folder)
 
-# Creating a DataFrame to hold all the extracted features with their respective column names
-features_df = pd.DataFrame(features, columns=feature_names)
+        # Checking if the path is a directory
+        if os.path.isdir(folder_path):
+            # Collecting the '.wav' files of the folder
+            file_paths = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".wav")]
+            # Extracting features and appending to the 'features' list along with the reason of cry (name of the subfolder)
+            if file_paths:
+                features.extend(row + [folder] for row in extract_features_batch(file_paths))
 
-# Saving the extracted features to a CSV file
-features_df.to_csv("../data/input_data/transformed/test_features_2.csv", index=False)
+    # Creating a DataFrame to hold all the extracted features with their respective column names
+    features_df = pd.DataFrame(features, columns=feature_names)
+
+    # Saving the extracted features to a CSV file
+    features_df.to_csv("./data/input_data/transformed/test_features_2.csv", index=False)
@@ -0,0 +1,250 @@
+"""
+Parallel, resumable dataset preprocessing.
+
+Runs the clean, spectrogram, feature and feature store stages of the training corpus across a
+process pool:
+
+    python -m testing.pipeline --raw raw_audio --clean clean_audio --spectrograms spectrogram \
+        --features features.csv --store feature_store --workers 8
+
+Each stage records the content hash of every input file and the stage parameters in a manifest,
+so a rerun only processes new or changed files. Feature rows are appended to the CSV as they
+finish, and every stage reports its throughput. The feature store (see
+api.ml_logic.feature_store) keeps the MFCCs, scalar features and 224x224 spectrograms that
+training loads, and reuses the rows of unchanged clips when it is rebuilt.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+from api.core.constants import CLASSES
+from api.ml_logic.feature_store import FeatureStore, FeatureStoreWriter, StoreEntry, file_hash
+from api.ml_logic.features import AudioFeatures
+from api.ml_logic.preprpcessings import decode_audio, compute_spectrogram_db, render_spectrogram
+from testing.audio_to_spec import spectrogram_path
+from testing.clean_audio import clean_safe, cleaned_path
+from testing.feature_extractor import extract_features, feature_names
+
+MANIFEST_NAME = "pipeline_manifest.json"
+SAVE_MANIFEST_EVERY = 25
+
+STAGE_PARAMS = {
+    "clean": {"noise_reduce": True, "top_db": 20},
+    "spectrogram": {"renderer": "numpy", "parity": True},
+    "features": {"feature_names": feature_names, "sample_rate": 22050},
+    "store": {"renderer": "numpy", "spectrogram_size": [224, 224], "mfcc": [100, 12]},
+}
+STAGES = ["clean", "spectrogram", "features", "store"]
+STORE_COLUMNS = {
+    "mfcc": ((100, 12), "float32"),
+    "scalars": ((len(feature_names) - 2,), "float32"),
+    "spectrogram": ((224, 224, 3), "uint8"),
+}
+
+
+def params_hash(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def list_wavs(folder):
+    """All .wav files one category subfolder deep, as the testing scripts expect."""
+    paths = []
+    for category in sorted(os.listdir(folder)):
+        category_path = os.path.join(folder, category)
+        if os.path.isdir(category_path):
+            paths.extend(os.path.join(category_path, f) for f in sorted(os.listdir(category_path)) if f.endswith(".wav"))
+    return paths
+
+
+def render_spectrogram_file(clean_audio, spectrogram_folder):
+    """Saves the spectrogram with the same renderer the API serves VGG16 with."""
+    try:
+        y, _ = decode_audio(clean_audio)
+        output_path = spectrogram_path(clean_audio, spectrogram_folder)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        Image.fromarray(render_spectrogram(compute_spectrogram_db(y))).save(output_path)
+        return output_path
+    except Exception as e:
+        print(f"Error creating spectrogram for {clean_audio}: {e}")
+        return None
+
+
+def feature_row(audio_file):
+    try:
+        return extract_features(audio_file) + [os.path.basename(os.path.dirname(audio_file))]
+    except Exception as e:
+        print(f"Error extracting features from {audio_file}: {e}")
+        return None
+
+
+def store_row(clean_audio):
+    """The model inputs the API would compute for the clip, plus the scalar features of the CSV."""
+    try:
+        features = AudioFeatures(clean_audio)
+        return clean_audio, {
+            "mfcc": features.mfcc,
+            "scalars": features.spectral_features.astype(np.float32),
+            "spectrogram": np.asarray(features.spectrogram((224, 224))),
+        }
+    except Exception as e:
+        print(f"Error storing features of {clean_audio}: {e}")
+        return None
+
+
+def report(stage, done, up_to_date, failed, start):
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed else 0.0
+    print(f"{stage}: {done} processed, {up_to_date} up to date, {failed} failed "
+          f"in {elapsed:.1f} s ({rate:.2f} files/s)")
+
+
+class Manifest:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_current(self, stage, source, source_hash, output):
+        entry = self.entries.get(stage, {}).get(source)
+        return (
+            entry is not None
+            and entry["hash"] == source_hash
+            and entry["params"] == params_hash(STAGE_PARAMS[stage])
+            and os.path.exists(output)
+        )
+
+    def record(self, stage, source, source_hash):
+        self.entries.setdefault(stage, {})[source] = {"hash": source_hash, "params": params_hash(STAGE_PARAMS[stage])}
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def run_stage(stage, sources, output_of, work, manifest, workers, on_result=None, hashes=None):
+    """Runs work(source) for every source whose output is missing or stale, and reports throughput."""
+    start = time.perf_counter()
+    hashes = hashes or {source: file_hash(source) for source in sources}
+    pending = [s for s in sources if not manifest.is_current(stage, s, hashes[s], output_of(s))]
+    done = failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(*work(source)): source for source in pending}
+        for future in as_completed(futures):
+            source = futures[future]
+            result = future.result()
+            if result is None:
+                failed += 1
+                continue
+            if on_result is not None:
+                on_result(result)
+            manifest.record(stage, source, hashes[source])
+            done += 1
+            if done % SAVE_MANIFEST_EVERY == 0:
+                manifest.save()
+    manifest.save()
+    report(stage, done, len(sources) - len(pending), failed, start)
+
+
+def run_features(sources, features_csv, manifest, workers):
+    hashes = {source: file_hash(source) for source in sources}
+    current = {s for s in sources if manifest.is_current("features", s, hashes[s], features_csv)}
+
+    # Keep the rows that are still current and drop those that are about to be recomputed
+    rows = []
+    if os.path.exists(features_csv):
+        with open(features_csv, "r", newline="") as f:
+            rows = [row for row in csv.reader(f)][1:]
+    with open(features_csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(feature_names)
+        writer.writerows(row for row in rows if row[0] in current)
+
+    with open(features_csv, "a", newline="") as f:
+        writer = csv.writer(f)
+
+        def append_row(row):
+            writer.writerow(row)
+            f.flush()
+
+        run_stage("features", sources, lambda s: features_csv, lambda s: (feature_row, s),
+                  manifest, workers, on_result=append_row, hashes=hashes)
+
+
+def store_entries(sources):
+    """The clean clips of a known category, keyed by their content hash like data.SpectrogramLoader splits them."""
+    entries = []
+    for source in sources:
+        label = os.path.basename(os.path.dirname(source)).replace("clean_", "", 1)
+        if label in CLASSES:
+            entries.append(StoreEntry(source, file_hash(source), label))
+        else:
+            print(f"Skipping {source}: unknown category {label}")
+    return entries
+
+
+def run_store(sources, store_path, workers):
+    start = time.perf_counter()
+    entries = store_entries(sources)
+    store_params = params_hash(STAGE_PARAMS["store"])
+    writer = FeatureStoreWriter(store_path, entries, STORE_COLUMNS, CLASSES,
+                                {"params": store_params, "scalar_names": feature_names[1:-1]})
+    reused = set()
+    if os.path.exists(os.path.join(store_path, FeatureStore.META_NAME)):
+        previous = FeatureStore(store_path)
+        if previous.meta.get("params") == store_params:
+            reused = writer.reuse(previous)
+
+    pending = [entry.source for entry in entries if entry.source not in reused]
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(store_row, source) for source in pending]):
+            result = future.result()
+            if result is None:
+                failed += 1
+                continue
+            writer.write(result[0], **result[1])
+            done += 1
+    writer.close()
+    report("store", done, len(reused), failed, start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--raw", default="raw_audio", help="raw_<category> folders of recordings")
+    parser.add_argument("--clean", default="clean_audio", help="output folder of the clean stage")
+    parser.add_argument("--spectrograms", default="spectrogram", help="output folder of the spectrogram stage")
+    parser.add_argument("--features", default="features.csv", help="output CSV of the feature stage")
+    parser.add_argument("--store", default="feature_store", help="output folder of the feature store stage")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    os.makedirs(args.clean, exist_ok=True)
+    manifest = Manifest(os.path.join(args.clean, MANIFEST_NAME))
+
+    if "clean" in args.stages:
+        run_stage("clean", list_wavs(args.raw), lambda s: cleaned_path(s, args.clean),
+                  lambda s: (clean_safe, s, args.clean), manifest, args.workers)
+    if "spectrogram" in args.stages:
+        run_stage("spectrogram", list_wavs(args.clean), lambda s: spectrogram_path(s, args.spectrograms),
+                  lambda s: (render_spectrogram_file, s, args.spectrograms), manifest, args.workers)
+    if "features" in args.stages:
+        run_features(list_wavs(args.clean), args.features, manifest, args.workers)
+    if "store" in args.stages:
+        run_store(list_wavs(args.clean), args.store, args.workers)
+
+
+if __name__ == "__main__":
+    main()
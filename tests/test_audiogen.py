@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+from cry_generator import audiogen_v2
+
+CATEGORIES = ["hungry", "tired"]
+PROMPT_RATE = 8000
+
+
+class FakeAudioGen:
+    """AudioGen's generation interface on NumPy arrays: every clip of a call is filled with the call number."""
+
+    sample_rate = 16000
+
+    def __init__(self):
+        self.duration = None
+        self.batch_sizes = []
+
+    def set_generation_params(self, duration, **_):
+        self.duration = duration
+
+    def generate_continuation(self, prompt, prompt_sample_rate, descriptions, progress=False):
+        assert prompt.ndim == 3 and len(descriptions) == len(prompt)
+        self.batch_sizes.append(len(prompt))
+        samples = int(self.duration * self.sample_rate) // 100
+        return np.full((len(prompt), 1, samples), len(self.batch_sizes) / 100, dtype=np.float32)
+
+
+def fake_prompts(category_path):
+    # Two prompts of one shape and a shorter one, which is never batched with them
+    return [(f"{name}.wav", np.zeros((1, length), dtype=np.float32), PROMPT_RATE)
+            for name, length in (("a", 2 * PROMPT_RATE), ("b", 2 * PROMPT_RATE), ("c", PROMPT_RATE))]
+
+
+def write_wav(path, wav, sample_rate):
+    sf.write(f"{path}.wav", wav[0], sample_rate)
+
+
+class GenerateTest(unittest.TestCase):
+    def setUp(self):
+        self.work = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work)
+        self.input_path = os.path.join(self.work, "prompts")
+        self.output_path = os.path.join(self.work, "generated")
+        for category in CATEGORIES:
+            os.makedirs(os.path.join(self.input_path, category))
+        patches = [mock.patch.object(audiogen_v2, "load_prompts", fake_prompts),
+                   mock.patch.object(audiogen_v2, "stack_prompts", np.stack)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.model = FakeAudioGen()
+        self.model.set_generation_params(**audiogen_v2.GENERATION_PARAMS)
+
+    def generate(self, quantity, batch_size=2, write_fn=write_wav):
+        return audiogen_v2.gen_audios_per_category(
+            quantity, self.model, batch_size, self.input_path, self.output_path, write_fn)
+
+    def wavs(self, category):
+        return sorted(f for f in os.listdir(os.path.join(self.output_path, category)) if f.endswith(".wav"))
+
+    def manifest(self):
+        with open(os.path.join(self.output_path, audiogen_v2.MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_generates_the_quantity_of_every_category(self):
+        self.assertEqual(self.generate(5, batch_size=3), {category: 5 for category in CATEGORIES})
+        for category in CATEGORIES:
+            self.assertEqual(self.wavs(category), [f"{category}-{i:05d}.wav" for i in range(5)])
+            self.assertEqual(len(self.manifest()[category]["files"]), 5)
+        self.assertEqual(sum(self.model.batch_sizes), 10)
+        self.assertLessEqual(max(self.model.batch_sizes), 3)
+
+    def test_resumes_without_overwriting_clips_missing_from_the_manifest(self):
+        self.generate(4)
+        contents = {f: sf.read(os.path.join(self.output_path, "hungry", f))[0] for f in self.wavs("hungry")}
+        # A crash before the writer saved the manifest leaves saved clips out of it
+        manifest = self.manifest()
+        manifest["hungry"]["files"] = manifest["hungry"]["files"][:1]
+        with open(os.path.join(self.output_path, audiogen_v2.MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+        self.assertEqual(self.generate(6), {category: 2 for category in CATEGORIES})
+        self.assertEqual(self.wavs("hungry"), [f"hungry-{i:05d}.wav" for i in range(6)])
+        for name, y in contents.items():
+            np.testing.assert_array_equal(sf.read(os.path.join(self.output_path, "hungry", name))[0], y)
+        self.assertEqual(len(self.manifest()["hungry"]["files"]), 6)
+
+    def test_writer_errors_reach_the_caller(self):
+        def failing_write(path, wav, sample_rate):
+            raise OSError("disk full")
+
+        with self.assertRaisesRegex(OSError, "disk full"):
+            self.generate(4, write_fn=failing_write)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import unittest
+
+import numpy as np
+from fastapi import HTTPException
+
+from api.core.batching import BatchScheduler
+from api.core.executors import BoundedExecutor
+
+
+class RejectingOnceExecutor:
+    """A BoundedExecutor whose first submission is rejected with a 503, as when its queue is full."""
+
+    def __init__(self, executor: BoundedExecutor):
+        self.executor = executor
+        self.max_workers = executor.max_workers
+        self.max_queue = executor.max_queue
+        self.timeout = executor.timeout
+        self.calls = 0
+
+    async def run(self, func, *args):
+        self.calls += 1
+        if self.calls == 1:
+            raise HTTPException(status_code=503, detail="full")
+        return await self.executor.run(func, *args)
+
+
+def double(batch):
+    return batch * 2
+
+
+class BatchSchedulerTest(unittest.TestCase):
+    def executor(self, **limits):
+        executor = BoundedExecutor("test", **{"max_workers": 1, "max_queue": 0, "timeout": 5.0, **limits})
+        self.addCleanup(executor.shutdown)
+        return executor
+
+    def test_full_queue_is_rejected(self):
+        release = threading.Event()
+        scheduler = BatchScheduler("test", lambda batch: release.wait(5) and batch, self.executor(),
+                                   max_batch_size=2, max_wait_ms=1.0)
+
+        async def scenario():
+            # The first request takes the only executor slot, the next two fill the queue of 2 items
+            waiting = [asyncio.ensure_future(scheduler.predict(np.ones(1)))]
+            await asyncio.sleep(0.05)
+            waiting += [asyncio.ensure_future(scheduler.predict(np.ones(1))) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with self.assertRaises(HTTPException) as rejected:
+                await scheduler.predict(np.ones(1))
+            release.set()
+            await asyncio.gather(*waiting)
+            scheduler.close()
+            return rejected.exception.status_code
+
+        self.assertEqual(asyncio.run(scenario()), 503)
+
+    def test_waiter_times_out(self):
+        release = threading.Event()
+        scheduler = BatchScheduler("test", lambda batch: release.wait(5) and batch, self.executor(timeout=0.05),
+                                   max_batch_size=2, max_wait_ms=1.0)
+
+        async def scenario():
+            with self.assertRaises(HTTPException) as timed_out:
+                await scheduler.predict(np.ones(1))
+            release.set()
+            scheduler.close()
+            return timed_out.exception.status_code
+
+        self.assertEqual(asyncio.run(scenario()), 504)
+
+    def test_rejected_batch_does_not_stop_the_scheduler(self):
+        scheduler = BatchScheduler("test", double, RejectingOnceExecutor(self.executor()),
+                                   max_batch_size=4, max_wait_ms=1.0)
+
+        async def scenario():
+            with self.assertRaises(HTTPException) as rejected:
+                await scheduler.predict(np.ones(1))
+            result = await scheduler.predict(np.ones(1))
+            scheduler.close()
+            return rejected.exception.status_code, result
+
+        status_code, result = asyncio.run(scenario())
+        self.assertEqual(status_code, 503)
+        np.testing.assert_array_equal(result, [2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
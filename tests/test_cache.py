@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from api.core.cache import PredictionCache
+
+
+class DiskTierTest(unittest.TestCase):
+    def setUp(self):
+        self.disk_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.disk_path)
+
+    def files(self):
+        return sorted(name for name in os.listdir(self.disk_path) if name.endswith(".json"))
+
+    def age(self, key, seconds):
+        path = os.path.join(self.disk_path, f"{key}.json")
+        then = time.time() - seconds
+        os.utime(path, (then, then))
+
+    def test_oldest_files_are_deleted_past_the_limit(self):
+        cache = PredictionCache(max_entries=100, ttl_seconds=3600.0, disk_path=self.disk_path, max_disk_entries=10)
+        for i in range(10):
+            cache.set(f"key-{i:02d}", i)
+            self.age(f"key-{i:02d}", 100 - i)
+        self.assertEqual(len(self.files()), 10)
+
+        cache.set("key-10", 10)
+        self.assertEqual(self.files(), [f"key-{i:02d}.json" for i in range(2, 11)])
+        self.assertEqual(cache.stats()["disk_evictions"], 2)
+
+    def test_expired_files_are_deleted_first(self):
+        cache = PredictionCache(max_entries=100, ttl_seconds=60.0, disk_path=self.disk_path, max_disk_entries=4)
+        for i in range(4):
+            cache.set(f"key-{i}", i)
+        self.age("key-2", 120)
+        self.age("key-3", 120)
+
+        cache.set("key-4", 4)
+        self.assertEqual(self.files(), ["key-0.json", "key-1.json", "key-4.json"])
+
+    def test_files_of_a_previous_run_count_towards_the_limit(self):
+        PredictionCache(max_entries=100, ttl_seconds=3600.0, disk_path=self.disk_path).set("old", 0)
+        self.age("old", 100)
+        cache = PredictionCache(max_entries=100, ttl_seconds=3600.0, disk_path=self.disk_path, max_disk_entries=1)
+        cache.set("new", 1)
+        self.assertEqual(self.files(), ["new.json"])
+        self.assertEqual(cache.get("new"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import pickle
+import unittest
+import warnings
+
+import numpy as np
+
+from api.core.constants import FOREST_MODEL_PATH
+from api.ml_logic.compiled_forest import CompiledForest
+from api.ml_logic.features import AudioFeatures
+
+AUDIO_FOLDER = "./data/input_data/audio"
+PICKLE_PATH = "Forest_5_98.pkl"
+
+
+def normalised_reference(forest, X):
+    """What scikit-learn returned for this model when it was trained: per-tree normalised leaf values, in tree order."""
+    proba = np.zeros((len(X), len(forest.classes_)))
+    for estimator in forest.estimators_:
+        tree_proba = estimator.predict_proba(X)
+        normalizer = tree_proba.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        proba += tree_proba / normalizer
+    return proba / len(forest.estimators_)
+
+
+class CompiledForestTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            with open(PICKLE_PATH, "rb") as file:
+                cls.forest = pickle.load(file)
+        clips = np.array([AudioFeatures(os.path.join(AUDIO_FOLDER, f)).mfcc.reshape(-1)
+                          for f in sorted(os.listdir(AUDIO_FOLDER)) if f.endswith(".wav")])
+        rng = np.random.default_rng(0)
+        random_rows = rng.normal(clips.mean(), clips.std(), (256, clips.shape[1]))
+        # One row per tree sitting on its root split, where the float32 cast of the feature decides the branch
+        compiled = CompiledForest.from_sklearn(cls.forest)
+        on_threshold = np.repeat(clips[:1], len(compiled.roots), axis=0)
+        for row, root in zip(on_threshold, compiled.roots):
+            row[compiled.feature[root]] = compiled.threshold[root]
+        cls.X = np.concatenate([clips, random_rows, on_threshold])
+
+    def test_matches_the_normalised_sklearn_forest(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            reference = normalised_reference(self.forest, self.X)
+        np.testing.assert_allclose(CompiledForest.from_sklearn(self.forest).predict_proba(self.X), reference,
+                                   rtol=0, atol=1e-12)
+
+    def test_served_npz_is_compiled_from_the_pickle(self):
+        served = CompiledForest.load(FOREST_MODEL_PATH)
+        fresh = CompiledForest.from_sklearn(self.forest)
+        for name in CompiledForest.ARRAYS:
+            attribute = "classes_" if name == "classes" else name
+            with self.subTest(array=name):
+                np.testing.assert_array_equal(getattr(served, attribute), getattr(fresh, attribute))
+        self.assertEqual((served.n_features_in_, served.max_depth), (fresh.n_features_in_, fresh.max_depth))
+        np.testing.assert_array_equal(served.predict_proba(self.X), fresh.predict_proba(self.X))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from api.ml_logic.data import SpectrogramLoader
+from api.ml_logic.feature_store import SPLITS, FeatureStoreWriter
+from testing.audio_to_spec import spectrogram_path
+from testing.pipeline import list_wavs, store_entries
+
+CATEGORIES = ["hungry", "tired"]
+CLIPS_PER_CATEGORY = 20
+
+
+class SplitTest(unittest.TestCase):
+    def setUp(self):
+        self.work = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work)
+        self.clean = os.path.join(self.work, "clean_audio")
+        self.spectrograms = os.path.join(self.work, "spectrogram")
+        # The folder layout the clean and spectrogram stages of testing.pipeline write
+        rng = np.random.default_rng(0)
+        for category in CATEGORIES:
+            os.makedirs(os.path.join(self.clean, f"clean_{category}"))
+            for i in range(CLIPS_PER_CATEGORY):
+                clip = os.path.join(self.clean, f"clean_{category}", f"{category}-{i}_cleaned.wav")
+                with open(clip, "wb") as f:
+                    f.write(rng.bytes(64))
+                png = spectrogram_path(clip, self.spectrograms)
+                os.makedirs(os.path.dirname(png), exist_ok=True)
+                Image.new("RGB", (4, 4)).save(png)
+
+    def test_loader_and_feature_store_agree(self):
+        entries = store_entries(list_wavs(self.clean))
+        writer = FeatureStoreWriter(os.path.join(self.work, "store"), entries, {"x": ((1,), "float32")}, CATEGORIES)
+        for entry in entries:
+            writer.write(entry.source, x=np.zeros(1))
+        store = writer.close()
+        stored = {}
+        for split in SPLITS:
+            for source in store.sources[store.rows(split)]:
+                stored[os.path.splitext(os.path.basename(source))[0]] = split
+
+        loader = SpectrogramLoader(self.spectrograms, audio_path=self.clean, classes=CATEGORIES)
+        loaded = {}
+        for split in SPLITS:
+            for shard in loader.shards[split]:
+                for path in shard:
+                    loaded[os.path.splitext(os.path.basename(path))[0]] = split
+
+        self.assertEqual(len(stored), len(CATEGORIES) * CLIPS_PER_CATEGORY)
+        self.assertEqual(set(stored.values()), set(SPLITS))
+        self.assertEqual(loaded, stored)
+
+
+if __name__ == "__main__":
+    unittest.main()
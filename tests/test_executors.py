@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import unittest
+
+from fastapi import HTTPException
+
+from api.core.executors import BoundedExecutor
+
+
+class BoundedExecutorTest(unittest.TestCase):
+    def test_timed_out_queued_task_releases_its_slot(self):
+        executor = BoundedExecutor("test", max_workers=1, max_queue=2, timeout=0.05)
+        release = threading.Event()
+        self.addCleanup(executor.shutdown)
+
+        async def scenario():
+            # The first task holds the only worker, so the second one times out while still queued
+            results = await asyncio.gather(
+                executor.run(release.wait, 5),
+                executor.run(lambda: None),
+                return_exceptions=True
+            )
+            release.set()
+            return results
+
+        results = asyncio.run(scenario())
+        self.assertEqual([r.status_code for r in results], [504, 504])
+        executor._executor.shutdown(wait=True)
+        stats = executor.stats()
+        self.assertEqual(stats["running"], 0)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["timed_out"], 2)
+
+    def test_pool_accepts_work_after_timeouts(self):
+        executor = BoundedExecutor("test", max_workers=1, max_queue=0, timeout=0.05)
+        release = threading.Event()
+        self.addCleanup(executor.shutdown)
+
+        async def scenario():
+            with self.assertRaises(HTTPException):
+                await executor.run(release.wait, 5)
+            release.set()
+            await asyncio.sleep(0.05)
+            return await executor.run(lambda: 42)
+
+        self.assertEqual(asyncio.run(scenario()), 42)
+        self.assertEqual(executor.stats()["rejected"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
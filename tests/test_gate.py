@@ -0,0 +1,97 @@
+import io
+import unittest
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.apps.pages import services
+from api.apps.routers import apps_router
+from api.core.configurations import gate_settings
+from api.ml_logic.gate import detect_cry
+from api.ml_logic.preprpcessings import DecodedAudio, decode_audio
+
+SAMPLE_RATE = 8000
+AUDIO_PATH = "./data/input_data/audio/643D64AD-B711-469A-AF69-55C0D5D3E30F-1430138506-1.0-m-72-bp.wav"
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(apps_router)
+    return TestClient(app)
+
+
+def clips():
+    """Two seconds of a recording the gate rejects, per reason."""
+    rng = np.random.default_rng(0)
+    t = np.arange(2 * SAMPLE_RATE) / SAMPLE_RATE
+    burst = np.where(t < 0.2, 0.5 * np.sin(2 * np.pi * 400 * t), 0.0)
+    return {
+        "silent": np.zeros(2 * SAMPLE_RATE),
+        "too_short": burst,
+        "noise": rng.uniform(-0.3, 0.3, 2 * SAMPLE_RATE),
+    }
+
+
+def wav_bytes(y):
+    buffer = io.BytesIO()
+    sf.write(buffer, y, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+class DetectCryTest(unittest.TestCase):
+    def thresholds(self):
+        thresholds = dict(gate_settings.gate)
+        thresholds.pop("enabled")
+        return thresholds
+
+    def test_rejects_with_the_matching_reason(self):
+        for reason, y in clips().items():
+            with self.subTest(reason=reason):
+                gate = detect_cry(DecodedAudio(y.astype(np.float32), SAMPLE_RATE), **self.thresholds())
+                self.assertFalse(gate.cry_detected)
+                self.assertEqual(gate.reason, reason)
+
+    def test_accepts_a_cry(self):
+        gate = detect_cry(decode_audio(AUDIO_PATH, sample_rate=SAMPLE_RATE), **self.thresholds())
+        self.assertTrue(gate.cry_detected)
+        self.assertIsNone(gate.reason)
+
+
+class GatedUploadTest(unittest.TestCase):
+    def test_json_api_returns_the_gate_result_only(self):
+        files = [("files", (f"{reason}.wav", wav_bytes(y), "audio/wav")) for reason, y in clips().items()]
+        with make_client() as client:
+            for model in ("vgg16", "forest"):
+                with self.subTest(model=model):
+                    response = client.post(f"/api/v1/{model}/predict?include_spectrogram=true", files=files)
+                    self.assertEqual(response.status_code, 200)
+                    for reason, result in zip(clips(), response.json()["results"]):
+                        self.assertEqual(result, {"filename": f"{reason}.wav", "cry_detected": False, "reason": reason})
+
+    def test_pages_show_the_gate_message_only(self):
+        original_run = services.preprocessing_executor.run
+        tasks = []
+
+        async def counting_run(func, *args):
+            tasks.append(func)
+            return await original_run(func, *args)
+
+        with make_client() as client, mock.patch.object(services.preprocessing_executor, "run", counting_run):
+            for page in ("/vgg16/", "/forest/"):
+                for reason, y in clips().items():
+                    with self.subTest(page=page, reason=reason):
+                        tasks.clear()
+                        response = client.post(page, files={"file": (f"{reason}.wav", wav_bytes(y), "audio/wav")})
+                        self.assertEqual(response.status_code, 200)
+                        self.assertIn(services.NO_CRY_MESSAGES[reason], response.text)
+                        self.assertNotIn("Spectrogram Image", response.text)
+                        self.assertNotIn("/statics/pics/", response.text)
+                        # Decoding and the gate share one preprocessing task, and nothing runs after them
+                        self.assertEqual(tasks, [services.screen_uploads])
+
+
+if __name__ == "__main__":
+    unittest.main()
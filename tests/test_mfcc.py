@@ -0,0 +1,62 @@
+import os
+import unittest
+
+import librosa
+import numpy as np
+
+from api.ml_logic.preprpcessings import decode_audio, extract_mfcc
+
+AUDIO_FOLDER = "./data/input_data/audio"
+
+
+def reference_mfcc(y, sr, pre_emphasis=0.97, frame_size=0.025, frame_stride=0.01,
+                   NFFT=512, nfilt=40, num_ceps=12, fixed_length=100):
+    """extract_mfcc as originally written, filter bank loop included, with librosa's MFCC DCT."""
+    emphasized_signal = np.append(y[0], y[1:] - pre_emphasis * y[:-1])
+    frame_length = int(round(frame_size * sr))
+    frame_step = int(round(frame_stride * sr))
+    num_frames = int(np.ceil(float(np.abs(len(emphasized_signal) - frame_length)) / frame_step))
+    pad_signal = np.append(emphasized_signal, np.zeros(num_frames * frame_step + frame_length - len(emphasized_signal)))
+    indices = np.arange(frame_length)[np.newaxis, :] + np.arange(0, num_frames * frame_step, frame_step)[:, np.newaxis]
+    frames = pad_signal[indices] * np.hamming(frame_length)
+    pow_frames = (1.0 / NFFT) * np.absolute(np.fft.rfft(frames, NFFT)) ** 2
+
+    high_freq_mel = 2595 * np.log10(1 + (sr / 2) / 700)
+    hz_points = 700 * (10 ** (np.linspace(0, high_freq_mel, nfilt + 2) / 2595) - 1)
+    bin = np.floor((NFFT + 1) * hz_points / sr)
+    fbank = np.zeros((nfilt, NFFT // 2 + 1))
+    for m in range(1, nfilt + 1):
+        for k in range(int(bin[m - 1]), int(bin[m])):
+            fbank[m - 1, k] = (k - bin[m - 1]) / (bin[m] - bin[m - 1])
+        for k in range(int(bin[m]), int(bin[m + 1])):
+            fbank[m - 1, k] = (bin[m + 1] - k) / (bin[m + 1] - bin[m])
+
+    filter_banks = np.dot(pow_frames, fbank.T)
+    filter_banks = 20 * np.log10(np.where(filter_banks == 0, np.finfo(float).eps, filter_banks))
+    mfcc = librosa.feature.mfcc(S=filter_banks.T, n_mfcc=num_ceps + 1, dct_type=2, norm="ortho")[1:].T
+    mfcc = mfcc[:fixed_length]
+    return np.pad(mfcc, ((0, fixed_length - len(mfcc)), (0, 0)))
+
+
+class ExtractMfccTest(unittest.TestCase):
+    def test_matches_the_reference_implementation(self):
+        paths = [os.path.join(AUDIO_FOLDER, f) for f in sorted(os.listdir(AUDIO_FOLDER)) if f.endswith(".wav")]
+        for sample_rate in (8000, 22050):
+            for path in paths:
+                with self.subTest(sample_rate=sample_rate, path=os.path.basename(path)):
+                    audio = decode_audio(path, sample_rate=sample_rate)
+                    expected = reference_mfcc(audio.y, audio.sr)
+                    actual = extract_mfcc(audio)
+                    self.assertEqual(actual.shape, (100, 12))
+                    np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-9)
+
+    def test_short_clips_are_zero_padded(self):
+        audio = decode_audio(os.path.join(AUDIO_FOLDER, sorted(os.listdir(AUDIO_FOLDER))[0]), sample_rate=8000)
+        short = audio._replace(y=audio.y[:8000 // 4])
+        mfcc = extract_mfcc(short)
+        np.testing.assert_allclose(mfcc, reference_mfcc(short.y, short.sr), rtol=1e-10, atol=1e-9)
+        self.assertTrue(np.all(mfcc[30:] == 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from api.apps.api_v1.streaming import streaming_endpoint
+from api.core.configurations import streaming_settings
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(streaming_endpoint, prefix="/api/v1")
+    return TestClient(app)
+
+
+class StreamLimitsTest(unittest.TestCase):
+    def test_sample_rate_outside_the_range_is_refused(self):
+        limits = streaming_settings.limits
+        for sample_rate in (0, limits["min_sample_rate"] - 1, limits["max_sample_rate"] + 1, 10 ** 9):
+            with self.subTest(sample_rate=sample_rate), make_client() as client:
+                with self.assertRaises(WebSocketDisconnect) as closed:
+                    with client.websocket_connect(f"/api/v1/stream?sample_rate={sample_rate}") as websocket:
+                        websocket.receive_json()
+                self.assertEqual(closed.exception.code, 1003)
+
+    def test_oversized_message_closes_the_stream(self):
+        samples = np.zeros(streaming_settings.limits["max_message_bytes"] // 2 + 1, dtype="<i2")
+        with make_client() as client:
+            with client.websocket_connect("/api/v1/stream?sample_rate=16000") as websocket:
+                websocket.send_bytes(np.zeros(1600, dtype="<i2").tobytes())
+                websocket.send_bytes(samples.tobytes())
+                with self.assertRaises(WebSocketDisconnect) as closed:
+                    websocket.receive_json()
+        self.assertEqual(closed.exception.code, 1009)
+
+
+if __name__ == "__main__":
+    unittest.main()
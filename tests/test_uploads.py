@@ -0,0 +1,49 @@
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.apps.routers import apps_router
+from api.core.models import forest_model
+
+AUDIO_PATH = "./data/input_data/audio/643D64AD-B711-469A-AF69-55C0D5D3E30F-1430138506-1.0-m-72-bp.wav"
+
+
+def make_client():
+    # The routes without main's middleware, which needs the secret key of configurations.yaml
+    app = FastAPI()
+    app.include_router(apps_router)
+    return TestClient(app)
+
+
+class UploadTest(unittest.TestCase):
+    def test_undecodable_upload_is_rejected(self):
+        with make_client() as client:
+            for name, content in (("empty.wav", b""), ("corrupt.wav", b"RIFF" + b"\x00" * 100)):
+                with self.subTest(name=name):
+                    response = client.post("/forest/", files={"file": (name, content, "audio/wav")})
+                    self.assertEqual(response.status_code, 422)
+                    self.assertIn(name, response.json()["detail"])
+
+    def test_undecodable_file_of_a_batch_gets_an_error_entry(self):
+        forest_model.start()
+        self.assertTrue(forest_model.wait(30))
+        with open(AUDIO_PATH, "rb") as f:
+            cry = f.read()
+        with make_client() as client:
+            response = client.post("/api/v1/forest/predict?include_spectrogram=true", files=[
+                ("files", ("corrupt.wav", b"RIFF" + b"\x00" * 100, "audio/wav")),
+                ("files", ("cry.wav", cry, "audio/wav")),
+            ])
+        self.assertEqual(response.status_code, 200)
+        corrupt, cry = response.json()["results"]
+        self.assertEqual(corrupt["filename"], "corrupt.wav")
+        self.assertIn("error", corrupt)
+        self.assertNotIn("predictions", corrupt)
+        self.assertTrue(cry["cry_detected"])
+        self.assertIn("predictions", cry)
+        self.assertIn("spectrogram", cry)
+
+
+if __name__ == "__main__":
+    unittest.main()